@@ -0,0 +1,91 @@
+"""Benchmark the per-call overhead of the execution introspection wrappers
+
+Run with `python benchmarks/bench_execution.py`.
+"""
+
+import gc
+import timeit
+import tracemalloc
+from typing import Dict
+
+from contemplation import (
+    CallCounter,
+    ExecutionTimer,
+    FunctionLogger,
+    Introspector,
+    MemoryProfiler,
+)
+
+
+def add(a, b):
+    return a + b
+
+
+def stacked(func, count=False, time=False, log=False, log_args=False):
+    if log or log_args:
+        func = FunctionLogger().log_function(log_args, log_args)(func)
+    if time:
+        func = ExecutionTimer().time_execution(func)
+    if count:
+        func = CallCounter().count_calls(func)
+    return func
+
+
+# each case builds a fresh wrapper so the results recorded by one run do not slow down the next
+CASES = [
+    ("bare function", lambda: add),
+    ("count_calls", lambda: stacked(add, count=True)),
+    ("time_execution", lambda: stacked(add, time=True)),
+    ("log_function", lambda: stacked(add, log=True)),
+    ("log_function (args, returns)", lambda: stacked(add, log_args=True)),
+    (
+        "profile_memory (blocks)",
+        lambda: MemoryProfiler(mode="blocks").profile_memory(add),
+    ),
+    ("profile_memory (bytes)", lambda: MemoryProfiler().profile_memory(add)),
+    ("count_calls + time_execution", lambda: stacked(add, count=True, time=True)),
+    (
+        "count_calls + time_execution + log_function",
+        lambda: stacked(add, count=True, time=True, log=True),
+    ),
+    ("Introspector (count, time)", lambda: Introspector().introspect(add)),
+    (
+        "Introspector (count, time, log)",
+        lambda: Introspector(log_calls=True).introspect(add),
+    ),
+    (
+        "Introspector (adaptive, demoted)",
+        lambda: Introspector(adaptive=True, demote_after=100).introspect(add),
+    ),
+]
+
+
+def bench(number: int = 200_000, repeat: int = 3) -> Dict[str, float]:
+    """Time each case, taking the best of several runs
+
+    Args:
+        number (int, optional): The number of calls per run. Defaults to 200_000.
+        repeat (int, optional): The number of runs. Defaults to 3.
+
+    Returns:
+        Dict[str, float]: The time per call in nanoseconds by case
+    """
+    results = {}
+    print(f"{'Case':<44} | {'Per call (ns)':<13}")
+    print("-" * 60)
+    for name, make_func in CASES:
+        runs = []
+        for _ in range(repeat):
+            func = make_func()  # the previous wrapper and its results are released here
+            runs.append(timeit.timeit(lambda: func(1, 2), number=number))
+            gc.collect()
+        # profile_memory starts tracemalloc, which would slow down the cases after it
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        results[name] = min(runs) / number * 1e9
+        print(f"{name:<44} | {results[name]:<13.0f}")
+    return results
+
+
+if __name__ == "__main__":
+    bench()
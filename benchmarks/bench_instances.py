@@ -0,0 +1,67 @@
+"""Benchmark counting instances as the heap grows
+
+`how_many_of_type_exist` scans every object tracked by the garbage collector unless the class is
+registered with `track_instances` or a census is given, so its cost grows with the size of the heap.
+
+Run with `python benchmarks/bench_instances.py`.
+"""
+
+import gc
+import timeit
+from typing import Dict
+
+from contemplation import how_many_of_type_exist, take_heap_census, track_instances
+
+
+class Untracked:
+    pass
+
+
+@track_instances
+class Tracked:
+    pass
+
+
+def bench(
+    heap_sizes=(0, 100_000, 1_000_000), number: int = 5, repeat: int = 3
+) -> Dict[str, float]:
+    """Count instances with extra objects on the heap, taking the best of several runs
+
+    Args:
+        heap_sizes (tuple, optional): The numbers of extra objects to allocate. Defaults to (0, 100_000, 1_000_000).
+        number (int, optional): The number of counts per run. Defaults to 5.
+        repeat (int, optional): The number of runs. Defaults to 3.
+
+    Returns:
+        Dict[str, float]: The time per count in microseconds by case and number of extra objects
+    """
+    results = {}
+    instances = [Untracked() for _ in range(100)] + [Tracked() for _ in range(100)]
+    print(f"{'Case':<40} | {'Objects':<9} | {'Per count (us)':<14}")
+    print("-" * 69)
+    for heap_size in heap_sizes:
+        # lists so that each one is tracked by the garbage collector
+        ballast = [[] for _ in range(heap_size)]
+        objects = len(gc.get_objects())
+        cases = [
+            ("how_many_of_type_exist", lambda: how_many_of_type_exist(Untracked)),
+            (
+                "how_many_of_type_exist (track_instances)",
+                lambda: how_many_of_type_exist(Tracked),
+            ),
+            ("take_heap_census", lambda: take_heap_census().count(Untracked)),
+        ]
+        for name, count in cases:
+            per_count = (
+                min(timeit.repeat(count, number=number, repeat=repeat)) / number * 1e6
+            )
+            case = f"{name} + {heap_size}"
+            results[case] = per_count
+            print(f"{name:<40} | {objects:<9} | {per_count:<14.1f}")
+        del ballast
+    del instances
+    return results
+
+
+if __name__ == "__main__":
+    bench()
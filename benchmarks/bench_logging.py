@@ -0,0 +1,55 @@
+"""Benchmark the throughput of FunctionLogger as the log grows, with and without capturing arguments
+
+Run with `python benchmarks/bench_logging.py`.
+"""
+
+import gc
+import time
+from typing import Dict
+
+from contemplation import FunctionLogger
+
+
+def add(a, b):
+    return a + b
+
+
+CASES = [
+    ("no capture", False, False),
+    ("args", True, False),
+    ("args, returns", True, True),
+]
+
+
+def bench(sizes=(10_000, 100_000, 1_000_000), repeat: int = 3) -> Dict[str, float]:
+    """Log a number of calls into a fresh logger, taking the best of several runs
+
+    Args:
+        sizes (tuple, optional): The numbers of calls to log. Defaults to (10_000, 100_000, 1_000_000).
+        repeat (int, optional): The number of runs. Defaults to 3.
+
+    Returns:
+        Dict[str, float]: The time per logged call in nanoseconds by case and number of calls
+    """
+    results = {}
+    print(f"{'Case':<28} | {'Per call (ns)':<13} | {'Calls per second':<16}")
+    print("-" * 63)
+    for name, log_args, log_returns in CASES:
+        for size in sizes:
+            runs = []
+            for _ in range(repeat):
+                func = FunctionLogger().log_function(log_args, log_returns)(add)
+                start_time = time.perf_counter()
+                for i in range(size):
+                    func(i, 1)
+                runs.append(time.perf_counter() - start_time)
+                del func
+                gc.collect()
+            case = f"{name} x {size}"
+            results[case] = min(runs) / size * 1e9
+            print(f"{case:<28} | {results[case]:<13.0f} | {size / min(runs):<16.0f}")
+    return results
+
+
+if __name__ == "__main__":
+    bench()
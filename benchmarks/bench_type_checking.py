@@ -0,0 +1,178 @@
+"""Benchmark deep type checking and type introspection
+
+Each case is also checked with a copy of the recursive `_deep_is_of_type` that interpreted the
+annotation on every call, before checkers were compiled, to show the speedup.
+
+Run with `python benchmarks/bench_type_checking.py`.
+"""
+
+import array
+import timeit
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from contemplation.experimental import _deep_is_of_type, introspect_type, type_enforced
+
+CASES = [
+    ("int", 1, int),
+    ("List[int] x 1000", list(range(1000)), List[int]),
+    (
+        "Dict[str, List[int]] x 100 x 10",
+        {str(i): list(range(10)) for i in range(100)},
+        Dict[str, List[int]],
+    ),
+    (
+        "List[Union[int, str]] x 1000",
+        [i if i % 2 else str(i) for i in range(1000)],
+        List[Union[int, str]],
+    ),
+    (
+        "List[Tuple[int]] x 1000",
+        [(i,) for i in range(1000)],
+        List[Tuple[int]],
+    ),
+    ("List[int] x 1000000", list(range(1_000_000)), List[int]),
+    (
+        "Dict[str, float] x 100000",
+        {str(i): float(i) for i in range(100_000)},
+        Dict[str, float],
+    ),
+    (
+        "Iterable[int] array x 1000000",
+        array.array("q", range(1_000_000)),
+        Iterable[int],
+    ),
+]
+
+
+def reference_deep_is_of_type(parameter: object, parameter_type: type) -> bool:
+    """The recursive deep type check from before checkers were compiled, kept unchanged for comparison"""
+    if parameter_type is Any:
+        return True
+
+    if isinstance(parameter_type, type(Union)):
+        return any(
+            reference_deep_is_of_type(parameter, t) for t in get_args(parameter_type)
+        )
+
+    origin = get_origin(parameter_type)
+    if origin is None:
+        return isinstance(parameter, parameter_type)
+
+    args = get_args(parameter_type)
+
+    if args:
+        if origin is dict:
+            key_type, value_type = args
+            return all(
+                reference_deep_is_of_type(k, key_type)
+                and reference_deep_is_of_type(v, value_type)
+                for k, v in parameter.items()
+            )
+        elif origin is Generator:
+            if not hasattr(parameter, "next") and not hasattr(parameter, "__next__"):
+                return False
+            return True
+        elif origin is Callable:
+            if not hasattr(parameter, "__call__"):
+                return False
+            return True
+        elif origin in {list, tuple, set, frozenset}:
+            (element_type,) = args
+            return all(
+                reference_deep_is_of_type(item, element_type) for item in parameter
+            )
+        elif origin is Iterable:
+            return (
+                all(
+                    reference_deep_is_of_type(item, get_args(parameter_type)[0])
+                    for item in parameter
+                )
+                if isinstance(parameter, Iterable)
+                else False
+            )
+
+    return isinstance(parameter, parameter_type)
+
+
+def time_reference(value: Any, annotation: Any, number: int) -> Optional[float]:
+    """Time the reference check, None if it cannot check the annotation at all"""
+    try:
+        reference_deep_is_of_type(value, annotation)
+    except TypeError:
+        # e.g. Iterable[int], whose origin never matched so it reached isinstance
+        return None
+    return timeit.timeit(
+        lambda: reference_deep_is_of_type(value, annotation), number=number
+    )
+
+
+def nested(depth: int, branching: int) -> Tuple[str, Any, Any]:
+    """A case of lists nested `depth` deep with `branching` items each"""
+    value, annotation = list(range(branching)), List[int]
+    for _ in range(depth - 1):
+        value, annotation = [value] * branching, List[annotation]
+    return (f"List[...] depth {depth} x {branching}", value, annotation)
+
+
+# about a thousand ints at each depth, so the cost of the depth itself is measured
+CASES += [
+    nested(depth, branching) for depth, branching in ((2, 32), (3, 10), (5, 4), (10, 2))
+]
+
+
+def bench(number: int = 20) -> Dict[str, float]:
+    """Time checking and introspecting each case, and checking it with the reference implementation
+
+    Args:
+        number (int, optional): The number of checks per case. Defaults to 20.
+
+    Returns:
+        Dict[str, float]: The time per check in microseconds by function and case
+    """
+    results = {}
+    print(
+        f"{'Case':<32} | {'reference (us)':<14} | {'_deep_is_of_type (us)':<21} | {'speedup':<8} | {'type_enforced (us)':<18} | {'introspect_type (us)':<20}"
+    )
+    print("-" * 130)
+    for name, value, annotation in CASES:
+
+        @type_enforced()
+        def enforced(a: annotation) -> int:
+            return 1
+
+        reference_time = time_reference(value, annotation, number)
+        check_time = timeit.timeit(
+            lambda: _deep_is_of_type(value, annotation), number=number
+        )
+        enforced_time = timeit.timeit(lambda: enforced(value), number=number)
+        introspect_time = timeit.timeit(lambda: introspect_type(value), number=number)
+        if reference_time is not None:
+            results[f"reference {name}"] = reference_time / number * 1e6
+            reference_column = f"{reference_time / number * 1e6:<14.2f}"
+            speedup_column = f"{reference_time / check_time:<8.1f}"
+        else:
+            reference_column = f"{'unsupported':<14}"
+            speedup_column = f"{'-':<8}"
+        results[f"_deep_is_of_type {name}"] = check_time / number * 1e6
+        results[f"type_enforced {name}"] = enforced_time / number * 1e6
+        results[f"introspect_type {name}"] = introspect_time / number * 1e6
+        print(
+            f"{name:<32} | {reference_column} | {check_time / number * 1e6:<21.2f} | {speedup_column} | {enforced_time / number * 1e6:<18.2f} | {introspect_time / number * 1e6:<20.2f}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    bench()
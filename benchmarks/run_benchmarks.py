@@ -0,0 +1,190 @@
+"""Run every benchmark, save the results as a JSON baseline and compare them with a previous baseline
+
+Every result is a time per operation, so lower is better. A result is a regression when it is slower
+than the baseline by more than the threshold, and the exit status is 1 if there are any, so this can
+gate a change in CI. Baselines are only comparable between runs on the same machine and Python.
+
+Run with `python benchmarks/run_benchmarks.py --save baseline.json`, and later
+`python benchmarks/run_benchmarks.py --compare baseline.json`. `--quick` runs fewer iterations.
+"""
+
+import argparse
+import datetime
+import importlib.metadata
+import json
+import platform
+import sys
+from typing import Any, Dict, List, Tuple
+
+import bench_execution
+import bench_instances
+import bench_logging
+import bench_type_checking
+
+from contemplation import Column, Report
+
+FORMAT_VERSION = 1
+
+
+def run(quick: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Run every benchmark
+
+    Args:
+        quick (bool, optional): Whether to run fewer iterations and smaller cases. Defaults to False.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The value and unit of each result by name, e.g. "execution/count_calls"
+    """
+    suites = [
+        (
+            "execution",
+            "ns",
+            lambda: bench_execution.bench(number=20_000 if quick else 200_000),
+        ),
+        (
+            "logging",
+            "ns",
+            lambda: bench_logging.bench(
+                sizes=(10_000, 100_000) if quick else (10_000, 100_000, 1_000_000)
+            ),
+        ),
+        (
+            "instances",
+            "us",
+            lambda: bench_instances.bench(
+                heap_sizes=(0, 100_000) if quick else (0, 100_000, 1_000_000)
+            ),
+        ),
+        (
+            "type_checking",
+            "us",
+            lambda: bench_type_checking.bench(number=2 if quick else 20),
+        ),
+    ]
+    results = {}
+    for suite, unit, bench in suites:
+        print(f"\n{suite}")
+        for name, value in bench().items():
+            results[f"{suite}/{name}"] = {"value": value, "unit": unit}
+    return results
+
+
+def save(path: str, results: Dict[str, Dict[str, Any]]) -> None:
+    """Save results as a JSON baseline, with the environment they were measured in
+
+    Args:
+        path (str): The path to save to
+        results (Dict[str, Dict[str, Any]]): The results, from `run`
+    """
+    baseline = {
+        "version": FORMAT_VERSION,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "contemplation": importlib.metadata.version("contemplation"),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+
+
+def compare(
+    baseline: Dict[str, Any],
+    results: Dict[str, Dict[str, Any]],
+    threshold: float = 0.25,
+) -> List[Tuple[str, float, float, float]]:
+    """Compare results with a baseline, printing every result found in both
+
+    Args:
+        baseline (Dict[str, Any]): A baseline, as saved by `save`
+        results (Dict[str, Dict[str, Any]]): The results, from `run`
+        threshold (float, optional): The relative slowdown above which a result is a regression. Defaults to 0.25.
+
+    Returns:
+        List[Tuple[str, float, float, float]]: The name, baseline value, current value and relative change of each regression
+    """
+    if baseline.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported baseline version {baseline.get('version')}, expected {FORMAT_VERSION}"
+        )
+    if baseline.get("python") != platform.python_version():
+        print(
+            f"warning: the baseline was measured on Python {baseline.get('python')}, not {platform.python_version()}",
+            file=sys.stderr,
+        )
+
+    rows = []
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["value"]
+        after = result["value"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            regressions.append((name, before, after, change))
+        elif change < -threshold:
+            flag = "improvement"
+        rows.append((name, before, after, result["unit"], change, flag))
+
+    print()
+    Report(
+        (
+            Column("name", "Benchmark"),
+            Column("baseline", "Baseline", ".1f"),
+            Column("current", "Current", ".1f"),
+            Column("unit", "Unit"),
+            Column("change", "Change", "+.1%"),
+            Column("flag", ""),
+        ),
+        rows,
+    ).render()
+
+    missing = sorted(set(baseline["results"]) - set(results))
+    if missing:
+        print(f"\nNot run, but in the baseline: {', '.join(missing)}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--save", metavar="PATH", help="save the results as a JSON baseline"
+    )
+    parser.add_argument(
+        "--compare", metavar="PATH", help="compare the results with a JSON baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="the relative slowdown counted as a regression (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="run fewer iterations and smaller cases"
+    )
+    args = parser.parse_args()
+
+    # read first, so a bad path fails before the benchmarks run
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = run(quick=args.quick)
+    if args.save is not None:
+        save(args.save, results)
+    if baseline is not None:
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
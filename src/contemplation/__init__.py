@@ -3,23 +3,118 @@ from .instance_introspections import (
     how_many_of_type_exist,
     get_name_in_caller_scope,
     get_name_in_all_scope,
+    get_names_in_all_scope,
+    ScopeNameIndex,
+    track_instances,
+    get_instance_registry,
+    InstanceRegistry,
+)
+
+from .heap_introspections import (
+    HeapCensus,
+    take_heap_census,
+    HeapSnapshot,
+    HeapDiff,
+    TypeGrowth,
+    take_heap_snapshot,
+    compare_heap_snapshots,
+    SizeCalculator,
+    deep_sizeof,
+    retained_size,
+    ReferrerChain,
+    find_referrer_chains,
+    print_referrer_chains,
 )
 
 from .execution_introspections import (
     CallCounter,
     ExecutionTimer,
+    GCMonitor,
+    GeneratorStats,
+    SlidingWindowMonitor,
+    SlidingWindowStats,
+    MemoryProfiler,
+    MemoryStats,
+    SamplingProfiler,
     FunctionEvent,
     FunctionLogger,
+    Introspector,
+    Demotion,
+)
+from .execution_snapshots import (
+    ExecutionSnapshot,
+    ExecutionDiff,
+    LatencyChange,
+    take_execution_snapshot,
+    load_execution_snapshot,
+    merge_execution_snapshots,
+    compare_execution_snapshots,
+)
+from .shared_metrics import (
+    SharedMetricsWriter,
+    SharedMetricsAggregator,
+    SharedFunctionMetrics,
+)
+from .exporters import OpenMetricsExporter
+from .reports import Report, Column
+from .concurrency_introspections import (
+    LockMonitor,
+    LockStats,
+    InstrumentedLock,
+    InstrumentedRLock,
 )
-
 
 __all__ = [
     "how_many_of_my_type_exist",
     "how_many_of_type_exist",
     "get_name_in_caller_scope",
     "get_name_in_all_scope",
+    "get_names_in_all_scope",
+    "ScopeNameIndex",
+    "track_instances",
+    "get_instance_registry",
+    "InstanceRegistry",
+    "HeapCensus",
+    "take_heap_census",
+    "HeapSnapshot",
+    "HeapDiff",
+    "TypeGrowth",
+    "take_heap_snapshot",
+    "compare_heap_snapshots",
+    "SizeCalculator",
+    "deep_sizeof",
+    "retained_size",
+    "ReferrerChain",
+    "find_referrer_chains",
+    "print_referrer_chains",
     "CallCounter",
     "ExecutionTimer",
+    "GCMonitor",
+    "GeneratorStats",
+    "SlidingWindowMonitor",
+    "SlidingWindowStats",
+    "MemoryProfiler",
+    "MemoryStats",
+    "SamplingProfiler",
     "FunctionEvent",
     "FunctionLogger",
+    "Introspector",
+    "Demotion",
+    "ExecutionSnapshot",
+    "ExecutionDiff",
+    "LatencyChange",
+    "take_execution_snapshot",
+    "load_execution_snapshot",
+    "merge_execution_snapshots",
+    "compare_execution_snapshots",
+    "SharedMetricsWriter",
+    "SharedMetricsAggregator",
+    "SharedFunctionMetrics",
+    "OpenMetricsExporter",
+    "Report",
+    "Column",
+    "LockMonitor",
+    "LockStats",
+    "InstrumentedLock",
+    "InstrumentedRLock",
 ]
@@ -0,0 +1,339 @@
+"""Run a script or module with introspections applied to it, without changing its code
+
+Functions are instrumented by rewriting the source of the target and of the modules matching the
+include patterns as they are imported, adding an `Introspector` decorator to every function and method
+defined at module or class level. Run `python -m contemplation --help` for the options.
+"""
+
+import argparse
+import ast
+import contextlib
+import fnmatch
+import importlib.abc
+import importlib.machinery
+import inspect
+import os
+import runpy
+import signal
+import socket
+import sys
+import threading
+import types
+from typing import Callable, List, Optional, TextIO
+
+from .execution_introspections import Introspector, SamplingProfiler
+from .execution_snapshots import take_execution_snapshot
+from .heap_introspections import take_heap_census
+
+_DECORATOR_NAME = "__contemplation_instrument__"
+
+
+def _uninstrumented(func: Callable) -> Callable:
+    return func
+
+
+# the decorator added to the rewritten functions, set while a target is running
+_instrument: Callable[[Callable], Callable] = _uninstrumented
+
+
+def _instrument_function(func: Callable) -> Callable:
+    return _instrument(func)
+
+
+def _add_decorators(body: List[ast.stmt]) -> None:
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            # innermost, so the function itself is wrapped rather than a property or classmethod
+            node.decorator_list.append(ast.Name(id=_DECORATOR_NAME, ctx=ast.Load()))
+        elif isinstance(node, ast.ClassDef):
+            _add_decorators(node.body)
+        elif isinstance(node, (ast.If, ast.For, ast.While, ast.With, ast.Try)):
+            _add_decorators(node.body)
+            _add_decorators(getattr(node, "orelse", []))
+            _add_decorators(getattr(node, "finalbody", []))
+            for handler in getattr(node, "handlers", []):
+                _add_decorators(handler.body)
+
+
+def _compile_instrumented(source: bytes, path: str) -> types.CodeType:
+    """Compile a module with the instrumenting decorator added to its module and class level functions"""
+    tree = ast.parse(source, path)
+    _add_decorators(tree.body)
+
+    # the import goes after the docstring and any __future__ imports
+    index = 0
+    if (
+        tree.body
+        and isinstance(tree.body[0], ast.Expr)
+        and isinstance(tree.body[0].value, ast.Constant)
+        and isinstance(tree.body[0].value.value, str)
+    ):
+        index = 1
+    while (
+        index < len(tree.body)
+        and isinstance(tree.body[index], ast.ImportFrom)
+        and tree.body[index].module == "__future__"
+    ):
+        index += 1
+    tree.body.insert(
+        index,
+        ast.ImportFrom(
+            module=__name__,
+            names=[ast.alias(name="_instrument_function", asname=_DECORATOR_NAME)],
+            level=0,
+        ),
+    )
+    ast.fix_missing_locations(tree)
+    return compile(tree, path, "exec", dont_inherit=True)
+
+
+class _InstrumentingLoader(importlib.machinery.SourceFileLoader):
+    def get_code(self, fullname: str) -> types.CodeType:
+        # always compiled from source, the cached bytecode is not instrumented
+        path = self.get_filename(fullname)
+        return _compile_instrumented(self.get_data(path), path)
+
+
+class _InstrumentingFinder(importlib.abc.MetaPathFinder):
+    """Finds modules matching the include patterns with the other finders and gives them an instrumenting loader"""
+
+    def __init__(self, include: List[str]):
+        self.include = include
+
+    def find_spec(self, fullname, path, target=None):
+        if not any(fnmatch.fnmatchcase(fullname, pattern) for pattern in self.include):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if type(spec.loader) is importlib.machinery.SourceFileLoader:
+            spec.loader = _InstrumentingLoader(spec.loader.name, spec.loader.path)
+        return spec
+
+
+class _Session:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.introspector = Introspector(
+            count_calls=not args.no_count,
+            time_execution=not args.no_time,
+            adaptive=args.adaptive,
+        )
+        self.sampling_profiler = (
+            SamplingProfiler(args.sample_interval) if args.sample else None
+        )
+        self._write_lock = threading.Lock()
+
+    def instrument(self, func: Callable) -> Callable:
+        name = f"{func.__module__}.{func.__qualname__}"
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in self.args.exclude):
+            return func
+        if inspect.isasyncgenfunction(func):
+            # not supported by Introspector
+            return func
+        return self.introspector.introspect(func, name)
+
+    def print_report(self, file: TextIO) -> None:
+        with contextlib.redirect_stdout(file):
+            print("Functions")
+            self.introspector.pretty_print_stats(
+                sort_by=self.args.sort, top=self.args.top
+            )
+            if self.sampling_profiler is not None:
+                print(f"\nSamples ({self.sampling_profiler.samples})")
+                self.sampling_profiler.pretty_print_samples(self.args.top)
+            if self.args.heap:
+                census = take_heap_census(include_sizes=True)
+                print(f"\nHeap ({census.total_objects} objects)")
+                census.pretty_print(self.args.top)
+
+    def write_in_background(self, signum, frame) -> None:
+        """Signal handler writing the report from another thread, as the main thread may be writing to the same file"""
+        threading.Thread(target=self.write, daemon=True).start()
+
+    def write(self) -> None:
+        """Write the report, and the snapshot if requested"""
+        with self._write_lock:
+            self._write()
+
+    def _write(self) -> None:
+        if self.args.output is None:
+            self.print_report(sys.stderr)
+        else:
+            with open(self.args.output, "w") as f:
+                self.print_report(f)
+        if self.args.snapshot is not None:
+            take_execution_snapshot(
+                self.introspector.call_counter,
+                self.introspector.execution_timer,
+                metadata={
+                    "argv": sys.argv,
+                    "pid": os.getpid(),
+                    "host": socket.gethostname(),
+                },
+            ).save(self.args.snapshot)
+
+
+def _run_script(path: str) -> None:
+    with open(path, "rb") as f:
+        code = _compile_instrumented(f.read(), path)
+    main_module = types.ModuleType("__main__")
+    main_module.__file__ = path
+    main_module.__builtins__ = __builtins__
+    sys.modules["__main__"] = main_module
+    exec(code, main_module.__dict__)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the parser of the command line options
+
+    Returns:
+        argparse.ArgumentParser: The parser
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m contemplation",
+        description="Run a Python script or module with introspections applied, without changing its code.",
+    )
+    parser.add_argument(
+        "-m",
+        dest="module",
+        help="run a library module as a script, like python -m",
+    )
+    parser.add_argument(
+        "-i",
+        "--include",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="instrument the functions of modules whose name matches this glob pattern, e.g. 'myapp.*', can be repeated. The script or module being run is always instrumented",
+    )
+    parser.add_argument(
+        "-x",
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="do not instrument functions whose qualified name, e.g. 'myapp.db.Connection.execute', matches this glob pattern, can be repeated",
+    )
+    parser.add_argument("--no-count", action="store_true", help="do not count calls")
+    parser.add_argument("--no-time", action="store_true", help="do not time calls")
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="limit the overhead on very fast functions, see Introspector",
+    )
+    parser.add_argument(
+        "--sample",
+        action="store_true",
+        help="also profile every function by sampling the stacks of all threads",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.005,
+        metavar="SECONDS",
+        help="the time between samples (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--heap", action="store_true", help="take a census of the heap for the report"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        metavar="N",
+        help="the number of functions, sampled functions and heap types to report (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--sort",
+        default="total_time",
+        choices=("count", "total_time", "average_time"),
+        help="the column the functions are sorted by, largest first (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="PATH",
+        help="write the report to this file instead of stderr",
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="also save an execution snapshot to this path, see take_execution_snapshot",
+    )
+    parser.add_argument(
+        "--signal",
+        default="SIGUSR1" if hasattr(signal, "SIGUSR1") else "none",
+        metavar="NAME",
+        help="write the report and snapshot when the process receives this signal as well as at exit, or 'none' (default: %(default)s)",
+    )
+    parser.add_argument("target", nargs="?", help="the script to run")
+    parser.add_argument(
+        "args", nargs=argparse.REMAINDER, help="arguments passed to the script"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a script or module with introspections applied, and write a report when it exits
+
+    Args:
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to None for `sys.argv[1:]`.
+
+    Returns:
+        int: The exit status
+
+    Examples:
+        $ python -m contemplation --include 'myapp.*' --sample -o report.txt myapp/job.py --input data.csv
+        $ python -m contemplation --snapshot run.json.gz -m myapp.job
+    """
+    global _instrument
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.module is None and args.target is None:
+        parser.error("a script or -m module to run is required")
+
+    session = _Session(args)
+    include = list(args.include)
+    if args.module is not None:
+        target_argv = [args.module] + ([args.target] if args.target else []) + args.args
+        include += [args.module, f"{args.module}.__main__"]
+        path_entry = os.getcwd()
+    else:
+        target_argv = [args.target] + args.args
+        path_entry = os.path.dirname(os.path.abspath(args.target))
+
+    finder = _InstrumentingFinder(include)
+    saved_argv, saved_path, saved_main = sys.argv, sys.path[:], sys.modules["__main__"]
+    sys.argv = target_argv
+    sys.path.insert(0, path_entry)
+    sys.meta_path.insert(0, finder)
+    _instrument = session.instrument
+    if args.signal.lower() != "none":
+        report_signal = getattr(signal, args.signal.upper())
+        previous_handler = signal.signal(report_signal, session.write_in_background)
+    if session.sampling_profiler is not None:
+        session.sampling_profiler.start()
+
+    try:
+        if args.module is not None:
+            runpy.run_module(args.module, run_name="__main__", alter_sys=True)
+        else:
+            _run_script(args.target)
+    finally:
+        if session.sampling_profiler is not None:
+            session.sampling_profiler.stop()
+        sys.meta_path.remove(finder)
+        session.write()
+        _instrument = _uninstrumented
+        if args.signal.lower() != "none":
+            signal.signal(report_signal, previous_handler)
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        sys.modules["__main__"] = saved_main
+    return 0
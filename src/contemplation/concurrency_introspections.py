@@ -0,0 +1,353 @@
+import os
+import sys
+import threading
+import time
+import types
+from typing import Any, Dict, List, Optional, TextIO
+
+from .reports import Column, Report
+
+
+class LockStats:
+    """Aggregated wait and hold times of the locks created at a single site
+
+    Locks are used from many threads, so the counters are updated under a lock of their own.
+    """
+
+    def __init__(self, site: str):
+        self.site = site
+        self._lock = threading.Lock()
+        self.acquisitions = 0
+        self.contentions = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.total_hold_time = 0.0
+        self.max_hold_time = 0.0
+
+    def record_acquire(self, wait_time: Optional[float]) -> None:
+        with self._lock:
+            self.acquisitions += 1
+            if wait_time is not None:
+                self.contentions += 1
+                self.total_wait_time += wait_time
+                if wait_time > self.max_wait_time:
+                    self.max_wait_time = wait_time
+
+    def record_release(self, hold_time: float) -> None:
+        with self._lock:
+            self.total_hold_time += hold_time
+            if hold_time > self.max_hold_time:
+                self.max_hold_time = hold_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "site": self.site,
+                "acquisitions": self.acquisitions,
+                "contentions": self.contentions,
+                "total_wait_time": self.total_wait_time,
+                "max_wait_time": self.max_wait_time,
+                "total_hold_time": self.total_hold_time,
+                "max_hold_time": self.max_hold_time,
+            }
+
+    def __repr__(self) -> str:
+        return f"LockStats(site={self.site}, acquisitions={self.acquisitions}, contentions={self.contentions}, total_wait_time={self.total_wait_time}, total_hold_time={self.total_hold_time})"
+
+
+class InstrumentedLock:
+    """A `threading.Lock` that records how long threads wait to acquire it and how long it is held
+
+    An uncontended acquire costs one extra non-blocking acquire attempt, the clock is only read
+    to time the wait when the lock is already held by another thread.
+
+    Args:
+        stats (LockStats): The statistics to record into
+        lock (Optional[Any], optional): The lock to wrap. Defaults to None for a new `threading.Lock`.
+    """
+
+    def __init__(self, stats: LockStats, lock: Optional[Any] = None):
+        self._lock = lock if lock is not None else threading.Lock()
+        self._stats = stats
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            wait_time = None
+        elif not blocking:
+            return False
+        else:
+            start_time = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            wait_time = time.perf_counter() - start_time
+        self._acquired_at = time.perf_counter()
+        self._stats.record_acquire(wait_time)
+        return True
+
+    def release(self) -> None:
+        hold_time = time.perf_counter() - self._acquired_at
+        # released first, so releasing an unlocked lock raises without recording anything
+        self._lock.release()
+        self._stats.record_release(hold_time)
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    # used by threading.Condition, checked on the raw lock so it is not recorded as an acquisition
+    def _is_owned(self) -> bool:
+        if self._lock.acquire(False):
+            self._lock.release()
+            return False
+        return True
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def __repr__(self) -> str:
+        return f"<InstrumentedLock site={self._stats.site} locked={self.locked()}>"
+
+
+class InstrumentedRLock(InstrumentedLock):
+    """A `threading.RLock` that records how long threads wait to acquire it and how long it is held
+
+    The hold time is measured from the outermost acquire to the matching release.
+
+    Args:
+        stats (LockStats): The statistics to record into
+    """
+
+    def __init__(self, stats: LockStats):
+        super().__init__(stats, threading.RLock())
+        self._depth = 0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            wait_time = None
+        elif not blocking:
+            return False
+        else:
+            start_time = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            wait_time = time.perf_counter() - start_time
+        self._depth += 1
+        if self._depth == 1:
+            self._acquired_at = time.perf_counter()
+            self._stats.record_acquire(wait_time)
+        return True
+
+    def release(self) -> None:
+        # the depth belongs to the owning thread, so check ownership before touching it
+        if not self._lock._is_owned():
+            raise RuntimeError("cannot release un-acquired lock")
+        if self._depth == 1:
+            self._stats.record_release(time.perf_counter() - self._acquired_at)
+        self._depth -= 1
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._depth > 0
+
+    # used by threading.Condition to fully release and reacquire the lock around wait()
+    def _is_owned(self) -> bool:
+        return self._lock._is_owned()
+
+    def _release_save(self) -> Any:
+        self._stats.record_release(time.perf_counter() - self._acquired_at)
+        depth = self._depth
+        self._depth = 0
+        return (self._lock._release_save(), depth)
+
+    def _acquire_restore(self, state: Any) -> None:
+        lock_state, depth = state
+        if self._lock.acquire(False):
+            wait_time = None
+            # the lock is held once per level of depth, and acquiring an owned RLock never blocks
+            for _ in range(depth - 1):
+                self._lock.acquire()
+        else:
+            start_time = time.perf_counter()
+            self._lock._acquire_restore(lock_state)
+            wait_time = time.perf_counter() - start_time
+        self._acquired_at = time.perf_counter()
+        self._stats.record_acquire(wait_time)
+        self._depth = depth
+
+    def __repr__(self) -> str:
+        return f"<InstrumentedRLock site={self._stats.site} depth={self._depth}>"
+
+
+class LockMonitor:
+    """Creates instrumented locks and records their contention, grouped by the site that created each lock
+
+    Examples:
+        >>> lock_monitor = LockMonitor()
+        >>> lock = lock_monitor.lock()
+        >>> with lock:
+        ...     pass
+        >>> lock_monitor.pretty_print_locks()
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, LockStats] = {}
+        self._patched: List[tuple] = []
+
+    def _get_stats(self, site: Optional[str], depth: int) -> LockStats:
+        if site is None:
+            frame = sys._getframe(depth + 1)
+            site = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} ({frame.f_code.co_name})"
+            del frame
+        stats = self.stats.get(site)
+        if stats is None:
+            # locks can be created at the same site by several threads at once
+            stats = self.stats.setdefault(site, LockStats(site))
+        return stats
+
+    def lock(self, site: Optional[str] = None) -> InstrumentedLock:
+        """Create an instrumented `threading.Lock`
+
+        Args:
+            site (Optional[str], optional): The name to report the lock under. Defaults to None for the file, line and function that created the lock.
+
+        Returns:
+            InstrumentedLock: The lock
+        """
+        return InstrumentedLock(self._get_stats(site, 1))
+
+    def rlock(self, site: Optional[str] = None) -> InstrumentedRLock:
+        """Create an instrumented `threading.RLock`
+
+        Args:
+            site (Optional[str], optional): The name to report the lock under. Defaults to None for the file, line and function that created the lock.
+
+        Returns:
+            InstrumentedRLock: The lock
+        """
+        return InstrumentedRLock(self._get_stats(site, 1))
+
+    def condition(
+        self, lock: Optional[Any] = None, site: Optional[str] = None
+    ) -> threading.Condition:
+        """Create a `threading.Condition` whose underlying lock is instrumented
+
+        Args:
+            lock (Optional[Any], optional): The lock for the condition. Defaults to None for a new instrumented RLock.
+            site (Optional[str], optional): The name to report the lock under. Defaults to None for the file, line and function that created the condition.
+
+        Returns:
+            threading.Condition: The condition
+        """
+        if lock is None:
+            lock = InstrumentedRLock(self._get_stats(site, 1))
+        return threading.Condition(lock)
+
+    def patch(self, *modules: types.ModuleType) -> "LockMonitor":
+        """Make existing modules create instrumented locks
+
+        `Lock`, `RLock` and `Condition` imported directly into a module are patched, as are uses of them
+        through the module's `threading` global. Only locks created after patching are instrumented.
+        Can be used as a context manager to undo the patch on exit.
+
+        Args:
+            *modules (types.ModuleType): The modules to patch
+
+        Returns:
+            LockMonitor: This monitor
+        """
+        factories = {
+            "Lock": lambda: InstrumentedLock(self._get_stats(None, 1)),
+            "RLock": lambda: InstrumentedRLock(self._get_stats(None, 1)),
+            "Condition": lambda lock=None: threading.Condition(
+                lock
+                if lock is not None
+                else InstrumentedRLock(self._get_stats(None, 1))
+            ),
+        }
+
+        for module in modules:
+            for name, factory in factories.items():
+                if getattr(module, name, None) is getattr(threading, name):
+                    self._patched.append((module, name, getattr(module, name)))
+                    setattr(module, name, factory)
+
+            if getattr(module, "threading", None) is threading:
+                proxy = types.ModuleType("threading")
+                proxy.__dict__.update(threading.__dict__)
+                proxy.__dict__.update(factories)
+                self._patched.append((module, "threading", threading))
+                module.threading = proxy
+        return self
+
+    def unpatch(self) -> None:
+        """Undo all patches made by this monitor"""
+        for module, name, original in reversed(self._patched):
+            setattr(module, name, original)
+        self._patched = []
+
+    def __enter__(self) -> "LockMonitor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.unpatch()
+
+    def get_lock_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the statistics of the locks created at each site
+
+        Returns:
+            Dict[str, Dict[str, Any]]: A dictionary of creation sites to their acquisitions, contentions, wait times and hold times
+        """
+        return {site: stats.to_dict() for site, stats in self.stats.items()}
+
+    def get_report(self) -> Report:
+        """Get a report of the contention of the locks created at each site, with the columns site,
+        acquisitions, contentions, total_wait_time, max_wait_time and total_hold_time
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (
+                Column("site", "Lock Site"),
+                Column("acquisitions", "Acquisitions"),
+                Column("contentions", "Contentions"),
+                Column("total_wait_time", "Total Wait (s)", ".6f"),
+                Column("max_wait_time", "Max Wait (s)", ".6f"),
+                Column("total_hold_time", "Total Hold (s)", ".6f"),
+            ),
+            [
+                (
+                    s.site,
+                    s.acquisitions,
+                    s.contentions,
+                    s.total_wait_time,
+                    s.max_wait_time,
+                    s.total_hold_time,
+                )
+                for s in list(self.stats.values())
+            ],
+        )
+
+    def pretty_print_locks(
+        self,
+        sort_by: Optional[str] = "total_wait_time",
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the contention of the locks created at each site in a nice table, most waited on first
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to "total_wait_time", None for the order the locks were created in.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print locks whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
+        )
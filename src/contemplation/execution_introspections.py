@@ -1,14 +1,36 @@
 from collections import defaultdict
+import bisect
+import gc
+import heapq
+import sys
+import threading
 import time
 import inspect
 import json
+import math
+import os
+import tracemalloc
 from functools import wraps
-from typing import Dict, List, Callable, Union, Optional, Any
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from .reports import Column, Report
 
 
 class CallCounter:
     def __init__(self):
         self.counts: Dict[str, int] = defaultdict(int)
+        self.resets = 0
 
     def count_calls(self, func: Callable) -> Callable:
         """Count the number of times a function has been called
@@ -61,27 +83,673 @@ class CallCounter:
             name = func.__name__
         return self.counts[name]
 
-    def pretty_print_counts(self) -> None:
-        """Print the counts of all functions that have been counted"""
-        name_width = max(len(name) for name in self.counts.keys())
-        count_width = max(len(str(count)) for count in self.counts.values())
-        name_width = max(name_width, len("Function"))
-        count_width = max(count_width, len("Count"))
+    def reset(self) -> None:
+        """Reset the counts of all functions to zero"""
+        self.counts.clear()
+        self.resets += 1
+
+    def snapshot_and_reset(self) -> Dict[str, int]:
+        """Get the counts of all functions and then reset them, for reporting the calls made in each interval
+
+        Returns:
+            Dict[str, int]: A dictionary of function names to their counts since the last reset
+        """
+        counts = self.get_counts()
+        self.reset()
+        return counts
+
+    def get_report(self) -> Report:
+        """Get a report of the counts of all functions, with the columns name and count
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (Column("name", "Function"), Column("count", "Count")),
+            list(self.counts.items()),
+        )
+
+    def pretty_print_counts(
+        self,
+        sort_by: Optional[str] = None,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the counts of all functions that have been counted
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the order the functions were first called in.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
+        )
+
+
+DEFAULT_PAUSE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+class GCMonitor:
+    """Records garbage collection pauses using `gc.callbacks`
+
+    Pause durations are kept in a histogram with fixed buckets, so memory use does not grow with the
+    number of collections. Pass a monitor to `ExecutionTimer` to attribute pauses to the functions
+    that were running when they happened.
+
+    Args:
+        buckets (Sequence[float], optional): Upper bounds in seconds of the pause histogram buckets, a final unbounded bucket is always added. Defaults to DEFAULT_PAUSE_BUCKETS.
+
+    Examples:
+        >>> gc_monitor = GCMonitor()
+        >>> with gc_monitor:
+        ...     gc.collect()
+        >>> gc_monitor.get_stats()[2]["collections"]
+        1
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_PAUSE_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        n_generations = len(gc.get_count())
+        self.collections = [0] * n_generations
+        self.pause_times = [0.0] * n_generations
+        self.max_pause_times = [0.0] * n_generations
+        self.collected = [0] * n_generations
+        self.uncollectable = [0] * n_generations
+        self.pause_histogram = [0] * len(self.buckets)
+        self.total_pause_time = 0.0
+        self._start_time: Optional[float] = None
+
+    def _callback(self, phase: str, info: Dict[str, int]) -> None:
+        if phase == "start":
+            self._start_time = time.perf_counter()
+            return
+        if self._start_time is None:
+            return
+        pause = time.perf_counter() - self._start_time
+        self._start_time = None
+
+        generation = info["generation"]
+        self.collections[generation] += 1
+        self.pause_times[generation] += pause
+        if pause > self.max_pause_times[generation]:
+            self.max_pause_times[generation] = pause
+        self.collected[generation] += info["collected"]
+        self.uncollectable[generation] += info["uncollectable"]
+        self.pause_histogram[bisect.bisect_left(self.buckets, pause)] += 1
+        self.total_pause_time += pause
+
+    def start(self) -> None:
+        """Start recording garbage collection pauses"""
+        if self._callback not in gc.callbacks:
+            gc.callbacks.append(self._callback)
+
+    def stop(self) -> None:
+        """Stop recording garbage collection pauses"""
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+        self._start_time = None
+
+    def __enter__(self) -> "GCMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def get_stats(self) -> Dict[int, Dict[str, float]]:
+        """Get the collection statistics of each generation
+
+        Returns:
+            Dict[int, Dict[str, float]]: A dictionary of generations to their number of collections, total and maximum pause times, and objects collected
+        """
+        return {
+            generation: {
+                "collections": self.collections[generation],
+                "total_pause_time": self.pause_times[generation],
+                "max_pause_time": self.max_pause_times[generation],
+                "collected": self.collected[generation],
+                "uncollectable": self.uncollectable[generation],
+            }
+            for generation in range(len(self.collections))
+        }
+
+    def get_pause_histogram(self) -> Dict[float, int]:
+        """Get the number of pauses in each histogram bucket
+
+        Returns:
+            Dict[float, int]: A dictionary of bucket upper bounds in seconds to the number of pauses in that bucket
+        """
+        return dict(zip(self.buckets, self.pause_histogram))
+
+    def get_report(self) -> Report:
+        """Get a report of the collection statistics of each generation, with the columns generation,
+        collections, total_pause_time, max_pause_time and collected
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (
+                Column("generation", "Generation"),
+                Column("collections", "Collections"),
+                Column("total_pause_time", "Total Pause (s)", ".6f"),
+                Column("max_pause_time", "Max Pause (s)", ".6f"),
+                Column("collected", "Collected"),
+            ),
+            [
+                (
+                    generation,
+                    stats["collections"],
+                    stats["total_pause_time"],
+                    stats["max_pause_time"],
+                    stats["collected"],
+                )
+                for generation, stats in self.get_stats().items()
+            ],
+        )
+
+    def pretty_print_stats(
+        self,
+        sort_by: Optional[str] = None,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the collection statistics of each generation in a nice table
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the order of the generations.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print generations whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
+        )
+
+
+# upper bounds from 100ns to 100s, 5 per decade, so percentiles are within about 25% before interpolation
+DEFAULT_LATENCY_BUCKETS = tuple(10 ** (exponent / 5) for exponent in range(-35, 11))
+DEFAULT_WINDOW_INTERVALS = (10.0, 60.0, 300.0)
+
+
+def _format_interval(seconds: float) -> str:
+    if seconds >= 60 and seconds % 60 == 0:
+        return f"{seconds / 60:g}m"
+    return f"{seconds:g}s"
+
+
+class SlidingWindowStats:
+    """Calls and latencies of a single function over a sliding window, kept in a ring buffer of time buckets
+
+    Each bucket holds the number of calls, total and maximum time, and a latency histogram of the calls
+    made during one `resolution` of time. Recording a call is O(1) and memory does not grow with the
+    number of calls, buckets older than the window are cleared as the window slides over them.
+
+    Args:
+        name (str): The name of the function
+        window (float, optional): The length in seconds of the longest interval that can be queried. Defaults to 300.0.
+        resolution (float, optional): The length in seconds of each bucket. Defaults to 1.0.
+        buckets (Sequence[float], optional): Upper bounds in seconds of the latency histogram buckets, a final unbounded bucket is always added. Defaults to DEFAULT_LATENCY_BUCKETS.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: float = 300.0,
+        resolution: float = 1.0,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        if resolution <= 0 or window < resolution:
+            raise ValueError(
+                f"window must be at least resolution and resolution must be positive, not {window} and {resolution}"
+            )
+        self.name = name
+        self.window = window
+        self.resolution = resolution
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.size = math.ceil(window / resolution)
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear every bucket and restart the window from now"""
+        self._calls = [0] * self.size
+        self._total_times = [0.0] * self.size
+        self._max_times = [0.0] * self.size
+        # histograms are only allocated for buckets that record a time
+        self._histograms: List[Optional[List[int]]] = [None] * self.size
+        self.start_time = time.perf_counter()
+        self._slot = int(self.start_time / self.resolution)
+
+    def _advance(self, slot: int) -> None:
+        for offset in range(1, min(slot - self._slot, self.size) + 1):
+            i = (self._slot + offset) % self.size
+            self._calls[i] = 0
+            self._total_times[i] = 0.0
+            self._max_times[i] = 0.0
+            self._histograms[i] = None
+        self._slot = slot
+
+    def record(
+        self,
+        elapsed_time: Optional[float] = None,
+        now: Optional[float] = None,
+        calls: int = 1,
+    ) -> None:
+        """Record calls of the function
+
+        Args:
+            elapsed_time (Optional[float], optional): The time the call took. Defaults to None to only count the call.
+            now (Optional[float], optional): The `time.perf_counter` time the call ended. Defaults to None to read the clock.
+            calls (int, optional): The number of calls the time represents, for sampled calls. Defaults to 1.
+        """
+        if now is None:
+            now = time.perf_counter()
+        slot = int(now / self.resolution)
+        if slot > self._slot:
+            self._advance(slot)
+        elif slot <= self._slot - self.size:
+            return
+
+        i = slot % self.size
+        self._calls[i] += calls
+        if elapsed_time is None:
+            return
+        self._total_times[i] += elapsed_time
+        if elapsed_time > self._max_times[i]:
+            self._max_times[i] = elapsed_time
+        histogram = self._histograms[i]
+        if histogram is None:
+            histogram = self._histograms[i] = [0] * len(self.buckets)
+        histogram[bisect.bisect_left(self.buckets, elapsed_time)] += 1
+
+    def _percentile(
+        self, histogram: List[int], timed_calls: int, max_time: float, q: float
+    ) -> float:
+        if not timed_calls:
+            return 0.0
+        rank = q * timed_calls
+        cumulative = 0
+        for i, n in enumerate(histogram):
+            if n and cumulative + n >= rank:
+                upper = self.buckets[i]
+                if upper == float("inf"):
+                    return max_time
+                lower = self.buckets[i - 1] if i else 0.0
+                return min(lower + (upper - lower) * (rank - cumulative) / n, max_time)
+            cumulative += n
+        return max_time
+
+    def get_stats(
+        self, seconds: Optional[float] = None, now: Optional[float] = None
+    ) -> Dict[str, float]:
+        """Get the calls and latencies over the most recent interval
+
+        Args:
+            seconds (Optional[float], optional): The length of the interval, at most the window. Defaults to None for the whole window.
+            now (Optional[float], optional): The `time.perf_counter` time the interval ends. Defaults to None to read the clock.
+
+        Raises:
+            ValueError: If the interval is longer than the window
+
+        Returns:
+            Dict[str, float]: The number of calls, calls per second, and average, median, 99th percentile and maximum time of the timed calls
+        """
+        if seconds is None:
+            seconds = self.window
+        if seconds > self.window:
+            raise ValueError(
+                f"Interval of {seconds}s is longer than the window of {self.window}s"
+            )
+        if now is None:
+            now = time.perf_counter()
+        slot = int(now / self.resolution)
+        if slot > self._slot:
+            self._advance(slot)
+
+        n_slots = min(math.ceil(seconds / self.resolution), self.size)
+        calls = 0
+        total_time = 0.0
+        max_time = 0.0
+        histogram = [0] * len(self.buckets)
+        for offset in range(n_slots):
+            i = (self._slot - offset) % self.size
+            calls += self._calls[i]
+            total_time += self._total_times[i]
+            if self._max_times[i] > max_time:
+                max_time = self._max_times[i]
+            if self._histograms[i] is not None:
+                for j, n in enumerate(self._histograms[i]):
+                    histogram[j] += n
+
+        # the newest bucket is only partly over, and the window may not have been running for the whole interval
+        elapsed = (n_slots - 1) * self.resolution + now - self._slot * self.resolution
+        elapsed = max(min(elapsed, now - self.start_time), 1e-9)
+        timed_calls = sum(histogram)
+        return {
+            "calls": calls,
+            "rate": calls / elapsed,
+            "average_time": total_time / timed_calls if timed_calls else 0.0,
+            "p50": self._percentile(histogram, timed_calls, max_time, 0.5),
+            "p99": self._percentile(histogram, timed_calls, max_time, 0.99),
+            "max_time": max_time,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, **self.get_stats()}
+
+    def __repr__(self) -> str:
+        stats = self.get_stats()
+        return f"SlidingWindowStats(name={self.name}, window={self.window}, calls={stats['calls']}, rate={stats['rate']}, p99={stats['p99']})"
+
+
+class SlidingWindowMonitor:
+    """Keeps call rates and latencies of functions over sliding windows, such as the last 10 seconds, minute and 5 minutes
+
+    Pass a monitor to `ExecutionTimer` or `Introspector` to record every timed call into it. Unlike their
+    totals since the start of the process, the windows show current throughput and recent latency
+    regressions. Use `snapshot_and_reset` to report on fixed intervals instead.
+
+    Args:
+        intervals (Sequence[float], optional): The intervals in seconds reported by `get_stats` and `pretty_print_windows`. Defaults to DEFAULT_WINDOW_INTERVALS.
+        resolution (float, optional): The length in seconds of each bucket of the ring buffer. Defaults to 1.0.
+        buckets (Sequence[float], optional): Upper bounds in seconds of the latency histogram buckets. Defaults to DEFAULT_LATENCY_BUCKETS.
+
+    Examples:
+        >>> sliding_window = SlidingWindowMonitor()
+        >>> execution_timer = ExecutionTimer(sliding_window=sliding_window)
+        >>> @execution_timer.time_execution
+        ... def my_func(a: int, b: int):
+        ...     return a + b
+        >>> for i in range(100):
+        ...     my_func(i, i + 1)
+        >>> sliding_window.get_window_stats(my_func, 10)["calls"]
+        100
+        >>> sliding_window.pretty_print_windows()
+    """
 
-        print(f"{'Function':<{name_width}} | {'Count':<{count_width}}")
-        print("-" * (name_width + count_width + 3))
-        for name, count in self.counts.items():
-            print(f"{name:<{name_width}} | {count:<{count_width}}")
+    def __init__(
+        self,
+        intervals: Sequence[float] = DEFAULT_WINDOW_INTERVALS,
+        resolution: float = 1.0,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        self.intervals = tuple(sorted(intervals))
+        self.window = self.intervals[-1]
+        self.resolution = resolution
+        self.buckets = tuple(buckets)
+        self.stats: Dict[str, SlidingWindowStats] = {}
+
+    def record(
+        self,
+        name: str,
+        elapsed_time: Optional[float] = None,
+        now: Optional[float] = None,
+        calls: int = 1,
+    ) -> None:
+        """Record calls of a function
+
+        Args:
+            name (str): The name of the function
+            elapsed_time (Optional[float], optional): The time the call took. Defaults to None to only count the call.
+            now (Optional[float], optional): The `time.perf_counter` time the call ended. Defaults to None to read the clock.
+            calls (int, optional): The number of calls the time represents, for sampled calls. Defaults to 1.
+        """
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = SlidingWindowStats(
+                name, self.window, self.resolution, self.buckets
+            )
+        stats.record(elapsed_time, now, calls)
+
+    def get_window_stats(
+        self, func: Union[Callable, str], seconds: Optional[float] = None
+    ) -> Dict[str, float]:
+        """Get the calls and latencies of a specific function over the most recent interval
+
+        Args:
+            func (Union[Callable, str]): The function to get the statistics for, as an instance of the function or the name of the function
+            seconds (Optional[float], optional): The length of the interval, at most the longest interval. Defaults to None for the longest interval.
+
+        Raises:
+            KeyError: If no calls of the function have been recorded
+
+        Returns:
+            Dict[str, float]: The number of calls, calls per second, and average, median, 99th percentile and maximum time
+        """
+        if isinstance(func, str):
+            name = func
+        else:
+            name = func.__name__
+        return self.stats[name].get_stats(seconds)
+
+    def get_stats(self) -> Dict[str, Dict[float, Dict[str, float]]]:
+        """Get the calls and latencies of every function over each interval
+
+        Returns:
+            Dict[str, Dict[float, Dict[str, float]]]: A dictionary of function names to a dictionary of intervals to their statistics
+        """
+        now = time.perf_counter()
+        return {
+            name: {seconds: stats.get_stats(seconds, now) for seconds in self.intervals}
+            for name, stats in self.stats.items()
+        }
+
+    def reset(self) -> None:
+        """Forget every recorded call"""
+        self.stats.clear()
+
+    def snapshot_and_reset(self) -> Dict[str, Dict[float, Dict[str, float]]]:
+        """Get the statistics of every function over each interval and then forget every recorded call
+
+        Returns:
+            Dict[str, Dict[float, Dict[str, float]]]: The statistics, as returned by `get_stats`
+        """
+        snapshot = self.get_stats()
+        self.reset()
+        return snapshot
+
+    def get_report(self) -> Report:
+        """Get a report of the call rate and 99th percentile time of every function over each interval, with
+        the columns name, and rate and p99 suffixed by each interval, e.g. rate_10s and p99_1m
+
+        Returns:
+            Report: The report
+        """
+        columns = [Column("name", "Function")]
+        for seconds in self.intervals:
+            label = _format_interval(seconds)
+            columns += [
+                Column(f"rate_{label}", f"Calls/s ({label})", ".2f"),
+                Column(f"p99_{label}", f"p99 (s) ({label})", ".6f"),
+            ]
+        return Report(
+            columns,
+            [
+                (name,)
+                + tuple(
+                    value
+                    for seconds in self.intervals
+                    for value in (intervals[seconds]["rate"], intervals[seconds]["p99"])
+                )
+                for name, intervals in self.get_stats().items()
+            ],
+        )
+
+    def pretty_print_windows(
+        self,
+        sort_by: Optional[str] = None,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the call rate and 99th percentile time of every function over each interval in a nice table
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the order the functions were first recorded in.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
+        )
+
+
+class GeneratorStats:
+    """Aggregated timing of the items produced by the generators of a single generator function
+
+    Only time spent inside the generator is counted, time the consumer spends between items is not.
+    A run is one generator, recorded when it is exhausted, closed, or garbage collected.
+
+    Args:
+        name (str): The name of the generator function
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.reset()
+
+    def reset(self) -> None:
+        self.runs = 0
+        self.items = 0
+        self.total_time = 0.0
+        self.total_first_item_time = 0.0
+        self.max_first_item_time = 0.0
+        self.total_item_time = 0.0
+        self.min_item_time = float("inf")
+        self.max_item_time = 0.0
+
+    def record_item(self, item_time: float) -> None:
+        self.items += 1
+        self.total_item_time += item_time
+        if item_time < self.min_item_time:
+            self.min_item_time = item_time
+        if item_time > self.max_item_time:
+            self.max_item_time = item_time
+
+    def record_run(self, total_time: float, first_item_time: Optional[float]) -> None:
+        self.runs += 1
+        self.total_time += total_time
+        if first_item_time is not None:
+            self.total_first_item_time += first_item_time
+            if first_item_time > self.max_first_item_time:
+                self.max_first_item_time = first_item_time
+
+    @property
+    def average_item_time(self) -> float:
+        """The average time taken to produce each item"""
+        return self.total_item_time / self.items if self.items else 0.0
+
+    @property
+    def average_first_item_time(self) -> float:
+        """The average time taken to produce the first item of each run"""
+        return self.total_first_item_time / self.runs if self.runs else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "runs": self.runs,
+            "items": self.items,
+            "total_time": self.total_time,
+            "average_first_item_time": self.average_first_item_time,
+            "max_first_item_time": self.max_first_item_time,
+            "average_item_time": self.average_item_time,
+            "min_item_time": self.min_item_time if self.items else 0.0,
+            "max_item_time": self.max_item_time,
+        }
+
+    def __repr__(self) -> str:
+        return f"GeneratorStats(name={self.name}, runs={self.runs}, items={self.items}, total_time={self.total_time}, average_item_time={self.average_item_time})"
+
+
+def _timed_generator(
+    generator: Generator,
+    stats: Optional[GeneratorStats],
+    on_finish: Callable[[float, float, Any], None],
+) -> Generator:
+    """Drive a generator, timing each step it takes and excluding the time its consumer takes
+
+    Args:
+        generator (Generator): The generator to drive
+        stats (Optional[GeneratorStats]): Statistics to record each item and the finished run into
+        on_finish (Callable[[float, float, Any], None]): Called with the `time.perf_counter` time of the first step, the total time spent in the generator, and its return value once it finishes
+    """
+    perf_counter = time.perf_counter
+    start_time = None
+    total_time = 0.0
+    first_item_time = None
+    result = None
+    value = None
+    error = None
+    try:
+        while True:
+            step_start_time = perf_counter()
+            if start_time is None:
+                start_time = step_start_time
+            try:
+                if error is None:
+                    item = generator.send(value)
+                else:
+                    item = generator.throw(error)
+            except StopIteration as stop:
+                result = stop.value
+                return result
+            finally:
+                item_time = perf_counter() - step_start_time
+                total_time += item_time
+
+            if stats is not None:
+                stats.record_item(item_time)
+            if first_item_time is None:
+                first_item_time = item_time
+            error = None
+            try:
+                value = yield item
+            except GeneratorExit:
+                raise
+            except BaseException as e:
+                value = None
+                error = e
+    finally:
+        generator.close()
+        if stats is not None:
+            stats.record_run(total_time, first_item_time)
+        on_finish(
+            start_time if start_time is not None else perf_counter(),
+            total_time,
+            result,
+        )
 
 
 class ExecutionTimer:
-    def __init__(self):
+    def __init__(
+        self,
+        gc_monitor: Optional[GCMonitor] = None,
+        sliding_window: Optional[SlidingWindowMonitor] = None,
+    ):
         self.times = defaultdict(list)
         self.total_execution_times = defaultdict(float)
+        self.gc_monitor = gc_monitor
+        self.sliding_window = sliding_window
+        self.gc_times = defaultdict(float)
+        self.generator_stats: Dict[str, GeneratorStats] = {}
 
     def time_execution(self, func: Callable) -> Callable:
         """A decorator to time the execution of a function
 
+        Generator functions are timed across every step of each generator they create rather than just
+        its creation, see `get_generator_stats`.
+
         Args:
             func (Callable): The function to time
 
@@ -98,19 +766,47 @@ class ExecutionTimer:
             >>> execution_timer.get_execution_time(my_func)
             0.000123456789
         """
+        if inspect.isgeneratorfunction(func):
+            return self._time_generator(func)
 
         @wraps(func)
         def wrapper(*args, **kwargs):
             name = func.__name__
+            gc_monitor = self.gc_monitor
+            if gc_monitor is not None:
+                gc_start_time = gc_monitor.total_pause_time
             start_time = time.perf_counter()
             result = func(*args, **kwargs)
-            elapsed_time = time.perf_counter() - start_time
+            end_time = time.perf_counter()
+            elapsed_time = end_time - start_time
             self.times[name].append(elapsed_time)
             self.total_execution_times[name] += elapsed_time
+            if gc_monitor is not None:
+                self.gc_times[name] += gc_monitor.total_pause_time - gc_start_time
+            if self.sliding_window is not None:
+                self.sliding_window.record(name, elapsed_time, end_time)
             return result
 
         return wrapper
 
+    def _time_generator(self, func: Callable) -> Callable:
+        name = func.__name__
+        stats = self.generator_stats.setdefault(name, GeneratorStats(name))
+
+        def on_finish(start_time: float, total_time: float, result: Any) -> None:
+            self.times[name].append(total_time)
+            self.total_execution_times[name] += total_time
+            if self.sliding_window is not None:
+                self.sliding_window.record(name, total_time)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return (
+                yield from _timed_generator(func(*args, **kwargs), stats, on_finish)
+            )
+
+        return wrapper
+
     def get_execution_times(self) -> Dict[str, float]:
         """Get the execution times of all functions that have been timed
 
@@ -134,32 +830,559 @@ class ExecutionTimer:
             name = func.__name__
         return self.total_execution_times[name]
 
-    def pretty_print_times(self) -> None:
-        """Print the execution times of all functions that have been timed"""
-        avg_times = [
-            self.total_execution_times[name] / len(self.times[name])
-            for name in self.total_execution_times.keys()
+    def get_gc_time(self, func: Union[Callable, str]) -> float:
+        """Get the time spent in garbage collection pauses during calls to a specific function
+
+        Args:
+            func (Union[Callable, str]): The function to get the garbage collection time for, as an instance of the function or the name of the function
+
+        Returns:
+            float: The garbage collection time during the function, 0 if no `GCMonitor` is attached
+        """
+        if isinstance(func, str):
+            name = func
+        else:
+            name = func.__name__
+        return self.gc_times[name]
+
+    def get_generator_stats(self, func: Union[Callable, str]) -> GeneratorStats:
+        """Get the item timings of a specific generator function
+
+        Args:
+            func (Union[Callable, str]): The generator function to get the statistics for, as an instance of the function or the name of the function
+
+        Raises:
+            KeyError: If the function is not a timed generator function
+
+        Returns:
+            GeneratorStats: The number of generators and items, and the time taken to produce them
+        """
+        if isinstance(func, str):
+            name = func
+        else:
+            name = func.__name__
+        return self.generator_stats[name]
+
+    def reset(self) -> None:
+        """Reset the execution times of all functions
+
+        An attached `SlidingWindowMonitor` is left as it is, its windows already only cover recent calls.
+        """
+        self.times.clear()
+        self.total_execution_times.clear()
+        self.gc_times.clear()
+        for stats in self.generator_stats.values():
+            stats.reset()
+
+    def snapshot_and_reset(self) -> Dict[str, float]:
+        """Get the execution times of all functions and then reset them, for reporting the time spent in each interval
+
+        Returns:
+            Dict[str, float]: A dictionary of function names to their execution times since the last reset
+        """
+        execution_times = self.get_execution_times()
+        self.reset()
+        return execution_times
+
+    def get_generator_report(self) -> Report:
+        """Get a report of the item timings of all generator functions, with the columns name, runs, items,
+        total_time, average_first_item_time, average_item_time and max_item_time
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (
+                Column("name", "Generator"),
+                Column("runs", "Runs"),
+                Column("items", "Items"),
+                Column("total_time", "Total Time (s)", ".6f"),
+                Column("average_first_item_time", "Avg First Item (s)", ".6f"),
+                Column("average_item_time", "Avg Item (s)", ".6f"),
+                Column("max_item_time", "Max Item (s)", ".6f"),
+            ),
+            [
+                (
+                    s.name,
+                    s.runs,
+                    s.items,
+                    s.total_time,
+                    s.average_first_item_time,
+                    s.average_item_time,
+                    s.max_item_time,
+                )
+                for s in self.generator_stats.values()
+            ],
+        )
+
+    def pretty_print_generator_stats(
+        self,
+        sort_by: Optional[str] = None,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the item timings of all generator functions that have been timed in a nice table
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the order the generators were first timed in.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print generator functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_generator_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
+        )
+
+    def get_report(self) -> Report:
+        """Get a report of the execution times of all functions, with the columns name, calls, total_time,
+        average_time, and gc_time when a `GCMonitor` is attached
+
+        Returns:
+            Report: The report
+        """
+        columns = [
+            Column("name", "Function"),
+            Column("calls", "Calls"),
+            Column("total_time", "Total Time (s)", ".6f"),
+            Column("average_time", "Average Time (s)", ".6f"),
+        ]
+        rows = [
+            (
+                name,
+                len(self.times[name]),
+                total_time,
+                total_time / len(self.times[name]),
+            )
+            for name, total_time in self.total_execution_times.items()
         ]
-        name_width = max(len(name) for name in self.total_execution_times.keys())
-        time_width = max(
-            len(f"{time:.6f}") for time in self.total_execution_times.values()
+        if self.gc_monitor is not None:
+            columns.append(Column("gc_time", "Of Which GC (s)", ".6f"))
+            rows = [row + (self.gc_times[row[0]],) for row in rows]
+        return Report(columns, rows)
+
+    def pretty_print_times(
+        self,
+        sort_by: Optional[str] = None,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the execution times of all functions that have been timed
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the order the functions were first timed in.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
         )
 
-        avg_time_width = max(len(f"{avg_time:.6f}") for avg_time in avg_times)
 
-        name_width = max(name_width, len("Function"))
-        time_width = max(time_width, len("Total Time (s)"))
-        avg_time_width = max(avg_time_width, len("Average Time (s)"))
+class MemoryStats:
+    """Aggregated memory allocation statistics of a single function
+
+    Only running totals and maxima are kept, so memory use does not grow with the number of calls.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.total_net = 0
+        self.max_net = 0
+        self.total_peak = 0
+        self.max_peak = 0
+        self.lines: Dict[str, int] = defaultdict(int)
+
+    def record(self, net: int, peak: int) -> None:
+        self.calls += 1
+        self.total_net += net
+        self.total_peak += peak
+        if net > self.max_net:
+            self.max_net = net
+        if peak > self.max_peak:
+            self.max_peak = peak
+
+    def top_lines(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Get the source lines that allocated the most memory during calls to the function
+
+        Args:
+            n (int, optional): The number of lines to return. Defaults to 10.
+
+        Returns:
+            List[Tuple[str, int]]: Pairs of "filename:lineno" and net bytes allocated, largest first
+        """
+        return heapq.nlargest(n, self.lines.items(), key=lambda item: item[1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "total_net": self.total_net,
+            "average_net": self.total_net / self.calls if self.calls else 0.0,
+            "max_net": self.max_net,
+            "total_peak": self.total_peak,
+            "max_peak": self.max_peak,
+        }
 
-        print(
-            f"{'Function':<{name_width}} | {'Total Time (s)':<{time_width}} | {'Average Time (s)':<{avg_time_width}}"
+    def __repr__(self) -> str:
+        return f"MemoryStats(name={self.name}, calls={self.calls}, total_net={self.total_net}, max_net={self.max_net}, max_peak={self.max_peak})"
+
+
+# added in Python 3.9
+_reset_peak = getattr(tracemalloc, "reset_peak", None)
+
+
+class MemoryProfiler:
+    """Records how much memory functions registered to it allocate
+
+    Three modes are available:
+    + "blocks" - the net number of memory blocks allocated per call, using `sys.getallocatedblocks`. This is cheap and does not need `tracemalloc`.
+    + "bytes" - the net and peak bytes allocated per call, using `tracemalloc`.
+    + "lines" - as "bytes", and also the source lines responsible, using a `tracemalloc` snapshot before and after each call. This is slow.
+
+    `tracemalloc` is started when a profiled function is called if it is not already tracing, and stopped
+    again when no profiled function is running, so the rest of the program is not slowed down by tracing.
+    Tracing that was started elsewhere is left running.
+
+    Memory is measured for the whole process, so allocations made by other threads while a profiled
+    function runs are included in its figures. On Python 3.8 and earlier, where `tracemalloc.reset_peak`
+    is not available, the peak of a nested call includes its callers' peak so far.
+
+    Args:
+        mode (str, optional): One of "blocks", "bytes" or "lines". Defaults to "bytes".
+        max_lines (int, optional): The maximum number of source lines kept per function in "lines" mode. Defaults to 50.
+    """
+
+    def __init__(self, mode: str = "bytes", max_lines: int = 50):
+        if mode not in ("blocks", "bytes", "lines"):
+            raise ValueError(
+                f"mode must be one of 'blocks', 'bytes' or 'lines', got '{mode}'"
+            )
+        self.mode = mode
+        self.max_lines = max_lines
+        self.stats: Dict[str, MemoryStats] = {}
+        # peaks of the calls that are currently running, so nested calls do not hide their caller's peak
+        self._peaks: List[int] = []
+        self._running = 0
+        self._started_tracing = False
+
+    def profile_memory(self, func: Callable) -> Callable:
+        """A decorator to record the memory allocated by a function
+
+        Args:
+            func (Callable): The function to profile
+
+        Returns:
+            Callable: The wrapped function
+
+        Examples:
+            >>> memory_profiler = MemoryProfiler()
+            >>> @memory_profiler.profile_memory
+            ... def my_func(n: int):
+            ...     return [i for i in range(n)]
+            >>> _ = my_func(1000)
+            >>> memory_profiler.get_memory_stats(my_func).max_net > 0
+            True
+        """
+        name = func.__name__
+        stats = self.stats.setdefault(name, MemoryStats(name))
+
+        if self.mode == "blocks":
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start_blocks = sys.getallocatedblocks()
+                result = func(*args, **kwargs)
+                net = sys.getallocatedblocks() - start_blocks
+                stats.record(net, max(net, 0))
+                return result
+
+            return wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._running += 1
+            try:
+                return profile(args, kwargs)
+            finally:
+                self._running -= 1
+                if not self._running and self._started_tracing:
+                    self._started_tracing = False
+                    tracemalloc.stop()
+
+        def profile(args, kwargs):
+            if self.mode == "lines":
+                start_snapshot = tracemalloc.take_snapshot()
+
+            start_memory, peak_memory = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak_memory)
+            self._peaks.append(start_memory)
+            if _reset_peak is not None:
+                _reset_peak()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                end_memory, peak_memory = tracemalloc.get_traced_memory()
+                peak_memory = max(peak_memory, self._peaks.pop())
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak_memory)
+            stats.record(end_memory - start_memory, peak_memory - start_memory)
+
+            if self.mode == "lines":
+                self._record_lines(stats, start_snapshot, tracemalloc.take_snapshot())
+            return result
+
+        return wrapper
+
+    def _record_lines(
+        self,
+        stats: MemoryStats,
+        start_snapshot: tracemalloc.Snapshot,
+        end_snapshot: tracemalloc.Snapshot,
+    ) -> None:
+        exclude = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        differences = end_snapshot.filter_traces(exclude).compare_to(
+            start_snapshot.filter_traces(exclude), "lineno"
         )
-        print("-" * (name_width + time_width + avg_time_width + 6))
-        for idx, (name, total_time) in enumerate(self.total_execution_times.items()):
-            avg_time = avg_times[idx]
-            print(
-                f"{name:<{name_width}} | {total_time:<{time_width}.6f} | {avg_time:<{avg_time_width}.6f}"
+        for difference in differences:
+            if difference.size_diff:
+                frame = difference.traceback[0]
+                stats.lines[f"{frame.filename}:{frame.lineno}"] += difference.size_diff
+
+        if len(stats.lines) > 2 * self.max_lines:
+            stats.lines = defaultdict(int, stats.top_lines(self.max_lines))
+
+    def get_memory_stats(self, func: Union[Callable, str]) -> MemoryStats:
+        """Get the memory statistics of a specific function
+
+        Args:
+            func (Union[Callable, str]): The function to get the statistics for, as an instance of the function or the name of the function
+
+        Returns:
+            MemoryStats: The memory statistics of the function
+        """
+        if isinstance(func, str):
+            name = func
+        else:
+            name = func.__name__
+        return self.stats[name]
+
+    def get_top_allocators(self, n: int = 10) -> List[MemoryStats]:
+        """Get the functions that allocated the most memory in total
+
+        Args:
+            n (int, optional): The number of functions to return. Defaults to 10.
+
+        Returns:
+            List[MemoryStats]: The statistics of the top allocating functions, largest first
+        """
+        return heapq.nlargest(n, self.stats.values(), key=lambda s: s.total_net)
+
+    def get_report(self) -> Report:
+        """Get a report of the memory statistics of all functions, with the columns name, calls, total_net,
+        max_net and max_peak
+
+        Returns:
+            Report: The report
+        """
+        unit = "Blocks" if self.mode == "blocks" else "B"
+        return Report(
+            (
+                Column("name", "Function"),
+                Column("calls", "Calls"),
+                Column("total_net", f"Total Net ({unit})"),
+                Column("max_net", f"Max Net ({unit})"),
+                Column("max_peak", f"Max Peak ({unit})"),
+            ),
+            [
+                (s.name, s.calls, s.total_net, s.max_net, s.max_peak)
+                for s in self.stats.values()
+            ],
+        )
+
+    def pretty_print_memory(
+        self,
+        n: Optional[int] = None,
+        sort_by: Optional[str] = "total_net",
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the memory statistics of the top allocating functions in a nice table
+
+        Args:
+            n (Optional[int], optional): The number of functions to print. Defaults to None for all functions.
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to "total_net", None for the order the functions were first called in.
+            pattern (Optional[str], optional): Only print functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=n, pattern=pattern
+        )
+
+
+class SamplingProfiler:
+    """Finds where time is spent by periodically sampling the stacks of all running threads
+
+    No functions need to be decorated and the profiled code is not slowed down by instrumentation, a
+    background thread records the function each thread is in, and every function on its stack, every
+    `interval` seconds. The fraction of samples a function appears in estimates the fraction of time
+    spent in it. Functions are named by file, first line and name.
+
+    Args:
+        interval (float, optional): The time in seconds between samples. Defaults to 0.005.
+
+    Examples:
+        >>> with SamplingProfiler() as sampling_profiler:
+        ...     run_workload()
+        >>> sampling_profiler.pretty_print_samples(10)
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self.self_counts: Dict[str, int] = defaultdict(int)
+        self.cumulative_counts: Dict[str, int] = defaultdict(int)
+        self._names: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _name(self, code: Any) -> str:
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = (
+                f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
             )
+        return name
+
+    def sample(self) -> None:
+        """Record the stacks of all threads other than the calling thread once"""
+        own_thread = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            self.samples += 1
+            self.self_counts[self._name(frame.f_code)] += 1
+            seen = set()
+            while frame is not None:
+                if frame.f_code not in seen:
+                    seen.add(frame.f_code)
+                    self.cumulative_counts[self._name(frame.f_code)] += 1
+                frame = frame.f_back
+        del frame
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        """Start sampling from a background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="contemplation-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def get_samples(self) -> Dict[str, Dict[str, float]]:
+        """Get the number and fraction of samples each function was running in, or on the stack of
+
+        Returns:
+            Dict[str, Dict[str, float]]: A dictionary of functions to their self and cumulative samples and fractions of all samples, most self samples first
+        """
+        samples = max(self.samples, 1)
+        return {
+            name: {
+                "self_samples": self.self_counts.get(name, 0),
+                "self_fraction": self.self_counts.get(name, 0) / samples,
+                "cumulative_samples": cumulative,
+                "cumulative_fraction": cumulative / samples,
+            }
+            for name, cumulative in sorted(
+                self.cumulative_counts.items(),
+                key=lambda item: (self.self_counts.get(item[0], 0), item[1]),
+                reverse=True,
+            )
+        }
+
+    def get_report(self) -> Report:
+        """Get a report of the samples of every function, most self samples first, with the columns name,
+        self_samples, self_fraction, cumulative_samples and cumulative_fraction
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (
+                Column("name", "Function"),
+                Column("self_samples", "Self Samples"),
+                Column("self_fraction", "Self %", ".2%"),
+                Column("cumulative_samples", "Cumulative Samples"),
+                Column("cumulative_fraction", "Cumulative %", ".2%"),
+            ),
+            [
+                (
+                    name,
+                    stats["self_samples"],
+                    stats["self_fraction"],
+                    stats["cumulative_samples"],
+                    stats["cumulative_fraction"],
+                )
+                for name, stats in self.get_samples().items()
+            ],
+        )
+
+    def pretty_print_samples(
+        self,
+        n: Optional[int] = 20,
+        sort_by: Optional[str] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the functions that were running in the most samples in a nice table
+
+        Args:
+            n (Optional[int], optional): The number of functions to print. Defaults to 20, None for all.
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the most self samples first.
+            pattern (Optional[str], optional): Only print functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=n, pattern=pattern
+        )
 
 
 class FunctionEvent:
@@ -170,11 +1393,12 @@ class FunctionEvent:
         end_time: float,
         function_arguments: Optional[Dict[str, Any]],
         function_returns: Optional[Any],
+        duration: Optional[float] = None,
     ):
         self.name = function_name
         self.start_time = start_time
         self.end_time = end_time
-        self.duration = end_time - start_time
+        self.duration = end_time - start_time if duration is None else duration
         self.function_arguments = function_arguments
         self.function_returns = function_returns
 
@@ -192,6 +1416,16 @@ class FunctionEvent:
         return f"FunctionEvent(name={self.name}, start_time={self.start_time}, end_time={self.end_time}, duration={self.duration}, function_arguments={self.function_arguments}, function_returns={self.function_returns})"
 
 
+def _positional_arg_names(func: Callable) -> List[str]:
+    # follows __wrapped__ so the names are found through other decorators
+    return [
+        name
+        for name, parameter in inspect.signature(func).parameters.items()
+        if parameter.kind
+        in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+    ]
+
+
 class FunctionLogger:
     def __init__(self):
         self.logs: List[FunctionEvent] = []
@@ -199,7 +1433,23 @@ class FunctionLogger:
         self.idx = 0
 
     def log_function(self, log_args: bool = False, log_returns: bool = False):
+        """A decorator to log each call of a function as a `FunctionEvent`
+
+        Calls of generator functions are logged when the generator finishes, with the time spent inside
+        the generator as the duration and the generator's return value as the return value.
+
+        Args:
+            log_args (bool, optional): Whether to log the arguments of each call. Defaults to False.
+            log_returns (bool, optional): Whether to log the return value of each call. Defaults to False.
+
+        Returns:
+            Callable: The decorator
+        """
+
         def decorator(func):
+            if inspect.isgeneratorfunction(func):
+                return self._log_generator(func, log_args, log_returns)
+
             @wraps(func)
             def wrapper(*args, **kwargs):
                 start_time = time.time()
@@ -229,6 +1479,35 @@ class FunctionLogger:
 
         return decorator
 
+    def _log_generator(
+        self, func: Callable, log_args: bool, log_returns: bool
+    ) -> Callable:
+        name = func.__name__
+        arg_names = _positional_arg_names(func)
+        wall_clock_offset = time.time() - time.perf_counter()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if log_args:
+                arguments = dict(zip(arg_names, args))
+                arguments.update(kwargs)
+
+            def on_finish(start_time: float, total_time: float, result: Any) -> None:
+                event = FunctionEvent(
+                    function_name=name,
+                    start_time=start_time + wall_clock_offset,
+                    end_time=time.time(),
+                    function_arguments=arguments if log_args else None,
+                    function_returns=result if log_returns else None,
+                    duration=total_time,
+                )
+                self.logs.append(event)
+                self.grouped_logs[name].append(event)
+
+            return (yield from _timed_generator(func(*args, **kwargs), None, on_finish))
+
+        return wrapper
+
     def get_logs(self) -> List[FunctionEvent]:
         """Get the logs of all functions that have been logged
 
@@ -272,24 +1551,51 @@ class FunctionLogger:
             for log in self.logs:
                 f.write(json.dumps(log.to_dict()) + "\n")
 
-    def pretty_print_logs(self) -> None:
-        """Prints the function name, start time, end time, and duration of all logs in a nice table"""
-        name_width = max(len(log.name) for log in self.logs)
-        time_width = max(len(f"{log.start_time:.6f}") for log in self.logs)
-        duration_width = max(len(f"{log.duration:.6f}") for log in self.logs)
+    def reset(self) -> None:
+        """Forget the logs of all functions"""
+        self.logs.clear()
+        self.grouped_logs.clear()
+        self.idx = 0
 
-        name_width = max(name_width, len("Function"))
-        time_width = max(time_width, len("Start Time (s)"))
-        duration_width = max(duration_width, len("Duration (s)"))
+    def get_report(self) -> Report:
+        """Get a report of all logs, with the columns name, start_time, end_time and duration
 
-        print(
-            f"{'Function':<{name_width}} | {'Start Time (s)':<{time_width}} | {'Duration (s)':<{duration_width}}"
+        Returns:
+            Report: The report, reading the logs when it is rendered
+        """
+        return Report(
+            (
+                Column("name", "Function"),
+                Column("start_time", "Start Time (s)", ".6f"),
+                Column("end_time", "End Time (s)", ".6f"),
+                Column("duration", "Duration (s)", ".6f"),
+            ),
+            (
+                (log.name, log.start_time, log.end_time, log.duration)
+                for log in self.logs
+            ),
+        )
+
+    def pretty_print_logs(
+        self,
+        sort_by: Optional[str] = None,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Prints the function name, start time, end time, and duration of all logs in a nice table
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the order the calls were logged in.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print logs whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
         )
-        print("-" * (name_width + time_width + duration_width + 6))
-        for log in self.logs:
-            print(
-                f"{log.name:<{name_width}} | {log.start_time:<{time_width}.6f} | {log.duration:<{duration_width}.6f}"
-            )
 
     def __iter__(self):
         self.idx = 0
@@ -302,3 +1608,518 @@ class FunctionLogger:
             return log
         else:
             raise StopIteration
+
+
+class Demotion:
+    """Records that an adaptive `Introspector` stopped timing every call of a function
+
+    Args:
+        name (str): The name of the demoted function
+        mode (str): What the function was demoted to, "sampled" or "count"
+        median_time (float): The median time of the calls measured before demotion, in seconds
+        wrapper_overhead (float): The calibrated cost of the wrapper per call, in seconds
+        calls (int): The number of calls before demotion
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: str,
+        median_time: float,
+        wrapper_overhead: float,
+        calls: int,
+    ):
+        self.name = name
+        self.mode = mode
+        self.median_time = median_time
+        self.wrapper_overhead = wrapper_overhead
+        self.calls = calls
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "median_time": self.median_time,
+            "wrapper_overhead": self.wrapper_overhead,
+            "calls": self.calls,
+        }
+
+    def __repr__(self) -> str:
+        return f"Demotion(name={self.name}, mode={self.mode}, median_time={self.median_time}, wrapper_overhead={self.wrapper_overhead}, calls={self.calls})"
+
+
+def _noop():
+    pass
+
+
+def _format_estimated(estimated: bool) -> str:
+    return "*" if estimated else ""
+
+
+class Introspector:
+    """Counts, times and logs functions with a single wrapper per function
+
+    Stacking `count_calls`, `time_execution` and `log_function` adds three wrappers per call. An
+    introspector records every enabled measurement from one wrapper that reads the clock once when the
+    function starts and once when it ends. The results are stored in a `CallCounter`, `ExecutionTimer`
+    and `FunctionLogger`, so all of their usual methods work on the introspector's data.
+
+    Log timestamps are derived from the same `time.perf_counter` readings as the execution times, offset
+    to wall clock time when the introspector is created.
+
+    Generator functions are counted when they are called, and timed and logged across every step of the
+    generator they return, excluding the time the consumer spends between items.
+
+    With a `SlidingWindowMonitor` every call is also recorded into its sliding windows. Only the timed calls
+    of demoted functions are recorded, each standing for `sample_every` calls.
+
+    In adaptive mode the introspector calibrates its own overhead when it is created and subtracts the
+    cost of reading the clock from every time it records. Once a function has been timed `demote_after`
+    times, if its median time is less than `demote_factor` times the cost of the wrapper it is demoted to
+    timing 1 in every `sample_every` calls, or to only being counted. Calls are always counted in adaptive
+    mode so the total time of demoted functions can be estimated from their average.
+
+    Args:
+        count_calls (bool, optional): Whether to count calls. Defaults to True.
+        time_execution (bool, optional): Whether to time calls. Defaults to True.
+        log_calls (bool, optional): Whether to log each call as a `FunctionEvent`. Defaults to False.
+        log_args (bool, optional): Whether logged calls include their arguments. Defaults to False.
+        log_returns (bool, optional): Whether logged calls include their return value. Defaults to False.
+        gc_monitor (Optional[GCMonitor], optional): A running `GCMonitor` to attribute garbage collection pauses to timed functions. Defaults to None.
+        sliding_window (Optional[SlidingWindowMonitor], optional): A `SlidingWindowMonitor` to record the rate and times of recent calls into. Defaults to None.
+        adaptive (bool, optional): Whether to correct for and limit the introspector's own overhead. Defaults to False.
+        demote_after (int, optional): The number of timed calls after which a function may be demoted. Defaults to 1000.
+        demote_factor (float, optional): Functions with a median time below this multiple of the wrapper overhead are demoted. Defaults to 2.0.
+        demoted_mode (str, optional): "sampled" to time 1 in every `sample_every` calls of demoted functions, or "count" to stop timing them. Defaults to "sampled".
+        sample_every (int, optional): How often demoted functions are timed in "sampled" mode. Defaults to 100.
+
+    Examples:
+        >>> introspector = Introspector(log_calls=True)
+        >>> @introspector.introspect
+        ... def my_func(a: int, b: int):
+        ...     return a + b
+        >>> for i in range(100):
+        ...     my_func(i, i + 1)
+        >>> introspector.call_counter.get_count(my_func)
+        100
+        >>> len(introspector.function_logger.get_logs())
+        100
+        >>> introspector.pretty_print_stats()
+    """
+
+    def __init__(
+        self,
+        count_calls: bool = True,
+        time_execution: bool = True,
+        log_calls: bool = False,
+        log_args: bool = False,
+        log_returns: bool = False,
+        gc_monitor: Optional[GCMonitor] = None,
+        sliding_window: Optional[SlidingWindowMonitor] = None,
+        adaptive: bool = False,
+        demote_after: int = 1000,
+        demote_factor: float = 2.0,
+        demoted_mode: str = "sampled",
+        sample_every: int = 100,
+    ):
+        if demoted_mode not in ("sampled", "count"):
+            raise ValueError(
+                f"demoted_mode must be 'sampled' or 'count', not '{demoted_mode}'"
+            )
+        self.count_calls = count_calls or adaptive
+        self.time_execution = time_execution
+        self.log_calls = log_calls
+        self.log_args = log_args
+        self.log_returns = log_returns
+        self.adaptive = adaptive
+        self.demote_after = demote_after
+        self.demote_factor = demote_factor
+        self.demoted_mode = demoted_mode
+        self.sample_every = sample_every
+        self.call_counter = CallCounter()
+        self.execution_timer = ExecutionTimer(gc_monitor, sliding_window)
+        self.function_logger = FunctionLogger()
+        self.demotions: Dict[str, Demotion] = {}
+        self._wall_clock_offset = time.time() - time.perf_counter()
+        self.clock_overhead = 0.0
+        self.wrapper_overhead = 0.0
+        if adaptive:
+            self.calibrate()
+
+    def calibrate(self, iterations: int = 10_000) -> None:
+        """Measure the overhead of the introspector's wrapper on this machine
+
+        Sets `clock_overhead`, the time a timed call of an empty function appears to take, which is
+        subtracted from every time recorded in adaptive mode, and `wrapper_overhead`, the extra time the
+        wrapper adds to each call.
+
+        Args:
+            iterations (int, optional): The number of calls to measure. Defaults to 10_000.
+        """
+        calibration = Introspector(count_calls=True, time_execution=True)
+        wrapped = calibration.introspect(_noop)
+        perf_counter = time.perf_counter
+
+        wrapped_time = bare_time = float("inf")
+        for _ in range(3):
+            start_time = perf_counter()
+            for _ in range(iterations):
+                wrapped()
+            wrapped_time = min(wrapped_time, perf_counter() - start_time)
+            start_time = perf_counter()
+            for _ in range(iterations):
+                _noop()
+            bare_time = min(bare_time, perf_counter() - start_time)
+
+        times = sorted(calibration.execution_timer.times["_noop"])
+        self.clock_overhead = times[len(times) // 2]
+        self.wrapper_overhead = max(wrapped_time - bare_time, 0.0) / iterations
+
+    def introspect(self, func: Callable, name: Optional[str] = None) -> Callable:
+        """A decorator to count, time and log a function, as configured on the introspector
+
+        Coroutine functions are timed from the call until the coroutine finishes, including the time it
+        spends waiting, and are never demoted in adaptive mode.
+
+        Args:
+            func (Callable): The function to introspect
+            name (Optional[str], optional): The name to record the function under. Defaults to None for the function's `__name__`.
+
+        Returns:
+            Callable: The wrapped function
+        """
+        if inspect.isgeneratorfunction(func):
+            return self._introspect_generator(func, name)
+        if inspect.iscoroutinefunction(func):
+            return self._introspect_coroutine(func, name)
+        if self.adaptive and self.time_execution:
+            return self._introspect_adaptive(func, name)
+
+        if name is None:
+            name = func.__name__
+        counts = self.call_counter.counts
+        timer = self.execution_timer
+        count_calls = self.count_calls
+        time_execution = self.time_execution
+        log_calls = self.log_calls
+        log_call = self._make_call_logger(func, name)
+        sliding_window = timer.sliding_window
+        perf_counter = time.perf_counter
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if count_calls:
+                counts[name] += 1
+            if not (time_execution or log_calls):
+                result = func(*args, **kwargs)
+                if sliding_window is not None:
+                    sliding_window.record(name)
+                return result
+
+            gc_monitor = timer.gc_monitor
+            if gc_monitor is not None:
+                gc_start_time = gc_monitor.total_pause_time
+            start_time = perf_counter()
+            result = func(*args, **kwargs)
+            end_time = perf_counter()
+
+            elapsed_time = end_time - start_time
+            if time_execution:
+                timer.times[name].append(elapsed_time)
+                timer.total_execution_times[name] += elapsed_time
+                if gc_monitor is not None:
+                    timer.gc_times[name] += gc_monitor.total_pause_time - gc_start_time
+            if sliding_window is not None:
+                sliding_window.record(
+                    name, elapsed_time if time_execution else None, end_time
+                )
+            if log_calls:
+                log_call(args, kwargs, result, start_time, end_time, elapsed_time)
+            return result
+
+        return wrapper
+
+    def _make_call_logger(self, func: Callable, name: str) -> Callable:
+        logger = self.function_logger
+        log_args = self.log_args
+        log_returns = self.log_returns
+        arg_names = _positional_arg_names(func) if log_args else None
+        wall_clock_offset = self._wall_clock_offset
+
+        def log_call(args, kwargs, result, start_time, end_time, elapsed_time):
+            if log_args:
+                arguments = dict(zip(arg_names, args))
+                arguments.update(kwargs)
+            event = FunctionEvent(
+                function_name=name,
+                start_time=start_time + wall_clock_offset,
+                end_time=end_time + wall_clock_offset,
+                function_arguments=arguments if log_args else None,
+                function_returns=result if log_returns else None,
+                duration=elapsed_time,
+            )
+            logger.logs.append(event)
+            logger.grouped_logs[name].append(event)
+
+        return log_call
+
+    def _introspect_generator(self, func: Callable, name: Optional[str]) -> Callable:
+        if name is None:
+            name = func.__name__
+        counts = self.call_counter.counts
+        timer = self.execution_timer
+        count_calls = self.count_calls
+        time_execution = self.time_execution
+        log_calls = self.log_calls
+        log_call = self._make_call_logger(func, name)
+        sliding_window = timer.sliding_window
+        stats = (
+            timer.generator_stats.setdefault(name, GeneratorStats(name))
+            if time_execution
+            else None
+        )
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if count_calls:
+                counts[name] += 1
+            if not (time_execution or log_calls):
+                if sliding_window is not None:
+                    sliding_window.record(name)
+                return (yield from func(*args, **kwargs))
+
+            def on_finish(start_time: float, total_time: float, result: Any) -> None:
+                if time_execution:
+                    timer.times[name].append(total_time)
+                    timer.total_execution_times[name] += total_time
+                if sliding_window is not None:
+                    sliding_window.record(name, total_time if time_execution else None)
+                if log_calls:
+                    end_time = time.perf_counter()
+                    log_call(args, kwargs, result, start_time, end_time, total_time)
+
+            return (
+                yield from _timed_generator(func(*args, **kwargs), stats, on_finish)
+            )
+
+        return wrapper
+
+    def _introspect_coroutine(self, func: Callable, name: Optional[str]) -> Callable:
+        # timed from the call until the coroutine finishes, including the time it is suspended
+        if name is None:
+            name = func.__name__
+        counts = self.call_counter.counts
+        timer = self.execution_timer
+        count_calls = self.count_calls
+        time_execution = self.time_execution
+        log_calls = self.log_calls
+        log_call = self._make_call_logger(func, name)
+        sliding_window = timer.sliding_window
+        perf_counter = time.perf_counter
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if count_calls:
+                counts[name] += 1
+            start_time = perf_counter()
+            result = await func(*args, **kwargs)
+            end_time = perf_counter()
+
+            elapsed_time = end_time - start_time
+            if time_execution:
+                timer.times[name].append(elapsed_time)
+                timer.total_execution_times[name] += elapsed_time
+            if sliding_window is not None:
+                sliding_window.record(
+                    name, elapsed_time if time_execution else None, end_time
+                )
+            if log_calls:
+                log_call(args, kwargs, result, start_time, end_time, elapsed_time)
+            return result
+
+        return wrapper
+
+    def _introspect_adaptive(self, func: Callable, name: Optional[str]) -> Callable:
+        if name is None:
+            name = func.__name__
+        counts = self.call_counter.counts
+        timer = self.execution_timer
+        log_calls = self.log_calls
+        log_call = self._make_call_logger(func, name)
+        clock_overhead = self.clock_overhead
+        sliding_window = timer.sliding_window
+        perf_counter = time.perf_counter
+        demote_after = self.demote_after
+        # 0 while the function is timed on every call and undecided, -1 once it is kept on every call
+        sample_every = 0
+        calls = 0
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal calls, sample_every
+            counts[name] += 1
+            if sample_every > 0:
+                calls += 1
+                if calls % sample_every:
+                    return func(*args, **kwargs)
+
+            gc_monitor = timer.gc_monitor
+            if gc_monitor is not None:
+                gc_start_time = gc_monitor.total_pause_time
+            start_time = perf_counter()
+            result = func(*args, **kwargs)
+            end_time = perf_counter()
+
+            elapsed_time = end_time - start_time - clock_overhead
+            if elapsed_time < 0.0:
+                elapsed_time = 0.0
+            times = timer.times[name]
+            times.append(elapsed_time)
+            timer.total_execution_times[name] += elapsed_time
+            if gc_monitor is not None:
+                timer.gc_times[name] += gc_monitor.total_pause_time - gc_start_time
+            if sliding_window is not None:
+                sliding_window.record(
+                    name,
+                    elapsed_time,
+                    end_time,
+                    sample_every if sample_every > 0 else 1,
+                )
+            if log_calls:
+                log_call(args, kwargs, result, start_time, end_time, elapsed_time)
+
+            if not sample_every and len(times) == demote_after:
+                sample_every = self._maybe_demote(name)
+            return result
+
+        return wrapper
+
+    def _maybe_demote(self, name: str) -> int:
+        """Decide whether to demote a function that has been timed `demote_after` times
+
+        Returns:
+            int: How often to time the function from now on, -1 to keep timing every call
+        """
+        times = sorted(self.execution_timer.times[name][-self.demote_after :])
+        median_time = times[len(times) // 2]
+        # the wrapper cost is what the application pays, the clock overhead has already been subtracted
+        if median_time >= self.demote_factor * self.wrapper_overhead:
+            return -1
+
+        self.demotions[name] = Demotion(
+            name,
+            self.demoted_mode,
+            median_time,
+            self.wrapper_overhead,
+            self.call_counter.counts[name],
+        )
+        if self.demoted_mode == "count":
+            return sys.maxsize
+        return self.sample_every
+
+    def get_demotions(self) -> Dict[str, Demotion]:
+        """Get the functions an adaptive introspector has stopped timing every call of
+
+        Returns:
+            Dict[str, Demotion]: A dictionary of function names to their demotion
+        """
+        return dict(self.demotions)
+
+    def reset(self) -> None:
+        """Reset the counts, execution times and logs, keeping any demotions and the sliding window"""
+        self.call_counter.reset()
+        self.execution_timer.reset()
+        self.function_logger.reset()
+
+    def snapshot_and_reset(self) -> Dict[str, Dict[str, Any]]:
+        """Get the call count and execution times of every function and then reset them, for interval reporting
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The statistics since the last reset, as returned by `get_stats`
+        """
+        stats = self.get_stats()
+        self.reset()
+        return stats
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the call count and execution times of every function that has been introspected
+
+        The total time of demoted functions is estimated from the average of the calls that were timed.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: A dictionary of function names to their count, total time, average time, and whether the times are estimated
+        """
+        counts = self.call_counter.counts
+        timer = self.execution_timer
+        stats = {}
+        for name in dict.fromkeys([*counts, *timer.total_execution_times]):
+            total_time = timer.total_execution_times.get(name, 0.0)
+            timed_calls = len(timer.times.get(name, ()))
+            average_time = total_time / timed_calls if timed_calls else 0.0
+            estimated = name in self.demotions
+            if estimated:
+                total_time = average_time * counts[name]
+            stats[name] = {
+                "count": counts.get(name, 0),
+                "total_time": total_time,
+                "average_time": average_time,
+                "estimated": estimated,
+            }
+        return stats
+
+    def get_report(self) -> Report:
+        """Get a report of the call count and execution times of every function, with the columns name, count,
+        total_time, average_time and estimated
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (
+                Column("name", "Function"),
+                Column("count", "Count"),
+                Column("total_time", "Total Time (s)", ".6f"),
+                Column("average_time", "Average Time (s)", ".6f"),
+                Column("estimated", "Estimated", formatter=_format_estimated),
+            ),
+            [
+                (
+                    name,
+                    stats["count"],
+                    stats["total_time"],
+                    stats["average_time"],
+                    stats["estimated"],
+                )
+                for name, stats in self.get_stats().items()
+            ],
+        )
+
+    def pretty_print_stats(
+        self,
+        sort_by: Optional[str] = None,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the call count and execution times of every function that has been introspected in a nice table
+
+        Estimated times of demoted functions are marked with a *, and explained below text tables.
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the order the functions were first called in.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
+        )
+        if output_format != "text":
+            return
+        for demotion in self.demotions.values():
+            print(
+                f"* {demotion.name} was demoted to {demotion.mode} after {demotion.calls} calls, median time {demotion.median_time:.9f}s vs wrapper overhead {demotion.wrapper_overhead:.9f}s",
+                file=file,
+            )
@@ -0,0 +1,538 @@
+import bisect
+import gzip
+import json
+import math
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from .execution_introspections import (
+    DEFAULT_LATENCY_BUCKETS,
+    CallCounter,
+    ExecutionTimer,
+)
+from .reports import Column, Report
+
+SNAPSHOT_FORMAT = "contemplation.execution_snapshot"
+SNAPSHOT_VERSION = 1
+
+
+class ExecutionSnapshot:
+    """A compact record of the call counts and execution time histograms of a run, that can be saved, loaded and merged
+
+    Times are kept as histograms with fixed buckets, so snapshots stay small however many calls were made
+    and snapshots of different runs or hosts can be merged by adding them up. Only snapshots with the
+    same buckets can be merged or compared.
+
+    Args:
+        call_counter (Optional[CallCounter], optional): The counts to record. Defaults to None.
+        execution_timer (Optional[ExecutionTimer], optional): The times to record. Defaults to None.
+        buckets (Sequence[float], optional): Upper bounds in seconds of the histogram buckets, a final unbounded bucket is always added. Defaults to DEFAULT_LATENCY_BUCKETS.
+        metadata (Optional[Dict[str, Any]], optional): JSON serialisable information about the run, such as the commit or host. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        call_counter: Optional[CallCounter] = None,
+        execution_timer: Optional[ExecutionTimer] = None,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        self.timestamp = time.time()
+        self.metadata: Dict[str, Any] = dict(metadata or {})
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.counts: Dict[str, int] = (
+            call_counter.get_counts() if call_counter is not None else {}
+        )
+        self.timed_calls: Dict[str, int] = {}
+        self.total_times: Dict[str, float] = {}
+        self.histograms: Dict[str, List[int]] = {}
+        if execution_timer is None:
+            return
+
+        for name, times in list(execution_timer.times.items()):
+            if not times:
+                continue
+            histogram = [0] * len(self.buckets)
+            for elapsed_time in times:
+                histogram[bisect.bisect_left(self.buckets, elapsed_time)] += 1
+            self.timed_calls[name] = len(times)
+            self.total_times[name] = sum(times)
+            self.histograms[name] = histogram
+
+    def average_time(self, func: Union[Callable, str]) -> float:
+        """Get the average time of the timed calls of a specific function
+
+        Args:
+            func (Union[Callable, str]): The function to get the average time for, as an instance of the function or the name of the function
+
+        Returns:
+            float: The average time, 0 if the function was not timed
+        """
+        if isinstance(func, str):
+            name = func
+        else:
+            name = func.__name__
+        timed_calls = self.timed_calls.get(name, 0)
+        return self.total_times[name] / timed_calls if timed_calls else 0.0
+
+    def get_histogram(self, func: Union[Callable, str]) -> Dict[float, int]:
+        """Get the number of timed calls of a specific function in each histogram bucket
+
+        Args:
+            func (Union[Callable, str]): The function to get the histogram for, as an instance of the function or the name of the function
+
+        Raises:
+            KeyError: If the function was not timed
+
+        Returns:
+            Dict[float, int]: A dictionary of bucket upper bounds in seconds to the number of calls in that bucket
+        """
+        if isinstance(func, str):
+            name = func
+        else:
+            name = func.__name__
+        return dict(zip(self.buckets, self.histograms[name]))
+
+    def merge(self, other: "ExecutionSnapshot") -> "ExecutionSnapshot":
+        """Add the counts and times of another snapshot to a copy of this one
+
+        Args:
+            other (ExecutionSnapshot): The snapshot to merge in
+
+        Raises:
+            ValueError: If the snapshots use different histogram buckets
+
+        Returns:
+            ExecutionSnapshot: A new snapshot with the totals of both
+        """
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge snapshots with different histogram buckets")
+        merged = ExecutionSnapshot(buckets=self.buckets[:-1])
+        merged.timestamp = max(self.timestamp, other.timestamp)
+        merged.metadata = {
+            "merged_from": self.metadata.get("merged_from", [self.metadata])
+            + other.metadata.get("merged_from", [other.metadata])
+        }
+        for snapshot in (self, other):
+            for name, count in snapshot.counts.items():
+                merged.counts[name] = merged.counts.get(name, 0) + count
+            for name, histogram in snapshot.histograms.items():
+                merged.timed_calls[name] = (
+                    merged.timed_calls.get(name, 0) + snapshot.timed_calls[name]
+                )
+                merged.total_times[name] = (
+                    merged.total_times.get(name, 0.0) + snapshot.total_times[name]
+                )
+                merged_histogram = merged.histograms.setdefault(
+                    name, [0] * len(self.buckets)
+                )
+                for i, n in enumerate(histogram):
+                    merged_histogram[i] += n
+        return merged
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the snapshot as JSON, with histograms stored sparsely as pairs of bucket index and count
+
+        Returns:
+            Dict[str, Any]: The versioned snapshot
+        """
+        functions = {}
+        for name in dict.fromkeys([*self.counts, *self.histograms]):
+            function = {}
+            if name in self.counts:
+                function["count"] = self.counts[name]
+            if name in self.histograms:
+                function["timed_calls"] = self.timed_calls[name]
+                function["total_time"] = self.total_times[name]
+                function["histogram"] = [
+                    [i, n] for i, n in enumerate(self.histograms[name]) if n
+                ]
+            functions[name] = function
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "timestamp": self.timestamp,
+            "metadata": self.metadata,
+            "buckets": list(self.buckets[:-1]),
+            "functions": functions,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExecutionSnapshot":
+        """Create a snapshot from the JSON produced by `to_dict`
+
+        Args:
+            data (Dict[str, Any]): The versioned snapshot
+
+        Raises:
+            ValueError: If the data is not a snapshot or was written by a newer version
+
+        Returns:
+            ExecutionSnapshot: The snapshot
+        """
+        if data.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError("Not an execution snapshot")
+        if data.get("version", 0) > SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Snapshot version {data['version']} is newer than the supported version {SNAPSHOT_VERSION}"
+            )
+        snapshot = cls(buckets=data["buckets"], metadata=data["metadata"])
+        snapshot.timestamp = data["timestamp"]
+        for name, function in data["functions"].items():
+            if "count" in function:
+                snapshot.counts[name] = function["count"]
+            if "histogram" in function:
+                histogram = [0] * len(snapshot.buckets)
+                for i, n in function["histogram"]:
+                    histogram[i] = n
+                snapshot.histograms[name] = histogram
+                snapshot.timed_calls[name] = function["timed_calls"]
+                snapshot.total_times[name] = function["total_time"]
+        return snapshot
+
+    def save(self, path: str) -> None:
+        """Write the snapshot to a JSON file, compressed with gzip if the path ends in .gz
+
+        Args:
+            path (str): The path to write the snapshot to
+        """
+        data = json.dumps(self.to_dict(), separators=(",", ":"))
+        if path.endswith(".gz"):
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                f.write(data)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+
+    def __repr__(self) -> str:
+        return f"ExecutionSnapshot(timestamp={self.timestamp}, functions={len(self.counts.keys() | self.histograms.keys())}, metadata={self.metadata})"
+
+
+def take_execution_snapshot(
+    call_counter: Optional[CallCounter] = None,
+    execution_timer: Optional[ExecutionTimer] = None,
+    buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> ExecutionSnapshot:
+    """Record the call counts and execution time histograms of a run
+
+    Args:
+        call_counter (Optional[CallCounter], optional): The counts to record. Defaults to None.
+        execution_timer (Optional[ExecutionTimer], optional): The times to record. Defaults to None.
+        buckets (Sequence[float], optional): Upper bounds in seconds of the histogram buckets. Defaults to DEFAULT_LATENCY_BUCKETS.
+        metadata (Optional[Dict[str, Any]], optional): JSON serialisable information about the run. Defaults to None.
+
+    Returns:
+        ExecutionSnapshot: The snapshot
+
+    Examples:
+        >>> introspector = Introspector()
+        >>> run_workload()
+        >>> snapshot = take_execution_snapshot(introspector.call_counter, introspector.execution_timer, metadata={"commit": "abc123"})
+        >>> snapshot.save("current.json.gz")
+        >>> baseline = load_execution_snapshot("baseline.json.gz")
+        >>> compare_execution_snapshots(baseline, snapshot).pretty_print()
+    """
+    return ExecutionSnapshot(call_counter, execution_timer, buckets, metadata)
+
+
+def load_execution_snapshot(path: str) -> ExecutionSnapshot:
+    """Read a snapshot written by `ExecutionSnapshot.save`
+
+    Args:
+        path (str): The path of the snapshot, read with gzip if it ends in .gz
+
+    Returns:
+        ExecutionSnapshot: The snapshot
+    """
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return ExecutionSnapshot.from_dict(json.load(f))
+    with open(path, encoding="utf-8") as f:
+        return ExecutionSnapshot.from_dict(json.load(f))
+
+
+def merge_execution_snapshots(*snapshots: ExecutionSnapshot) -> ExecutionSnapshot:
+    """Add up the counts and times of snapshots from many runs or hosts
+
+    Args:
+        *snapshots (ExecutionSnapshot): The snapshots to merge, at least one
+
+    Returns:
+        ExecutionSnapshot: A new snapshot with the totals of all of them
+    """
+    merged = snapshots[0]
+    for snapshot in snapshots[1:]:
+        merged = merged.merge(snapshot)
+    return merged
+
+
+def _mann_whitney(
+    baseline: List[int], current: List[int]
+) -> Tuple[float, float, float]:
+    """A Mann-Whitney U test over two histograms, treating calls in the same bucket as ties
+
+    Returns:
+        Tuple[float, float, float]: The one sided p-values that the current calls are slower and faster, and the probability that a current call is slower than a baseline call
+    """
+    n_baseline = sum(baseline)
+    n_current = sum(current)
+    n = n_baseline + n_current
+    rank_sum = 0.0
+    ties = 0
+    ranked = 0
+    for baseline_count, current_count in zip(baseline, current):
+        tied = baseline_count + current_count
+        if tied:
+            rank_sum += current_count * (ranked + (tied + 1) / 2)
+            ties += tied**3 - tied
+            ranked += tied
+
+    u = rank_sum - n_current * (n_current + 1) / 2
+    pairs = n_baseline * n_current
+    probability_slower = u / pairs
+    variance = pairs / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0, 1.0, probability_slower
+    # with a continuity correction
+    z_slower = (u - pairs / 2 - 0.5) / math.sqrt(variance)
+    z_faster = (u - pairs / 2 + 0.5) / math.sqrt(variance)
+    return (
+        0.5 * math.erfc(z_slower / math.sqrt(2)),
+        0.5 * math.erfc(-z_faster / math.sqrt(2)),
+        probability_slower,
+    )
+
+
+def _relative_change(
+    baseline_average_time: float, current_average_time: float
+) -> float:
+    # times can be 0 when the introspection overhead is subtracted, any slowdown from 0 is infinite
+    if baseline_average_time:
+        return current_average_time / baseline_average_time - 1
+    return math.inf if current_average_time else 0.0
+
+
+class LatencyChange:
+    """The change in the execution times of a single function between two snapshots
+
+    `status` is "regression" or "improvement" when the change is statistically significant and large
+    enough, "new" or "removed" when the function was only timed in one snapshot, and otherwise "unchanged".
+    `change` is the relative change in average time, infinite if the baseline average was 0, and 0 for
+    new functions.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        baseline_calls: int,
+        current_calls: int,
+        baseline_average_time: float,
+        current_average_time: float,
+        p_value: float,
+        probability_slower: float,
+        status: str,
+    ):
+        self.name = name
+        self.baseline_calls = baseline_calls
+        self.current_calls = current_calls
+        self.baseline_average_time = baseline_average_time
+        self.current_average_time = current_average_time
+        self.change = (
+            _relative_change(baseline_average_time, current_average_time)
+            if status != "new"
+            else 0.0
+        )
+        self.p_value = p_value
+        self.probability_slower = probability_slower
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "baseline_calls": self.baseline_calls,
+            "current_calls": self.current_calls,
+            "baseline_average_time": self.baseline_average_time,
+            "current_average_time": self.current_average_time,
+            "change": self.change,
+            "p_value": self.p_value,
+            "probability_slower": self.probability_slower,
+            "status": self.status,
+        }
+
+    def __repr__(self) -> str:
+        return f"LatencyChange(name={self.name}, change={self.change:+.2%}, p_value={self.p_value:.3g}, status={self.status})"
+
+
+class ExecutionDiff:
+    """The changes in execution time of every function between two snapshots, largest slowdown first
+
+    Each function timed in both snapshots is tested with a one sided Mann-Whitney U test over its
+    histograms. A change is only reported as a regression or improvement if it is significant at `alpha`
+    and the average time changed by at least `min_change`, so tiny but significant changes in large runs
+    are not flagged.
+
+    Args:
+        baseline (ExecutionSnapshot): The snapshot to compare against
+        current (ExecutionSnapshot): The snapshot being checked
+        alpha (float, optional): The significance level. Defaults to 0.01.
+        min_change (float, optional): The smallest relative change in average time to report. Defaults to 0.05.
+
+    Raises:
+        ValueError: If the snapshots use different histogram buckets
+    """
+
+    def __init__(
+        self,
+        baseline: ExecutionSnapshot,
+        current: ExecutionSnapshot,
+        alpha: float = 0.01,
+        min_change: float = 0.05,
+    ):
+        if baseline.buckets != current.buckets:
+            raise ValueError(
+                "Cannot compare snapshots with different histogram buckets"
+            )
+        self.baseline = baseline
+        self.current = current
+        self.alpha = alpha
+        self.min_change = min_change
+
+        changes = []
+        for name in dict.fromkeys([*baseline.histograms, *current.histograms]):
+            baseline_average_time = baseline.average_time(name)
+            current_average_time = current.average_time(name)
+            if name not in current.histograms:
+                p_value, probability_slower, status = 1.0, 0.0, "removed"
+            elif name not in baseline.histograms:
+                p_value, probability_slower, status = 1.0, 0.0, "new"
+            else:
+                p_slower, p_faster, probability_slower = _mann_whitney(
+                    baseline.histograms[name], current.histograms[name]
+                )
+                ratio = _relative_change(baseline_average_time, current_average_time)
+                if p_slower < alpha and ratio >= min_change:
+                    p_value, status = p_slower, "regression"
+                elif p_faster < alpha and ratio <= -min_change:
+                    p_value, status = p_faster, "improvement"
+                else:
+                    p_value, status = min(p_slower, p_faster), "unchanged"
+            changes.append(
+                LatencyChange(
+                    name,
+                    baseline.timed_calls.get(name, 0),
+                    current.timed_calls.get(name, 0),
+                    baseline_average_time,
+                    current_average_time,
+                    p_value,
+                    probability_slower,
+                    status,
+                )
+            )
+        self.changes: List[LatencyChange] = sorted(
+            changes, key=lambda c: c.change, reverse=True
+        )
+
+    def regressions(self) -> List[LatencyChange]:
+        """Get the functions that got significantly slower
+
+        Returns:
+            List[LatencyChange]: The regressions, largest first
+        """
+        return [c for c in self.changes if c.status == "regression"]
+
+    def improvements(self) -> List[LatencyChange]:
+        """Get the functions that got significantly faster
+
+        Returns:
+            List[LatencyChange]: The improvements, largest first
+        """
+        return [c for c in reversed(self.changes) if c.status == "improvement"]
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Get the changes as JSON
+
+        Returns:
+            List[Dict[str, Any]]: The changes, largest slowdown first
+        """
+        return [c.to_dict() for c in self.changes]
+
+    def get_report(self) -> Report:
+        """Get a report of the changes, largest slowdown first, with the columns name, baseline_average_time,
+        current_average_time, change, p_value and status
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (
+                Column("name", "Function"),
+                Column("baseline_average_time", "Baseline Avg (s)", ".6f"),
+                Column("current_average_time", "Current Avg (s)", ".6f"),
+                Column("change", "Change", "+.2%"),
+                Column("p_value", "p-value", ".3g"),
+                Column("status", "Status"),
+            ),
+            [
+                (
+                    c.name,
+                    c.baseline_average_time,
+                    c.current_average_time,
+                    c.change,
+                    c.p_value,
+                    c.status,
+                )
+                for c in self.changes
+            ],
+        )
+
+    def pretty_print(
+        self,
+        n: Optional[int] = None,
+        sort_by: Optional[str] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the changes in a nice table, largest slowdown first
+
+        Args:
+            n (Optional[int], optional): The number of functions to print. Defaults to None for all.
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the largest slowdown first.
+            pattern (Optional[str], optional): Only print functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=n, pattern=pattern
+        )
+
+
+def compare_execution_snapshots(
+    baseline: ExecutionSnapshot,
+    current: ExecutionSnapshot,
+    alpha: float = 0.01,
+    min_change: float = 0.05,
+) -> ExecutionDiff:
+    """Compare the execution times of two snapshots and flag significant regressions
+
+    Args:
+        baseline (ExecutionSnapshot): The snapshot to compare against
+        current (ExecutionSnapshot): The snapshot being checked
+        alpha (float, optional): The significance level. Defaults to 0.01.
+        min_change (float, optional): The smallest relative change in average time to report. Defaults to 0.05.
+
+    Returns:
+        ExecutionDiff: The change of every function, largest slowdown first
+    """
+    return ExecutionDiff(baseline, current, alpha=alpha, min_change=min_change)
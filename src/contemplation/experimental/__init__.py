@@ -1,6 +1,8 @@
 from .type_introspections import (
     type_enforced,
     introspect_type,
+    Recursive,
+    SchemaAccumulator,
     _shallow_is_of_type,
     _deep_is_of_type,
 )
@@ -8,6 +10,8 @@ from .type_introspections import (
 __all__ = [
     "type_enforced",
     "introspect_type",
+    "Recursive",
+    "SchemaAccumulator",
     "_shallow_is_of_type",
     "_deep_is_of_type",
 ]
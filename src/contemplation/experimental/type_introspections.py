@@ -1,15 +1,24 @@
+import array
+import collections.abc
+import dataclasses
 import inspect
-
+import itertools
+import random
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from functools import wraps
 from typing import (
     Callable,
     Any,
     get_args,
     get_origin,
     Iterable,
+    Iterator,
     Generator,
     Union,
     Dict,
     List,
+    Optional,
     Tuple,
     Set,
     FrozenSet,
@@ -22,11 +31,185 @@ def _make_union(types: List[type]):
     return Union[tuple(types)]
 
 
-def introspect_type(obj: Any) -> Any:
+_INTROSPECTED_CONTAINERS = {
+    list: List,
+    tuple: Tuple,
+    set: Set,
+    frozenset: FrozenSet,
+}
+_CONTAINER_TYPES = (dict, list, tuple, set, frozenset)
+# containers at most this long are cheaper to handle one element at a time than in bulk
+_SMALL_CHECK_TYPES = (list, tuple)
+_SMALL_SIZE = 4
+
+
+class Recursive:
+    """Marks where `introspect_type` found an object that contains itself
+
+    Examples:
+        >>> a = [1]
+        >>> a.append(a)
+        >>> introspect_type(a)
+        typing.List[typing.Union[int, contemplation.experimental.type_introspections.Recursive]]
+    """
+
+
+class _IntrospectionFrame:
+    """A container part way through being introspected, waiting on the containers among its elements"""
+
+    __slots__ = ("obj", "depth", "annotation", "groups", "pending", "target")
+
+
+class _TypeIntrospector:
+    """Builds type annotations for objects without recursion
+
+    Types are tracked by id so that sets of them can be built and compared without hashing nested
+    annotations, and each distinct annotation is only built once.
+
+    Args:
+        max_depth (Optional[int]): The number of levels of nesting to introspect
+        max_elements (Optional[int]): The maximum number of elements of each container to introspect
+    """
+
+    def __init__(self, max_depth: Optional[int], max_elements: Optional[int]):
+        self.max_depth = max_depth
+        self.max_elements = max_elements
+        self.types: Dict[int, Any] = {id(Recursive): Recursive, id(Any): Any}
+        self.plain_types: Set[type] = set()
+        self.container_types: Set[type] = set()
+        self.annotations: Dict[tuple, int] = {}
+
+    def _classify(self, types: set) -> None:
+        for t in types - self.plain_types - self.container_types:
+            if issubclass(t, _CONTAINER_TYPES):
+                self.container_types.add(t)
+            else:
+                self.plain_types.add(t)
+                self.types[id(t)] = t
+
+    def _visit(self, obj: Any, depth: int) -> _IntrospectionFrame:
+        frame = _IntrospectionFrame()
+        frame.obj = obj
+        frame.depth = depth
+        frame.target = None
+
+        if isinstance(obj, dict):
+            frame.annotation = Dict
+            elements = (obj.keys(), obj.values())
+        else:
+            frame.annotation = _INTROSPECTED_CONTAINERS.get(type(obj))
+            if frame.annotation is None:
+                frame.annotation = next(
+                    annotation
+                    for container_type, annotation in _INTROSPECTED_CONTAINERS.items()
+                    if isinstance(obj, container_type)
+                )
+            elements = (obj,)
+        if self.max_elements is not None:
+            elements = tuple(
+                list(itertools.islice(group, self.max_elements)) for group in elements
+            )
+
+        frame.groups = []
+        pending = []
+        for group in elements:
+            types = set(map(type, group))
+            containers = None
+            if not types <= self.plain_types:
+                self._classify(types)
+                if not types.isdisjoint(self.container_types):
+                    types -= self.container_types
+                    containers = [e for e in group if isinstance(e, _CONTAINER_TYPES)]
+            type_ids = set(map(id, types))
+            frame.groups.append(type_ids)
+            if containers:
+                pending.append(zip(itertools.repeat(type_ids), containers))
+
+        if not pending:
+            frame.pending = None
+        elif len(pending) == 1:
+            frame.pending = pending[0]
+        else:
+            frame.pending = itertools.chain.from_iterable(pending)
+        return frame
+
+    def _join(self, type_ids: set) -> Any:
+        if not type_ids:
+            return Any
+        if len(type_ids) == 1:
+            return self.types[next(iter(type_ids))]
+        return _make_union([self.types[type_id] for type_id in type_ids])
+
+    def _finish(self, frame: _IntrospectionFrame) -> int:
+        key = (frame.annotation, *map(frozenset, frame.groups))
+        annotation_id = self.annotations.get(key)
+        if annotation_id is None:
+            try:
+                annotation = frame.annotation[tuple(map(self._join, frame.groups))]
+            except RecursionError:
+                # typing hashes annotations recursively so it cannot build arbitrarily deep ones
+                annotation = type(frame.obj)
+            annotation_id = id(annotation)
+            self.types[annotation_id] = annotation
+            self.annotations[key] = annotation_id
+        return annotation_id
+
+    def introspect(self, obj: Any) -> Any:
+        if not isinstance(obj, _CONTAINER_TYPES):
+            return type(obj)
+        if self.max_depth == 0:
+            return Any
+
+        max_depth = self.max_depth
+        results: Dict[int, int] = {}
+        in_progress = {id(obj)}
+        stack = [self._visit(obj, 1)]
+
+        while True:
+            frame = stack[-1]
+            for type_ids, element in frame.pending or ():
+                key = id(element)
+                if key in results:
+                    type_ids.add(results[key])
+                elif key in in_progress:
+                    type_ids.add(id(Recursive))
+                elif max_depth is not None and frame.depth >= max_depth:
+                    # marks where the nesting was cut off
+                    type_ids.add(id(Any))
+                else:
+                    child = self._visit(element, frame.depth + 1)
+                    if child.pending is None:
+                        results[key] = self._finish(child)
+                        type_ids.add(results[key])
+                    else:
+                        frame.target = type_ids
+                        in_progress.add(key)
+                        stack.append(child)
+                        break
+            else:
+                stack.pop()
+                in_progress.discard(id(frame.obj))
+                result = self._finish(frame)
+                if not stack:
+                    return self.types[result]
+                results[id(frame.obj)] = result
+                stack[-1].target.add(result)
+
+
+def introspect_type(
+    obj: Any, max_depth: Optional[int] = None, max_elements: Optional[int] = None
+) -> Any:
     """Get the type of an object, including the types of its members
 
+    Nested containers are walked with an explicit stack so arbitrarily deep objects do not hit the
+    recursion limit, although annotations too deep for `typing` to build are given their plain type. Containers
+    that appear more than once are only introspected once, and a container that contains itself is marked with
+    `Recursive`. Empty containers have elements of type `Any`, as do containers cut off by `max_depth`.
+
     Args:
         obj (Any): The object to get the type annotation of
+        max_depth (Optional[int], optional): The number of levels of nesting to introspect, deeper containers are given the type `Any`. Defaults to None for no limit.
+        max_elements (Optional[int], optional): The maximum number of elements of each container to introspect. Defaults to None for all of them.
 
     Returns:
         Any: The type annotation of the object
@@ -36,49 +219,300 @@ def introspect_type(obj: Any) -> Any:
         typing.Dict[str, int]
         >>> introspect_type([{"a": {1,2,3}}, {"b": {4,5,6}}])
         typing.List[typing.Dict[str, typing.Set[int]]]
+        >>> introspect_type([[[1]]], max_depth=2)
+        typing.List[typing.List[typing.Any]]
     """
-    if isinstance(obj, dict):
-        key_types = {introspect_type(key) for key in obj.keys()}
-        value_types = {introspect_type(value) for value in obj.values()}
-        key_type = key_types.pop() if len(key_types) == 1 else _make_union(key_types)
-        value_type = (
-            value_types.pop() if len(value_types) == 1 else _make_union(value_types)
-        )
-        return Dict[key_type, value_type]
-    elif isinstance(obj, list):
-        element_types = {introspect_type(element) for element in obj}
-        element_type = (
-            element_types.pop()
-            if len(element_types) == 1
-            else _make_union(element_types)
-        )
-        return List[element_type]
-    elif isinstance(obj, tuple):
-        element_types = {introspect_type(element) for element in obj}
-        element_type = (
-            element_types.pop()
-            if len(element_types) == 1
-            else _make_union(element_types)
-        )
-        return Tuple[element_type]
-    elif isinstance(obj, set):
-        element_types = {introspect_type(element) for element in obj}
-        element_type = (
-            element_types.pop()
-            if len(element_types) == 1
-            else _make_union(element_types)
-        )
-        return Set[element_type]
-    elif isinstance(obj, frozenset):
-        element_types = {introspect_type(element) for element in obj}
-        element_type = (
-            element_types.pop()
-            if len(element_types) == 1
-            else _make_union(element_types)
-        )
-        return FrozenSet[element_type]
+    return _TypeIntrospector(max_depth, max_elements).introspect(obj)
+
+
+def _union_of(types: List[Any]) -> Any:
+    types = list(dict.fromkeys(types))
+    if not types:
+        return Any
+    return types[0] if len(types) == 1 else _make_union(types)
+
+
+class _SchemaNode:
+    """The merged types of every value seen at one position of a schema
+
+    Args:
+        max_fields (int): The number of distinct string keys a dictionary position can have before it is treated as a mapping
+    """
+
+    __slots__ = (
+        "count",
+        "types",
+        "container_counts",
+        "elements",
+        "dict_count",
+        "fields",
+        "keys",
+        "values",
+        "max_fields",
+    )
+
+    def __init__(self, max_fields: int):
+        self.count = 0
+        self.types: Dict[type, int] = {}
+        self.container_counts: Dict[type, int] = {}
+        self.elements: Dict[type, _SchemaNode] = {}
+        self.dict_count = 0
+        self.fields: Optional[Dict[str, _SchemaNode]] = {}
+        self.keys: Optional[_SchemaNode] = None
+        self.values: Optional[_SchemaNode] = None
+        self.max_fields = max_fields
+
+    def _child(self, children: Dict[Any, "_SchemaNode"], key: Any) -> "_SchemaNode":
+        child = children.get(key)
+        if child is None:
+            child = children[key] = _SchemaNode(self.max_fields)
+        return child
+
+    def _merge_fields(self, fields: Dict[str, "_SchemaNode"]) -> None:
+        for field in fields.values():
+            self.keys.count += field.count
+            self.keys.types[str] = self.keys.types.get(str, 0) + field.count
+            self.values.merge(field)
+
+    def _to_mapping(self) -> None:
+        self.keys = _SchemaNode(self.max_fields)
+        self.values = _SchemaNode(self.max_fields)
+        self._merge_fields(self.fields)
+        self.fields = None
+
+    def merge(self, other: "_SchemaNode") -> None:
+        self.count += other.count
+        for t, count in other.types.items():
+            self.types[t] = self.types.get(t, 0) + count
+        for t, count in other.container_counts.items():
+            self.container_counts[t] = self.container_counts.get(t, 0) + count
+        for t, elements in other.elements.items():
+            self._child(self.elements, t).merge(elements)
+
+        self.dict_count += other.dict_count
+        if other.fields is not None and self.fields is not None:
+            for key, field in other.fields.items():
+                self._child(self.fields, key).merge(field)
+            if len(self.fields) > self.max_fields:
+                self._to_mapping()
+        elif other.fields is not None:
+            self._merge_fields(other.fields)
+        else:
+            if self.fields is not None:
+                self._to_mapping()
+            self.keys.merge(other.keys)
+            self.values.merge(other.values)
+
+    def get_type(self) -> Any:
+        members = list(self.types) + [
+            _INTROSPECTED_CONTAINERS[t][self.elements[t].get_type()]
+            for t in self.container_counts
+        ]
+        if self.dict_count and self.fields is not None:
+            value_types = [field.get_type() for field in self.fields.values()]
+            members.append(Dict[str if self.fields else Any, _union_of(value_types)])
+        elif self.dict_count:
+            members.append(Dict[self.keys.get_type(), self.values.get_type()])
+        return _union_of(members)
+
+    def to_dict(self) -> Dict[str, Any]:
+        schema: Dict[str, Any] = {
+            "count": self.count,
+            "types": {t.__qualname__: count for t, count in self.types.items()},
+        }
+        for t, count in self.container_counts.items():
+            schema[t.__name__] = {
+                "count": count,
+                "elements": self.elements[t].to_dict(),
+            }
+        if self.dict_count:
+            if self.fields is not None:
+                schema["dict"] = {
+                    "count": self.dict_count,
+                    "fields": {
+                        key: {
+                            **field.to_dict(),
+                            "optional": field.count < self.dict_count,
+                        }
+                        for key, field in self.fields.items()
+                    },
+                }
+            else:
+                schema["dict"] = {
+                    "count": self.dict_count,
+                    "keys": self.keys.to_dict(),
+                    "values": self.values.to_dict(),
+                }
+        return schema
+
+
+class SchemaAccumulator:
+    """Infers the combined schema of a stream of records, one record at a time
+
+    The types seen at each position are merged as records are added, so memory grows with the size of
+    the schema rather than the number of records. Dictionaries with string keys are tracked field by
+    field so optional keys can be reported, until they have more than `max_fields` distinct keys at
+    which point they are treated as a mapping from key type to value type. Accumulators can be pickled
+    and merged, so a large dataset can be split across a process pool and the partial schemas combined.
+
+    A container shared by several records of the same `add` or `update` batch, such as a list referenced
+    by every record, has its elements counted once for the batch rather than once per record. Records
+    are not kept between batches, so the same data split into different batches gives the same types
+    but may give different counts.
+
+    Args:
+        max_depth (int, optional): The number of levels of nesting to infer, deeper containers are recorded by their plain type. Defaults to 64.
+        max_fields (int, optional): The number of distinct string keys a dictionary can have before it is treated as a mapping. Defaults to 1000.
+
+    Examples:
+        >>> schema = SchemaAccumulator()
+        >>> schema.update([{"a": 1, "b": [1.0]}, {"a": "x"}])
+        >>> schema.get_type()
+        typing.Dict[str, typing.Union[int, str, typing.List[float]]]
+        >>> schema.get_schema()["dict"]["fields"]["b"]["optional"]
+        True
+    """
+
+    def __init__(self, max_depth: int = 64, max_fields: int = 1000):
+        self.max_depth = max_depth
+        self.max_fields = max_fields
+        self.root = _SchemaNode(max_fields)
+
+    @property
+    def count(self) -> int:
+        """The number of records added"""
+        return self.root.count
+
+    def add(self, record: Any) -> None:
+        """Add a record to the schema
+
+        Args:
+            record (Any): The record to add
+        """
+        self._add_records([record])
+
+    def update(self, records: Iterable[Any], batch_size: int = 1000) -> None:
+        """Add many records to the schema, e.g. from a generator
+
+        Records are added in batches so that the types of the values at each position are counted in
+        bulk across the batch, only one batch is held in memory at a time. Containers shared between
+        the records of a batch are only counted once, so counts can depend on `batch_size`.
+
+        Args:
+            records (Iterable[Any]): The records to add
+            batch_size (int, optional): The number of records to add at once. Defaults to 1000.
+        """
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+            self._add_records(batch)
+
+    def _add_records(self, records: List[Any]) -> None:
+        # walked one level at a time with the values at each position grouped together,
+        # containers that appear more than once at the same position are only walked once
+        seen: Dict[_SchemaNode, set] = defaultdict(set)
+        level = [(self.root, records)]
+        for depth in range(self.max_depth + 1):
+            if not level:
+                break
+            next_level = []
+            for node, values in level:
+                node.count += len(values)
+                has_containers = False
+                for t, count in Counter(map(type, values)).items():
+                    if issubclass(t, _CONTAINER_TYPES) and depth < self.max_depth:
+                        has_containers = True
+                    else:
+                        node.types[t] = node.types.get(t, 0) + count
+                if has_containers:
+                    next_level += self._group_containers(node, values, seen[node])
+            level = next_level
+
+    def _group_containers(
+        self, node: _SchemaNode, values: List[Any], seen: set
+    ) -> List[Tuple[_SchemaNode, List[Any]]]:
+        groups: Dict[type, List[Any]] = defaultdict(list)
+        for value in values:
+            if isinstance(value, _CONTAINER_TYPES) and id(value) not in seen:
+                seen.add(id(value))
+                kind = type(value)
+                if kind not in _INTROSPECTED_CONTAINERS and kind is not dict:
+                    kind = next(t for t in _CONTAINER_TYPES if isinstance(value, t))
+                groups[kind].append(value)
 
-    return type(obj)
+        children = []
+        for kind, group in groups.items():
+            if kind is not dict:
+                node.container_counts[kind] = node.container_counts.get(kind, 0) + len(
+                    group
+                )
+                children.append(
+                    (
+                        node._child(node.elements, kind),
+                        list(itertools.chain.from_iterable(group)),
+                    )
+                )
+                continue
+
+            node.dict_count += len(group)
+            if node.fields is not None:
+                fields: Dict[Any, List[Any]] = defaultdict(list)
+                for value in group:
+                    for key, field in value.items():
+                        fields[key].append(field)
+                if len(fields.keys() | node.fields.keys()) <= self.max_fields and all(
+                    type(key) is str for key in fields
+                ):
+                    for key, field_values in fields.items():
+                        children.append((node._child(node.fields, key), field_values))
+                    continue
+                node._to_mapping()
+
+            children.append((node.keys, list(itertools.chain.from_iterable(group))))
+            children.append(
+                (
+                    node.values,
+                    list(itertools.chain.from_iterable(v.values() for v in group)),
+                )
+            )
+        return children
+
+    def merge(self, other: "SchemaAccumulator") -> "SchemaAccumulator":
+        """Merge the records of another accumulator into this one
+
+        Args:
+            other (SchemaAccumulator): The accumulator to merge in, e.g. built by another process
+
+        Returns:
+            SchemaAccumulator: This accumulator
+        """
+        self.root.merge(other.root)
+        return self
+
+    def get_type(self) -> Any:
+        """Get the merged type annotation of all the records added
+
+        Returns:
+            Any: The type annotation, `Any` if no records have been added
+        """
+        return self.root.get_type()
+
+    def get_schema(self) -> Dict[str, Any]:
+        """Get the merged schema as a dictionary that can be serialised to JSON
+
+        Each position has the number of values seen there, the counts of each plain type, and for
+        containers the schema of their elements. Dictionary fields are marked optional when they were
+        missing from some of the dictionaries seen at that position.
+
+        Returns:
+            Dict[str, Any]: The schema
+        """
+        return self.root.to_dict()
+
+    def __repr__(self) -> str:
+        return f"SchemaAccumulator(count={self.count}, type={self.get_type()})"
 
 
 def _shallow_is_of_type(parameter: object, parameter_type: type) -> bool:
@@ -125,66 +559,657 @@ def _shallow_is_of_type(parameter: object, parameter_type: type) -> bool:
     return isinstance(parameter, parameter_type)
 
 
-def _deep_is_of_type(parameter: object, parameter_type: type) -> bool:
-    """Check if an object is of a given type, checking the types of its members
+def _always_true(parameter: object) -> bool:
+    return True
+
+
+def _always_false(parameter: object) -> bool:
+    return False
+
+
+def _make_isinstance_checker(cls: Any) -> Callable[[object], bool]:
+    def check(parameter: object) -> bool:
+        return isinstance(parameter, cls)
+
+    # lets containers of this type check all their elements in bulk
+    check.plain_type = cls
+    return check
+
+
+def _compile_elements_checker(
+    element_checker: Callable[[object], bool],
+) -> Callable[[Iterable], bool]:
+    """Compile a function that checks every element of a container, in bulk when the element type is not generic
 
     Args:
-        parameter (object): The parameter to check the type of
-        parameter_type (type): The type that is annotated for the parameter
+        element_checker (Callable[[object], bool]): The compiled checker for the element type
 
     Returns:
-        bool: Whether the parameter is of the given type
+        Callable[[Iterable], bool]: A function that returns whether all elements of a container match
     """
-    from typing import Union
+    if element_checker is _always_true:
+        return _always_true
 
-    if parameter_type is Any:
+    plain_type = getattr(element_checker, "plain_type", None)
+    if plain_type is None:
+
+        def check_each(elements: Iterable) -> bool:
+            return all(map(element_checker, elements))
+
+        return check_each
+
+    # types already known to match, so most containers are checked without any Python level loop
+    matching_types = set()
+
+    def check_bulk(elements: Iterable) -> bool:
+        # small containers are cheaper to check directly than to collect types from
+        if type(elements) in _SMALL_CHECK_TYPES and len(elements) <= _SMALL_SIZE:
+            for element in elements:
+                if not isinstance(element, plain_type):
+                    return False
+            return True
+        # collecting the distinct types iterates in C
+        element_types = set(map(type, elements))
+        if element_types <= matching_types:
+            return True
+        for element_type in element_types - matching_types:
+            if not issubclass(element_type, plain_type):
+                return False
+            matching_types.add(element_type)
         return True
 
+    return check_bulk
+
+
+_ARRAY_TYPECODE_TYPES = {
+    **{typecode: int for typecode in "bBhHiIlLqQ"},
+    "f": float,
+    "d": float,
+    "u": str,
+    "w": str,
+}
+
+
+def _known_element_type(parameter: object) -> Optional[type]:
+    """Get the element type of containers that can only hold one type, without iterating them
+
+    One dimensional NumPy arrays are recognised by their dtype without importing NumPy. Their elements
+    are NumPy scalars, so as when iterating them, an array of `int64` is not an `Iterable[int]` while an
+    array of `float64`, a subclass of `float`, is an `Iterable[float]`.
+
+    Args:
+        parameter (object): The container
+
+    Returns:
+        Optional[type]: The type of every element, or None if it can't be known without iterating
+    """
+    if isinstance(parameter, (bytes, bytearray, range)):
+        return int
+    if isinstance(parameter, array.array):
+        return _ARRAY_TYPECODE_TYPES.get(parameter.typecode)
+    if type(parameter).__module__ == "numpy" and getattr(parameter, "ndim", None) == 1:
+        # the elements of object arrays can be anything
+        if parameter.dtype.kind != "O":
+            return parameter.dtype.type
+    return None
+
+
+def _compile_deep_checker(parameter_type: Any) -> Callable[[object], bool]:
+    """Compile a type annotation into a function that checks an object against it, including its members
+
+    Args:
+        parameter_type (Any): The type annotation to compile
+
+    Returns:
+        Callable[[object], bool]: A function that returns whether an object is of the given type
+    """
+    if parameter_type is Any:
+        return _always_true
+
+    # bare special forms such as Union or Optional have no arguments to match against
     if isinstance(parameter_type, type(Union)):
-        return any(_deep_is_of_type(parameter, t) for t in get_args(parameter_type))
+        return _always_false
 
     origin = get_origin(parameter_type)
     if origin is None:
-        return isinstance(parameter, parameter_type)
+        if parameter_type is None:
+            parameter_type = type(None)
+        return _make_isinstance_checker(parameter_type)
 
     args = get_args(parameter_type)
 
-    if args:
-        if origin is dict:
-            key_type, value_type = args
-            return all(
-                _deep_is_of_type(k, key_type) and _deep_is_of_type(v, value_type)
-                for k, v in parameter.items()
+    if origin is Union:
+        # Any is a class on Python 3.11+, but cannot be used with isinstance
+        if any(arg is Any for arg in args):
+            return _always_true
+        if all(get_origin(arg) is None and isinstance(arg, type) for arg in args):
+            return _make_isinstance_checker(args)
+        checkers = tuple(_get_deep_checker(arg) for arg in args)
+
+        def check_union(parameter: object) -> bool:
+            return any(checker(parameter) for checker in checkers)
+
+        return check_union
+
+    if origin is collections.abc.Generator:
+
+        def check_generator(parameter: object) -> bool:
+            return hasattr(parameter, "next") or hasattr(parameter, "__next__")
+
+        return check_generator
+
+    if origin is collections.abc.Callable:
+
+        def check_callable(parameter: object) -> bool:
+            return hasattr(parameter, "__call__")
+
+        return check_callable
+
+    if not args or not isinstance(origin, type):
+        return _make_isinstance_checker(
+            origin if isinstance(origin, type) else parameter_type
+        )
+
+    if origin is dict:
+        key_checker = _get_deep_checker(args[0])
+        value_checker = _get_deep_checker(args[1])
+
+        keys_checker = _compile_elements_checker(key_checker)
+        values_checker = _compile_elements_checker(value_checker)
+
+        def check_dict(parameter: object) -> bool:
+            return (
+                isinstance(parameter, dict)
+                and keys_checker(parameter.keys())
+                and values_checker(parameter.values())
             )
-        elif origin is Generator:
-            if not hasattr(parameter, "next") and not hasattr(parameter, "__next__"):
-                return False
-            return True
-        elif origin is Callable:
-            if not hasattr(parameter, "__call__"):
-                return False
-            return True
-        elif origin in {list, tuple, set, frozenset}:
-            (element_type,) = args
-            return all(_deep_is_of_type(item, element_type) for item in parameter)
-        elif origin is Iterable:
+
+        return check_dict
+
+    if (
+        origin is tuple
+        and not (len(args) == 2 and args[1] is Ellipsis)
+        and len(args) > 1
+    ):
+        element_checkers = tuple(_get_deep_checker(arg) for arg in args)
+
+        def check_fixed_tuple(parameter: object) -> bool:
             return (
-                all(
-                    _deep_is_of_type(item, get_args(parameter_type)[0])
-                    for item in parameter
+                isinstance(parameter, tuple)
+                and len(parameter) == len(element_checkers)
+                and all(
+                    checker(item) for checker, item in zip(element_checkers, parameter)
                 )
-                if isinstance(parameter, Iterable)
-                else False
             )
 
-    return isinstance(parameter, parameter_type)
+        return check_fixed_tuple
+
+    if origin in _ABSTRACT_COLLECTIONS and len(args) == 1:
+        element_checker = _get_deep_checker(args[0])
+        elements_checker = _compile_elements_checker(element_checker)
+        plain_type = getattr(element_checker, "plain_type", None)
+
+        def check_iterable(parameter: object) -> bool:
+            if not isinstance(parameter, origin):
+                return False
+            # iterating an iterator would consume it, so only its type can be checked
+            if isinstance(parameter, collections.abc.Iterator):
+                return True
+            if plain_type is not None:
+                element_type = _known_element_type(parameter)
+                if element_type is not None:
+                    return issubclass(element_type, plain_type)
+            return elements_checker(parameter)
+
+        return check_iterable
+
+    if origin in {list, tuple, set, frozenset}:
+        # a single argument to Tuple means a tuple of any length, matching introspect_type
+        elements_checker = _compile_elements_checker(_get_deep_checker(args[0]))
+
+        def check_elements(parameter: object) -> bool:
+            return isinstance(parameter, origin) and elements_checker(parameter)
+
+        return check_elements
+
+    return _make_isinstance_checker(origin)
+
+
+_ABSTRACT_COLLECTIONS = {
+    collections.abc.Iterable,
+    collections.abc.Collection,
+    collections.abc.Sequence,
+    collections.abc.MutableSequence,
+    collections.abc.Set,
+    collections.abc.MutableSet,
+}
+
+_deep_checker_cache: Dict[Any, Callable[[object], bool]] = {}
+
+
+def _get_deep_checker(parameter_type: Any) -> Callable[[object], bool]:
+    """Get the compiled checker for a type annotation, compiling it on first use
+
+    Args:
+        parameter_type (Any): The type annotation to get the checker for
+
+    Returns:
+        Callable[[object], bool]: A function that returns whether an object is of the given type
+    """
+    try:
+        return _deep_checker_cache[parameter_type]
+    except KeyError:
+        checker = _deep_checker_cache[parameter_type] = _compile_deep_checker(
+            parameter_type
+        )
+        return checker
+    except TypeError:
+        # unhashable annotations can't be cached
+        return _compile_deep_checker(parameter_type)
+
+
+def _deep_is_of_type(parameter: object, parameter_type: type) -> bool:
+    """Check if an object is of a given type, checking the types of its members
+
+    Args:
+        parameter (object): The parameter to check the type of
+        parameter_type (type): The type that is annotated for the parameter
+
+    Returns:
+        bool: Whether the parameter is of the given type
+    """
+    return _get_deep_checker(parameter_type)(parameter)
+
+
+class _CheckBudget:
+    """The number of elements a budgeted check may still inspect across all containers in a call"""
+
+    def __init__(self, max_total_elements: Optional[int] = None):
+        self.remaining = (
+            max_total_elements if max_total_elements is not None else float("inf")
+        )
+        self.violation_type: Optional[type] = None
+
+    def fail(self, parameter: object) -> str:
+        self.violation_type = type(parameter)
+        return ""
+
+
+def _sample_indices(length: int, max_elements: Optional[int], random_sample: bool):
+    if max_elements is None or length <= max_elements:
+        return range(length)
+    if random_sample:
+        return sorted(random.sample(range(length), max_elements))
+    return range(max_elements)
+
+
+def _sample_iterable(
+    iterable: Iterable[Any],
+    length: int,
+    max_elements: Optional[int],
+    random_sample: bool,
+) -> Iterator[Any]:
+    """Sample the elements of a container that cannot be indexed, such as a set or a dictionary's items
+
+    A random sample is reached by skipping over the elements in between with `islice`, so the container is
+    not copied, and elements past the last one that is checked are not iterated.
+    """
+    if not random_sample or max_elements is None or length <= max_elements:
+        return itertools.islice(iterable, max_elements)
+
+    def walk() -> Iterator[Any]:
+        iterator = iter(iterable)
+        position = 0
+        for i in _sample_indices(length, max_elements, True):
+            yield next(itertools.islice(iterator, i - position, None))
+            position = i + 1
+
+    return walk()
+
+
+def _compile_budgeted_checker(
+    parameter_type: Any, max_elements: Optional[int], random_sample: bool
+) -> Callable[[object, _CheckBudget], Optional[str]]:
+    """Compile a type annotation into a function that checks a sample of an object's members against it
+
+    The compiled function returns None if the object matches, or the path to the first mismatch found,
+    which is an empty string if the object itself is of the wrong type.
+
+    Args:
+        parameter_type (Any): The type annotation to compile
+        max_elements (Optional[int]): The maximum number of elements to check in each container
+        random_sample (bool): Whether to check a random sample of elements rather than the first ones
+
+    Returns:
+        Callable[[object, _CheckBudget], Optional[str]]: A function that checks an object against the type
+    """
+    origin = get_origin(parameter_type)
+    args = get_args(parameter_type)
+    is_container = (
+        isinstance(origin, type)
+        and args
+        and origin in {list, tuple, set, frozenset, dict}
+    ) or (origin in _ABSTRACT_COLLECTIONS and len(args) == 1)
+    is_union = origin is Union and any(get_origin(arg) is not None for arg in args)
+
+    if not is_container and not is_union:
+        # anything without members to sample is as cheap to check completely
+        deep_checker = _get_deep_checker(parameter_type)
+
+        def check_whole(parameter: object, budget: _CheckBudget) -> Optional[str]:
+            return None if deep_checker(parameter) else budget.fail(parameter)
+
+        return check_whole
+
+    def get_checker(arg: Any) -> Callable[[object, _CheckBudget], Optional[str]]:
+        return _get_budgeted_checker(arg, max_elements, random_sample)
+
+    if is_union:
+        checkers = tuple(get_checker(arg) for arg in args)
+
+        def check_union(parameter: object, budget: _CheckBudget) -> Optional[str]:
+            # elements inspected by members that do not match are given back, each member is
+            # checked with the budget that was left before the union
+            remaining = budget.remaining
+            violations = []
+            for checker in checkers:
+                budget.remaining = remaining
+                path = checker(parameter, budget)
+                if path is None:
+                    return None
+                violations.append((path, budget.violation_type))
+            # report the deepest mismatch, it is most likely the member that was meant to match
+            path, budget.violation_type = max(violations, key=lambda v: len(v[0]))
+            return path
+
+        return check_union
 
+    if origin is dict:
+        key_checker = get_checker(args[0])
+        value_checker = get_checker(args[1])
 
-def type_enforced(deep: bool = True):
+        def check_dict(parameter: object, budget: _CheckBudget) -> Optional[str]:
+            if not isinstance(parameter, dict):
+                return budget.fail(parameter)
+            items = _sample_iterable(
+                parameter.items(), len(parameter), max_elements, random_sample
+            )
+            for key, value in items:
+                if budget.remaining <= 0:
+                    return None
+                budget.remaining -= 1
+                path = key_checker(key, budget)
+                if path is not None:
+                    return f"<key {key!r}>{path}"
+                path = value_checker(value, budget)
+                if path is not None:
+                    return f"[{key!r}]{path}"
+            return None
+
+        return check_dict
+
+    if origin is tuple and len(args) > 1 and args[1] is not Ellipsis:
+        element_checkers = tuple(get_checker(arg) for arg in args)
+
+        def check_fixed_tuple(parameter: object, budget: _CheckBudget) -> Optional[str]:
+            if not isinstance(parameter, tuple) or len(parameter) != len(
+                element_checkers
+            ):
+                return budget.fail(parameter)
+            for i, (checker, item) in enumerate(zip(element_checkers, parameter)):
+                path = checker(item, budget)
+                if path is not None:
+                    return f"[{i}]{path}"
+            return None
+
+        return check_fixed_tuple
+
+    element_checker = get_checker(args[0])
+
+    if origin in _ABSTRACT_COLLECTIONS:
+        deep_checker = _get_deep_checker(parameter_type)
+
+        def check_abstract(parameter: object, budget: _CheckBudget) -> Optional[str]:
+            if not isinstance(parameter, origin):
+                return budget.fail(parameter)
+            # iterators would be consumed, and arrays and the like are checked by their element type
+            if (
+                isinstance(parameter, collections.abc.Iterator)
+                or _known_element_type(parameter) is not None
+            ):
+                return None if deep_checker(parameter) else budget.fail(parameter)
+            if isinstance(parameter, collections.abc.Sequence):
+                indices = _sample_indices(len(parameter), max_elements, random_sample)
+                items = ((f"[{i}]", parameter[i]) for i in indices)
+            else:
+                sample = _sample_iterable(
+                    parameter, len(parameter), max_elements, random_sample
+                )
+                items = ((f"{{{item!r}}}", item) for item in sample)
+            for location, item in items:
+                if budget.remaining <= 0:
+                    return None
+                budget.remaining -= 1
+                path = element_checker(item, budget)
+                if path is not None:
+                    return f"{location}{path}"
+            return None
+
+        return check_abstract
+
+    if origin in {list, tuple}:
+
+        def check_sequence(parameter: object, budget: _CheckBudget) -> Optional[str]:
+            if not isinstance(parameter, origin):
+                return budget.fail(parameter)
+            for i in _sample_indices(len(parameter), max_elements, random_sample):
+                if budget.remaining <= 0:
+                    return None
+                budget.remaining -= 1
+                path = element_checker(parameter[i], budget)
+                if path is not None:
+                    return f"[{i}]{path}"
+            return None
+
+        return check_sequence
+
+    def check_set(parameter: object, budget: _CheckBudget) -> Optional[str]:
+        if not isinstance(parameter, origin):
+            return budget.fail(parameter)
+        items = _sample_iterable(parameter, len(parameter), max_elements, random_sample)
+        for item in items:
+            if budget.remaining <= 0:
+                return None
+            budget.remaining -= 1
+            path = element_checker(item, budget)
+            if path is not None:
+                return f"{{{item!r}}}{path}"
+        return None
+
+    return check_set
+
+
+_budgeted_checker_cache: Dict[
+    Tuple[Any, Optional[int], bool], Callable[[object, _CheckBudget], Optional[str]]
+] = {}
+
+
+def _get_budgeted_checker(
+    parameter_type: Any, max_elements: Optional[int], random_sample: bool
+) -> Callable[[object, _CheckBudget], Optional[str]]:
+    key = (parameter_type, max_elements, random_sample)
+    try:
+        return _budgeted_checker_cache[key]
+    except KeyError:
+        checker = _budgeted_checker_cache[key] = _compile_budgeted_checker(
+            parameter_type, max_elements, random_sample
+        )
+        return checker
+    except TypeError:
+        return _compile_budgeted_checker(parameter_type, max_elements, random_sample)
+
+
+def _find_type_violation(
+    parameter: object,
+    parameter_type: Any,
+    max_elements: Optional[int] = None,
+    max_total_elements: Optional[int] = None,
+    random_sample: bool = False,
+) -> Optional[str]:
+    """Check a sample of an object's members against a type and find where it does not match
+
+    Args:
+        parameter (object): The parameter to check the type of
+        parameter_type (Any): The type that is annotated for the parameter
+        max_elements (Optional[int], optional): The maximum number of elements to check in each container. Defaults to None for all.
+        max_total_elements (Optional[int], optional): The maximum number of elements to check in total. Defaults to None for no limit.
+        random_sample (bool, optional): Whether to check a random sample of each container rather than the first elements. Defaults to False.
+
+    Returns:
+        Optional[str]: None if no mismatch was found, otherwise the path to the mismatch, e.g. "['a'][2]"
+    """
+    checker = _get_budgeted_checker(parameter_type, max_elements, random_sample)
+    return checker(parameter, _CheckBudget(max_total_elements))
+
+
+def _describe_violation(
+    parameter: object, path: str, budget: Optional[_CheckBudget] = None
+) -> str:
+    """Describe the mismatching member of an object found by a budgeted check"""
+    if not path:
+        # bounded, as the repr of an arbitrarily deep annotation hits the recursion limit
+        return f"type {introspect_type(parameter, max_depth=64)} was"
+    return f"the sampled element at {path} of type {budget.violation_type} was"
+
+
+_IMMUTABLE_TYPES = frozenset(
+    {int, float, complex, bool, str, bytes, type(None), type(...), range}
+)
+# only containers are worth caching, checking anything else is already a single isinstance
+_CACHEABLE_TYPES = (tuple, frozenset)
+
+
+def _is_deeply_immutable(parameter: object) -> bool:
+    """Check whether an object and everything it contains can never change
+
+    Tuples and frozensets, including subclasses without a `__dict__` such as named tuples, are immutable
+    if their elements are, as are frozen dataclasses whose fields are.
+
+    Args:
+        parameter (object): The object to check
+
+    Returns:
+        bool: Whether the object is immutable all the way down
+    """
+    stack = [parameter]
+    seen = set()
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+        if value_type in _IMMUTABLE_TYPES or id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, _CACHEABLE_TYPES) and value_type.__dictoffset__ == 0:
+            if not set(map(type, value)) <= _IMMUTABLE_TYPES:
+                stack.extend(value)
+        elif (
+            dataclasses.is_dataclass(value_type)
+            and value_type.__dataclass_params__.frozen
+        ):
+            stack.extend(
+                getattr(value, field.name) for field in dataclasses.fields(value)
+            )
+        else:
+            return False
+    return True
+
+
+class _ValidationCache:
+    """A bounded LRU of the immutable objects that have passed each deep checker
+
+    Entries are keyed by the identity of the object and of the checker. Tuples and frozensets cannot be
+    weakly referenced, so the cache holds a strong reference to each object it remembers, and to the
+    checker, which keeps both alive and their ids from being reused until the entry is evicted.
+
+    Args:
+        maxsize (int): The maximum number of objects to remember
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: (
+            "OrderedDict[Tuple[int, int], Tuple[object, Callable[[object], bool]]]"
+        ) = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, parameter: object, checker: Callable[[object], bool]) -> bool:
+        key = (id(parameter), id(checker))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+
+        if not checker(parameter):
+            return False
+        if _is_deeply_immutable(parameter):
+            with self._lock:
+                self._entries[key] = (parameter, checker)
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_validation_cache = _ValidationCache(maxsize=1024)
+
+
+def _make_cached_checker(checker: Callable[[object], bool]) -> Callable[[object], bool]:
+    """Wrap a deep checker so immutable containers that have passed it are not checked again"""
+
+    def check(parameter: object) -> bool:
+        if isinstance(parameter, _CACHEABLE_TYPES):
+            return _validation_cache.check(parameter, checker)
+        return checker(parameter)
+
+    return check
+
+
+_POSITIONAL_KINDS = (
+    inspect.Parameter.POSITIONAL_ONLY,
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+)
+
+
+def type_enforced(
+    deep: bool = True,
+    max_elements: Optional[int] = None,
+    max_total_elements: Optional[int] = None,
+    random_sample: bool = False,
+    check_every: int = 1,
+    cache_immutable: bool = False,
+):
     """Decorator that enforces the types of the arguments and return value of a function
 
+    Deep checking can be given a budget so that it is affordable on large containers, at the cost of
+    only catching mismatches in the elements that were sampled. Functions that are repeatedly passed the
+    same large immutable objects can instead cache the result of checking them.
+
     Args:
         deep (bool, optional): Whether or not the type checking should look at members of the type. Defaults to True.
+        max_elements (Optional[int], optional): The maximum number of elements to check in each container. Defaults to None for all.
+        max_total_elements (Optional[int], optional): The maximum number of elements to check in total per call, not counting elements checked against members of a `Union` that did not match. Defaults to None for no limit.
+        random_sample (bool, optional): Whether to check a random sample of each container rather than its first elements. Defaults to False.
+        check_every (int, optional): Only check the first call and then 1 in every `check_every` calls. Defaults to 1.
+        cache_immutable (bool, optional): Whether to remember the tuples and frozensets that pass a full deep check, if they are immutable all the way down, so passing the same object again is not re-checked. Defaults to False.
 
     Raises:
         TypeError: An argument or return value does not match the annotations on the function
@@ -224,36 +1249,77 @@ def type_enforced(deep: bool = True):
             TypeError: Return value for function 'test_func' must be of type <class 'str'>, instead type <class 'float'> was returned
         """
 
-        type_checker = _deep_is_of_type if deep else _shallow_is_of_type
         signature = inspect.signature(func)
-        parameters = signature.parameters
-        return_annotation = signature.return_annotation
-        return_type = (
-            return_annotation if return_annotation is not inspect._empty else None
+
+        budgeted = deep and (max_elements is not None or max_total_elements is not None)
+
+        def get_checker(annotation: Any) -> Callable:
+            if budgeted:
+                return _get_budgeted_checker(annotation, max_elements, random_sample)
+            if deep and cache_immutable:
+                return _make_cached_checker(_get_deep_checker(annotation))
+            if deep:
+                return _get_deep_checker(annotation)
+            return lambda parameter: _shallow_is_of_type(parameter, annotation)
+
+        # compile a checker for each annotated parameter once, rather than on every call, with the
+        # position it is passed at, None for keyword only parameters, and whether it can be passed by name
+        checks = [
+            (
+                i if parameter.kind in _POSITIONAL_KINDS else None,
+                parameter.kind is not inspect.Parameter.POSITIONAL_ONLY,
+                name,
+                parameter.annotation,
+                get_checker(parameter.annotation),
+            )
+            for i, (name, parameter) in enumerate(signature.parameters.items())
+            if parameter.annotation is not inspect._empty
+            and parameter.kind
+            not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+        ]
+        return_type = signature.return_annotation
+        return_checker = (
+            get_checker(return_type) if return_type is not inspect._empty else None
         )
+        calls = 0
 
+        @wraps(func)
         def wrapper(*args, **kwargs):
-            for i, (name, parameter) in enumerate(parameters.items()):
-                if parameter.annotation is inspect._empty:
+            nonlocal calls
+            if check_every > 1:
+                calls += 1
+                # the first call is always checked, then every check_every-th call after it
+                if (calls - 1) % check_every:
+                    return func(*args, **kwargs)
+
+            budget = _CheckBudget(max_total_elements) if budgeted else None
+            n_args = len(args)
+            for position, by_name, name, annotation, checker in checks:
+                if position is not None and position < n_args:
+                    value = args[position]
+                elif by_name and name in kwargs:
+                    value = kwargs[name]
+                else:
                     continue
-                if i < len(args):
-                    if not type_checker(args[i], parameter.annotation):
-                        raise TypeError(
-                            f"Argument '{name}' for function '{func.__name__}' must be of type {parameter.annotation}, instead type {introspect_type(args[i])} was passed"
-                        )
-                elif name in kwargs:
-                    if not type_checker(kwargs[name], parameter.annotation):
-                        raise TypeError(
-                            f"Argument '{name}' for function '{func.__name__}' must be of type {parameter.annotation}, instead type {introspect_type(kwargs[name])} was passed"
-                        )
+                if budgeted:
+                    path = checker(value, budget)
+                else:
+                    path = None if checker(value) else ""
+                if path is not None:
+                    raise TypeError(
+                        f"Argument '{name}' for function '{func.__name__}' must be of type {annotation}, instead {_describe_violation(value, path, budget)} passed"
+                    )
             result = func(*args, **kwargs)
 
-            if parameter.annotation is not inspect._empty and not type_checker(
-                result, return_type
-            ):
-                raise TypeError(
-                    f"Return value for function '{func.__name__}' must be of type {return_type}, instead type {introspect_type(result)} was returned"
-                )
+            if return_checker is not None:
+                if budgeted:
+                    path = return_checker(result, budget)
+                else:
+                    path = None if return_checker(result) else ""
+                if path is not None:
+                    raise TypeError(
+                        f"Return value for function '{func.__name__}' must be of type {return_type}, instead {_describe_violation(result, path, budget)} returned"
+                    )
             return result
 
         return wrapper
@@ -0,0 +1,266 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .execution_introspections import (
+    DEFAULT_LATENCY_BUCKETS,
+    CallCounter,
+    ExecutionTimer,
+)
+from .shared_metrics import SharedMetricsAggregator
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_float(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _HistogramState:
+    """The bucket counts of one function's times, updated with only the times recorded since the last render"""
+
+    __slots__ = ("times", "cursor", "bucket_counts", "total", "text")
+
+    def __init__(self, times: List[float], n_buckets: int):
+        self.times = times
+        self.cursor = 0
+        self.bucket_counts = [0] * n_buckets
+        self.total = 0.0
+        self.text = ""
+
+
+class OpenMetricsExporter:
+    """Renders call counts and execution times as OpenMetrics text, and serves them over HTTP for scrapers such as Prometheus
+
+    Call counts are exported as a counter and execution times as a histogram, both labelled with the
+    function name. Rendering is incremental, only the times recorded since the previous render are
+    added to the histograms and the text of functions that have not been called since is reused, so
+    scraping stays cheap with many instrumented functions.
+
+    Times are read from the `ExecutionTimer`, so resetting it resets the exported histograms too.
+
+    To export the metrics of every worker of a multi-process server, pass a `SharedMetricsAggregator`
+    instead of a counter and timer. Its histograms use the buckets the workers were configured with.
+
+    Args:
+        call_counter (Optional[CallCounter], optional): The counts to export. Defaults to None.
+        execution_timer (Optional[ExecutionTimer], optional): The times to export. Defaults to None.
+        buckets (Sequence[float], optional): Upper bounds in seconds of the histogram buckets, a final +Inf bucket is always added. Defaults to DEFAULT_LATENCY_BUCKETS.
+        aggregator (Optional[SharedMetricsAggregator], optional): Merged metrics of many processes to export. Defaults to None.
+        namespace (str, optional): The prefix of the metric names. Defaults to "contemplation".
+
+    Examples:
+        >>> introspector = Introspector()
+        >>> exporter = OpenMetricsExporter(introspector.call_counter, introspector.execution_timer)
+        >>> @introspector.introspect
+        ... def my_func(a: int, b: int):
+        ...     return a + b
+        >>> my_func(1, 2)
+        >>> print(exporter.render())
+        >>> exporter.start_server(port=9464)
+    """
+
+    def __init__(
+        self,
+        call_counter: Optional[CallCounter] = None,
+        execution_timer: Optional[ExecutionTimer] = None,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        aggregator: Optional[SharedMetricsAggregator] = None,
+        namespace: str = "contemplation",
+    ):
+        self.call_counter = call_counter
+        self.execution_timer = execution_timer
+        self.aggregator = aggregator
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.namespace = namespace
+        self._calls_name = f"{namespace}_function_calls"
+        self._duration_name = f"{namespace}_function_duration_seconds"
+        self._labels: Dict[str, str] = {}
+        self._counts: Dict[str, Tuple[int, str]] = {}
+        self._histograms: Dict[str, _HistogramState] = {}
+        self._bucket_labels = [_format_float(bound) for bound in self.buckets]
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, name: str) -> str:
+        label = self._labels.get(name)
+        if label is None:
+            label = self._labels[name] = f'function="{_escape_label(name)}"'
+        return label
+
+    def _render_count(self, name: str, count: int) -> str:
+        cached = self._counts.get(name)
+        if cached is not None and cached[0] == count:
+            return cached[1]
+        text = f"{self._calls_name}_total{{{self._label(name)}}} {count}\n"
+        self._counts[name] = (count, text)
+        return text
+
+    def _render_histogram(self, name: str, times: List[float]) -> str:
+        n_times = len(times)
+        state = self._histograms.get(name)
+        if state is None or state.times is not times or n_times < state.cursor:
+            # new, or the timer was reset since the last render
+            state = self._histograms[name] = _HistogramState(times, len(self.buckets))
+        elif n_times == state.cursor:
+            return state.text
+
+        buckets = self.buckets
+        bucket_counts = state.bucket_counts
+        new_times = times[state.cursor : n_times]
+        for elapsed_time in new_times:
+            bucket_counts[bisect.bisect_left(buckets, elapsed_time)] += 1
+        state.total += sum(new_times)
+        state.cursor = n_times
+
+        state.text = self._histogram_text(
+            name, self._bucket_labels, bucket_counts, n_times, state.total
+        )
+        return state.text
+
+    def _histogram_text(
+        self,
+        name: str,
+        bucket_labels: List[str],
+        bucket_counts: List[int],
+        count: int,
+        total: float,
+    ) -> str:
+        label = self._label(name)
+        lines = []
+        cumulative = 0
+        for bucket_label, bucket_count in zip(bucket_labels, bucket_counts):
+            cumulative += bucket_count
+            lines.append(
+                f'{self._duration_name}_bucket{{{label},le="{bucket_label}"}} {cumulative}\n'
+            )
+        lines.append(f"{self._duration_name}_count{{{label}}} {count}\n")
+        lines.append(f"{self._duration_name}_sum{{{label}}} {_format_float(total)}\n")
+        return "".join(lines)
+
+    def _render_aggregated(self) -> List[str]:
+        metrics = self.aggregator.collect()
+        parts = [
+            f"# TYPE {self._calls_name} counter\n"
+            f"# HELP {self._calls_name} Number of calls of each function.\n"
+        ]
+        for name, function_metrics in metrics.items():
+            if function_metrics.count:
+                parts.append(self._render_count(name, function_metrics.count))
+        parts.append(
+            f"# TYPE {self._duration_name} histogram\n"
+            f"# UNIT {self._duration_name} seconds\n"
+            f"# HELP {self._duration_name} Execution time of each function.\n"
+        )
+        for name, function_metrics in metrics.items():
+            if function_metrics.timed_calls:
+                parts.append(
+                    self._histogram_text(
+                        name,
+                        [_format_float(bound) for bound in function_metrics.buckets],
+                        function_metrics.bucket_counts,
+                        function_metrics.timed_calls,
+                        function_metrics.total_time,
+                    )
+                )
+        return parts
+
+    def render(self) -> str:
+        """Render the current counts and times in the OpenMetrics text format
+
+        Returns:
+            str: The metrics, ending with `# EOF`
+        """
+        with self._lock:
+            if self.aggregator is not None:
+                return "".join(self._render_aggregated() + ["# EOF\n"])
+            parts = []
+            if self.call_counter is not None:
+                parts.append(
+                    f"# TYPE {self._calls_name} counter\n"
+                    f"# HELP {self._calls_name} Number of calls of each function.\n"
+                )
+                for name, count in list(self.call_counter.counts.items()):
+                    parts.append(self._render_count(name, count))
+            if self.execution_timer is not None:
+                parts.append(
+                    f"# TYPE {self._duration_name} histogram\n"
+                    f"# UNIT {self._duration_name} seconds\n"
+                    f"# HELP {self._duration_name} Execution time of each function.\n"
+                )
+                for name, times in list(self.execution_timer.times.items()):
+                    parts.append(self._render_histogram(name, times))
+            parts.append("# EOF\n")
+            return "".join(parts)
+
+    def start_server(
+        self, port: int = 9464, host: str = "127.0.0.1"
+    ) -> Tuple[str, int]:
+        """Serve the metrics at `/metrics` from a background thread
+
+        Args:
+            port (int, optional): The port to listen on, 0 to pick a free port. Defaults to 9464.
+            host (str, optional): The address to listen on. Defaults to "127.0.0.1" so only local scrapers can connect.
+
+        Raises:
+            RuntimeError: If the server is already running
+
+        Returns:
+            Tuple[str, int]: The address and port the server is listening on
+        """
+        if self._server is not None:
+            raise RuntimeError("The metrics server is already running")
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="contemplation-metrics",
+            daemon=True,
+        )
+        self._thread.start()
+        return self._server.server_address[:2]
+
+    def stop_server(self) -> None:
+        """Stop serving the metrics"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> "OpenMetricsExporter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop_server()
+
+    def __repr__(self) -> str:
+        running = self._server is not None
+        return f"<OpenMetricsExporter namespace={self.namespace} serving={running}>"
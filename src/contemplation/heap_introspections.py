@@ -0,0 +1,823 @@
+import gc
+import inspect
+import os
+import sys
+import time
+import tracemalloc
+import types
+import weakref
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from .reports import Column, Report
+
+
+def _get_heap_objects(generations: Optional[Tuple[int, ...]] = None) -> List[object]:
+    """Get the objects tracked by the garbage collector, optionally restricted to some generations
+
+    Args:
+        generations (Optional[Tuple[int, ...]], optional): The generations to collect objects from. Defaults to None for all generations.
+
+    Raises:
+        ValueError: If a generation does not exist
+
+    Returns:
+        List[object]: The tracked objects
+    """
+    if generations is None:
+        return gc.get_objects()
+
+    objects = []
+    n_generations = len(gc.get_count())
+    for generation in generations:
+        if not 0 <= generation < n_generations:
+            raise ValueError(
+                f"Generation must be between 0 and {n_generations - 1}, got {generation}"
+            )
+        objects += gc.get_objects(generation=generation)
+    return objects
+
+
+def _type_name(t: type) -> str:
+    module = getattr(t, "__module__", None)
+    name = getattr(t, "__qualname__", t.__name__)
+    if module in (None, "builtins"):
+        return name
+    return f"{module}.{name}"
+
+
+class HeapCensus:
+    """A snapshot of how many objects of each type exist, taken in a single pass over the heap
+
+    Queries are answered from the snapshot so asking about many types only costs one heap scan.
+    Like `how_many_of_type_exist`, only objects tracked by the garbage collector are counted.
+
+    Args:
+        generations (Optional[Iterable[int]], optional): The gc generations to include. Defaults to None for all generations.
+        include_sizes (bool, optional): Whether to also record the shallow size of the objects of each type. Defaults to False.
+
+    Examples:
+        >>> census = HeapCensus()
+        >>> census.count(MyClass)
+        2
+        >>> census.count(dict) > 0
+        True
+    """
+
+    def __init__(
+        self,
+        generations: Optional[Iterable[int]] = None,
+        include_sizes: bool = False,
+    ):
+        self.generations = tuple(generations) if generations is not None else None
+        self.include_sizes = include_sizes
+        self.timestamp = time.time()
+
+        objects = _get_heap_objects(self.generations)
+        self.counts: Dict[type, int] = dict(Counter(map(type, objects)))
+        self.sizes: Dict[type, int] = {}
+        if include_sizes:
+            sizes = defaultdict(int)
+            getsizeof = sys.getsizeof
+            for obj in objects:
+                sizes[type(obj)] += getsizeof(obj)
+            self.sizes = dict(sizes)
+        self.total_objects = len(objects)
+        del objects
+
+        self._subclass_cache: Dict[type, Tuple[type, ...]] = {}
+
+    def _matching_types(self, cls: type) -> Tuple[type, ...]:
+        if cls not in self._subclass_cache:
+            self._subclass_cache[cls] = tuple(
+                t for t in self.counts if issubclass(t, cls)
+            )
+        return self._subclass_cache[cls]
+
+    def count(self, cls: type, subclasses: bool = True) -> int:
+        """Count how many objects of a given type existed when the census was taken
+
+        Args:
+            cls (type): The type to count
+            subclasses (bool, optional): Whether instances of subclasses are counted, as `isinstance` would. Defaults to True.
+
+        Returns:
+            int: The number of objects of the given type
+        """
+        if not subclasses:
+            return self.counts.get(cls, 0)
+        return sum(self.counts[t] for t in self._matching_types(cls))
+
+    def size(self, cls: type, subclasses: bool = True) -> int:
+        """Get the total shallow size in bytes of the objects of a given type
+
+        Args:
+            cls (type): The type to get the size of
+            subclasses (bool, optional): Whether instances of subclasses are included. Defaults to True.
+
+        Raises:
+            ValueError: If the census was taken without sizes
+
+        Returns:
+            int: The total shallow size of the objects of the given type
+        """
+        if not self.include_sizes:
+            raise ValueError("Census was taken without include_sizes=True")
+        if not subclasses:
+            return self.sizes.get(cls, 0)
+        return sum(self.sizes[t] for t in self._matching_types(cls))
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[type, int]]:
+        """Get the types with the most instances
+
+        Args:
+            n (Optional[int], optional): The number of types to return. Defaults to None for all types.
+
+        Returns:
+            List[Tuple[type, int]]: Pairs of type and count, most common first
+        """
+        return Counter(self.counts).most_common(n)
+
+    def get_counts(self) -> Dict[str, int]:
+        """Get the counts of all types in the census by name
+
+        Returns:
+            Dict[str, int]: A dictionary of qualified type names to their counts
+        """
+        counts: Dict[str, int] = defaultdict(int)
+        for t, count in self.counts.items():
+            counts[_type_name(t)] += count
+        return dict(counts)
+
+    def get_sizes(self) -> Dict[str, int]:
+        """Get the total shallow sizes of all types in the census by name
+
+        Raises:
+            ValueError: If the census was taken without sizes
+
+        Returns:
+            Dict[str, int]: A dictionary of qualified type names to their total shallow size in bytes
+        """
+        if not self.include_sizes:
+            raise ValueError("Census was taken without include_sizes=True")
+        sizes: Dict[str, int] = defaultdict(int)
+        for t, size in self.sizes.items():
+            sizes[_type_name(t)] += size
+        return dict(sizes)
+
+    def get_report(self) -> Report:
+        """Get a report of the counts of all types in the census by name, with the columns type, count, and
+        size if the census was taken with sizes
+
+        Returns:
+            Report: The report
+        """
+        columns = [Column("type", "Type"), Column("count", "Count")]
+        counts = self.get_counts()
+        if not self.include_sizes:
+            return Report(columns, list(counts.items()))
+        sizes = self.get_sizes()
+        columns.append(Column("size", "Size (B)"))
+        return Report(
+            columns, [(name, count, sizes[name]) for name, count in counts.items()]
+        )
+
+    def pretty_print(
+        self,
+        n: Optional[int] = 20,
+        sort_by: Optional[str] = "count",
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the most common types in a nice table
+
+        Args:
+            n (Optional[int], optional): The number of types to print. Defaults to 20, None for all.
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to "count".
+            pattern (Optional[str], optional): Only print types whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=n, pattern=pattern
+        )
+
+    def __contains__(self, cls: type) -> bool:
+        return self.count(cls) > 0
+
+    def __repr__(self) -> str:
+        return f"HeapCensus(total_objects={self.total_objects}, types={len(self.counts)}, generations={self.generations})"
+
+
+def take_heap_census(
+    generations: Optional[Union[int, Iterable[int]]] = None,
+    include_sizes: bool = False,
+) -> HeapCensus:
+    """Count the objects of every type on the heap in a single pass
+
+    Args:
+        generations (Optional[Union[int, Iterable[int]]], optional): The gc generation or generations to include. Defaults to None for all generations.
+        include_sizes (bool, optional): Whether to also record shallow sizes per type. Defaults to False.
+
+    Returns:
+        HeapCensus: The census, which can answer queries for any number of types
+
+    Examples:
+        >>> census = take_heap_census()
+        >>> census.count(MyClass), census.count(MyOtherClass)
+        (2, 5)
+    """
+    if isinstance(generations, int):
+        generations = (generations,)
+    return HeapCensus(generations=generations, include_sizes=include_sizes)
+
+
+class HeapSnapshot:
+    """A compact record of the count and total shallow size of each type on the heap
+
+    Types are stored by qualified name so a snapshot does not keep any types or objects alive.
+
+    Args:
+        generations (Optional[Iterable[int]], optional): The gc generations to include. Defaults to None for all generations.
+        include_sizes (bool, optional): Whether to record shallow sizes per type. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        generations: Optional[Iterable[int]] = None,
+        include_sizes: bool = True,
+    ):
+        census = HeapCensus(generations=generations, include_sizes=include_sizes)
+        self.generations = census.generations
+        self.timestamp = census.timestamp
+        self.total_objects = census.total_objects
+        self.counts: Dict[str, int] = census.get_counts()
+        self.sizes: Dict[str, int] = census.get_sizes() if include_sizes else {}
+        self._types: Dict[str, List[weakref.ref]] = defaultdict(list)
+        for t in census.counts:
+            self._types[_type_name(t)].append(weakref.ref(t))
+
+    def __repr__(self) -> str:
+        return f"HeapSnapshot(timestamp={self.timestamp}, total_objects={self.total_objects}, types={len(self.counts)})"
+
+
+class TypeGrowth:
+    """The change in count and size of a single type between two heap snapshots"""
+
+    def __init__(
+        self,
+        name: str,
+        count_before: int,
+        count_after: int,
+        size_before: int,
+        size_after: int,
+    ):
+        self.name = name
+        self.count_before = count_before
+        self.count_after = count_after
+        self.count_diff = count_after - count_before
+        self.size_before = size_before
+        self.size_after = size_after
+        self.size_diff = size_after - size_before
+        self.samples: List[object] = []
+        self.tracebacks: List[tracemalloc.Traceback] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "count_before": self.count_before,
+            "count_after": self.count_after,
+            "count_diff": self.count_diff,
+            "size_before": self.size_before,
+            "size_after": self.size_after,
+            "size_diff": self.size_diff,
+            "tracebacks": [tb.format() for tb in self.tracebacks],
+        }
+
+    def __repr__(self) -> str:
+        return f"TypeGrowth(name={self.name}, count_diff={self.count_diff}, size_diff={self.size_diff})"
+
+
+class HeapDiff:
+    """The types that changed between two heap snapshots, ranked by growth
+
+    Args:
+        before (HeapSnapshot): The earlier snapshot
+        after (HeapSnapshot): The later snapshot
+        sort_by (str, optional): Rank by growth in "count" or "size". Defaults to "count".
+    """
+
+    def __init__(
+        self, before: HeapSnapshot, after: HeapSnapshot, sort_by: str = "count"
+    ):
+        if sort_by not in ("count", "size"):
+            raise ValueError(f"sort_by must be 'count' or 'size', got '{sort_by}'")
+        self.before = before
+        self.after = after
+        self.elapsed = after.timestamp - before.timestamp
+
+        growths = []
+        for name in before.counts.keys() | after.counts.keys():
+            count_before = before.counts.get(name, 0)
+            count_after = after.counts.get(name, 0)
+            size_before = before.sizes.get(name, 0)
+            size_after = after.sizes.get(name, 0)
+            if count_before != count_after or size_before != size_after:
+                growths.append(
+                    TypeGrowth(name, count_before, count_after, size_before, size_after)
+                )
+
+        key = (
+            (lambda g: (g.count_diff, g.size_diff))
+            if sort_by == "count"
+            else (lambda g: (g.size_diff, g.count_diff))
+        )
+        self.growths: List[TypeGrowth] = sorted(growths, key=key, reverse=True)
+
+    def top(self, n: int = 10) -> List[TypeGrowth]:
+        """Get the types that grew the most
+
+        Args:
+            n (int, optional): The number of types to return. Defaults to 10.
+
+        Returns:
+            List[TypeGrowth]: The top growing types, largest growth first
+        """
+        return [g for g in self.growths[:n] if g.count_diff > 0 or g.size_diff > 0]
+
+    def capture_samples(
+        self, n: int = 10, samples_per_type: int = 3, include_tracebacks: bool = True
+    ) -> List[TypeGrowth]:
+        """Capture sample instances of the top growing types from the current heap
+
+        Allocation tracebacks are only available for objects allocated while `tracemalloc` was tracing.
+
+        Args:
+            n (int, optional): The number of top growing types to sample. Defaults to 10.
+            samples_per_type (int, optional): The maximum number of instances to keep per type. Defaults to 3.
+            include_tracebacks (bool, optional): Whether to record the tracemalloc allocation traceback of each sample. Defaults to True.
+
+        Returns:
+            List[TypeGrowth]: The top growing types with their samples populated
+        """
+        top = self.top(n)
+        wanted: Dict[type, TypeGrowth] = {}
+        for growth in top:
+            growth.samples = []
+            growth.tracebacks = []
+            for ref in self.after._types.get(growth.name, []):
+                t = ref()
+                if t is not None:
+                    wanted[t] = growth
+
+        remaining = len(wanted)
+        for obj in gc.get_objects():
+            if not remaining:
+                break
+            growth = wanted.get(type(obj))
+            if growth is None or len(growth.samples) >= samples_per_type:
+                continue
+            growth.samples.append(obj)
+            if include_tracebacks:
+                traceback = tracemalloc.get_object_traceback(obj)
+                if traceback is not None:
+                    growth.tracebacks.append(traceback)
+            if len(growth.samples) == samples_per_type:
+                remaining -= 1
+
+        return top
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Get the changed types as JSON
+
+        Returns:
+            List[Dict[str, Any]]: The changed types, largest growth first
+        """
+        return [g.to_dict() for g in self.growths]
+
+    def get_report(self) -> Report:
+        """Get a report of the growing types, largest growth first, with the columns type, count_diff and
+        size_diff
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (
+                Column("type", "Type"),
+                Column("count_diff", "Count Diff", "+"),
+                Column("size_diff", "Size Diff (B)", "+"),
+            ),
+            [(g.name, g.count_diff, g.size_diff) for g in self.top(len(self.growths))],
+        )
+
+    def pretty_print(
+        self,
+        n: Optional[int] = 20,
+        sort_by: Optional[str] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the top growing types in a nice table
+
+        Args:
+            n (Optional[int], optional): The number of types to print. Defaults to 20, None for all.
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the largest growth first.
+            pattern (Optional[str], optional): Only print types whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=n, pattern=pattern
+        )
+
+
+def take_heap_snapshot(
+    generations: Optional[Union[int, Iterable[int]]] = None,
+    include_sizes: bool = True,
+) -> HeapSnapshot:
+    """Record the count and total shallow size of each type on the heap
+
+    Args:
+        generations (Optional[Union[int, Iterable[int]]], optional): The gc generation or generations to include. Defaults to None for all generations.
+        include_sizes (bool, optional): Whether to record shallow sizes per type. Defaults to True.
+
+    Returns:
+        HeapSnapshot: The snapshot
+
+    Examples:
+        >>> before = take_heap_snapshot()
+        >>> run_workload()
+        >>> diff = compare_heap_snapshots(before, take_heap_snapshot())
+        >>> diff.pretty_print()
+    """
+    if isinstance(generations, int):
+        generations = (generations,)
+    return HeapSnapshot(generations=generations, include_sizes=include_sizes)
+
+
+def compare_heap_snapshots(
+    before: HeapSnapshot, after: HeapSnapshot, sort_by: str = "count"
+) -> HeapDiff:
+    """Diff two heap snapshots and rank the types by how much they grew
+
+    Args:
+        before (HeapSnapshot): The earlier snapshot
+        after (HeapSnapshot): The later snapshot
+        sort_by (str, optional): Rank by growth in "count" or "size". Defaults to "count".
+
+    Returns:
+        HeapDiff: The ranked differences
+    """
+    return HeapDiff(before, after, sort_by=sort_by)
+
+
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.CodeType,
+    types.FrameType,
+)
+_SHARED_SINGLETONS = (None, True, False, Ellipsis, NotImplemented)
+
+
+class SizeCalculator:
+    """Computes deep sizes of objects, reusing work across all the queries made with it
+
+    The graph of objects is walked iteratively with `gc.get_referents` so deep structures do not hit
+    the recursion limit, and every object is counted once even when it is reachable along several paths
+    or through a cycle. The set of excluded objects is built once and deep sizes are memoized, so a
+    calculator should be used for a batch of queries while the objects being measured are not changing.
+
+    Args:
+        exclude (Optional[Iterable[object]], optional): Objects that are never counted or traversed. Defaults to None.
+        exclude_shared (bool, optional): Whether to exclude shared objects: classes, modules, functions, code, frames, singletons, and any object bound to a module global. Defaults to True.
+    """
+
+    def __init__(
+        self, exclude: Optional[Iterable[object]] = None, exclude_shared: bool = True
+    ):
+        self.exclude_shared = exclude_shared
+        self._excluded_ids = {id(obj) for obj in exclude} if exclude else set()
+        if exclude_shared:
+            self._excluded_ids.update(id(obj) for obj in _SHARED_SINGLETONS)
+            for module in list(sys.modules.values()):
+                module_dict = getattr(module, "__dict__", None)
+                if isinstance(module_dict, dict):
+                    self._excluded_ids.update(map(id, module_dict.values()))
+        self._deep_sizes: Dict[int, Tuple[object, int]] = {}
+
+    def _walk(self, roots: Iterable[object]) -> int:
+        excluded_ids = self._excluded_ids
+        shared_types = _SHARED_TYPES if self.exclude_shared else ()
+        getsizeof = sys.getsizeof
+
+        frontier = []
+        seen = set()
+        for root in roots:
+            if id(root) not in seen:
+                seen.add(id(root))
+                frontier.append(root)
+
+        # walk one level at a time so the referents of a whole level are found in a single call
+        total = 0
+        while frontier:
+            total += sum(getsizeof(obj, 0) for obj in frontier)
+            level = []
+            for child in gc.get_referents(*frontier):
+                key = id(child)
+                if (
+                    key in seen
+                    or key in excluded_ids
+                    or isinstance(child, shared_types)
+                ):
+                    continue
+                seen.add(key)
+                level.append(child)
+            frontier = level
+        return total
+
+    def deep_sizeof(self, obj: object) -> int:
+        """Get the size of an object and everything it references
+
+        Args:
+            obj (object): The object to measure, it is always counted even if it would be excluded
+
+        Returns:
+            int: The deep size of the object in bytes
+        """
+        key = id(obj)
+        if key not in self._deep_sizes:
+            # the object is kept alongside its size so its id cannot be reused during the batch
+            self._deep_sizes[key] = (obj, self._walk([obj]))
+        return self._deep_sizes[key][1]
+
+    def retained_size(self, objs: Iterable[object]) -> int:
+        """Get the combined size of some objects and everything they reference, counting shared objects once
+
+        Args:
+            objs (Iterable[object]): The objects to measure
+
+        Returns:
+            int: The combined deep size in bytes
+        """
+        return self._walk(objs)
+
+
+def deep_sizeof(
+    obj: object, exclude: Optional[Iterable[object]] = None, exclude_shared: bool = True
+) -> int:
+    """Get the size of an object and everything it references
+
+    Args:
+        obj (object): The object to measure
+        exclude (Optional[Iterable[object]], optional): Objects that are never counted or traversed. Defaults to None.
+        exclude_shared (bool, optional): Whether to exclude classes, modules, functions and module globals. Defaults to True.
+
+    Returns:
+        int: The deep size of the object in bytes
+
+    Examples:
+        >>> deep_sizeof([[1, 2], [3, 4]]) > sys.getsizeof([[1, 2], [3, 4]])
+        True
+    """
+    return SizeCalculator(exclude=exclude, exclude_shared=exclude_shared).deep_sizeof(
+        obj
+    )
+
+
+def retained_size(
+    objs: Iterable[object],
+    exclude: Optional[Iterable[object]] = None,
+    exclude_shared: bool = True,
+) -> int:
+    """Get the combined size of some objects and everything they reference, counting shared objects once
+
+    Args:
+        objs (Iterable[object]): The objects to measure
+        exclude (Optional[Iterable[object]], optional): Objects that are never counted or traversed. Defaults to None.
+        exclude_shared (bool, optional): Whether to exclude classes, modules, functions and module globals. Defaults to True.
+
+    Returns:
+        int: The combined deep size in bytes
+    """
+    return SizeCalculator(exclude=exclude, exclude_shared=exclude_shared).retained_size(
+        objs
+    )
+
+
+def _get_root_labels(
+    caller: Optional[types.FrameType] = None, obj: object = None
+) -> Dict[int, List[str]]:
+    """Map the ids of objects bound to module globals and frame locals to labels for those bindings
+
+    Frames running this module's code and module level frames, whose locals are the module globals, are skipped,
+    as are the caller's own bindings of the object being searched for.
+    """
+    roots: Dict[int, List[str]] = defaultdict(list)
+    caller_globals = (
+        caller.f_globals
+        if caller is not None and caller.f_locals is caller.f_globals
+        else None
+    )
+    for module_name, module in list(sys.modules.items()):
+        module_dict = getattr(module, "__dict__", None)
+        if not isinstance(module_dict, dict):
+            continue
+        for name, value in list(module_dict.items()):
+            if value is obj and module_dict is caller_globals:
+                continue
+            roots[id(value)].append(f"{module_name}.{name}")
+
+    for thread_frame in sys._current_frames().values():
+        frame = thread_frame
+        while frame is not None:
+            if (
+                frame.f_code.co_filename != __file__
+                and frame.f_locals is not frame.f_globals
+            ):
+                code = frame.f_code
+                location = f"<frame {code.co_name} at {os.path.basename(code.co_filename)}:{frame.f_lineno}>"
+                for name, value in list(frame.f_locals.items()):
+                    if value is obj and frame is caller:
+                        continue
+                    roots[id(value)].append(f"{location}.{name}")
+            frame = frame.f_back
+        del thread_frame, frame
+    del caller, caller_globals
+    return roots
+
+
+def _edge_label(parent: object, child: object) -> str:
+    """Describe how parent refers to child as an attribute, key, or index"""
+    if isinstance(parent, dict):
+        for key, value in parent.items():
+            if value is child:
+                return f"[{key!r}]"
+            if key is child:
+                return f"<key {key!r}>"
+    elif isinstance(parent, (list, tuple)):
+        for i, value in enumerate(parent):
+            if value is child:
+                return f"[{i}]"
+    elif isinstance(parent, (set, frozenset)):
+        return "{...}"
+    elif isinstance(parent, types.CellType):
+        return ".cell_contents"
+
+    if getattr(parent, "__dict__", None) is child:
+        return ".__dict__"
+    for name, value in getattr(parent, "__dict__", {}).items():
+        if value is child:
+            return f".{name}"
+    for cls in type(parent).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if getattr(parent, name, None) is child:
+                return f".{name}"
+    return f" -> {type(child).__name__}"
+
+
+class ReferrerChain:
+    """A chain of references from a module global or frame local to an object
+
+    Args:
+        root (str): The label of the module global or frame local the chain starts from
+        objects (List[object]): The objects along the chain, from the one bound to the root to the target
+    """
+
+    def __init__(self, root: str, objects: List[object]):
+        self.root = root
+        self.objects = objects
+        self.labels = [
+            _edge_label(parent, child) for parent, child in zip(objects, objects[1:])
+        ]
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __str__(self) -> str:
+        path = self.root
+        labels = iter(self.labels)
+        for label in labels:
+            if label == ".__dict__":
+                # show attributes stored in an instance __dict__ as plain attribute access
+                following = next(labels, None)
+                if following is None:
+                    path += label
+                elif following.startswith("['") and following.endswith("']"):
+                    path += "." + following[2:-2]
+                else:
+                    path += label + following
+            else:
+                path += label
+        return path
+
+    def __repr__(self) -> str:
+        return f"ReferrerChain({self})"
+
+
+def find_referrer_chains(
+    obj: object,
+    max_depth: int = 10,
+    max_nodes: int = 100_000,
+    max_chains: int = 3,
+) -> List[ReferrerChain]:
+    """Find the shortest chains of references from module globals or frame locals to an object
+
+    The search is a breadth first search backwards over `gc.get_referrers`. Each level of the search
+    costs a single scan of the heap, so the search stays tractable on large heaps when the depth is bounded.
+    Referrers created by the search itself, including its own frame, are skipped, as are the caller's own
+    variables bound directly to the object, which would otherwise always be the shortest chain.
+
+    Args:
+        obj (object): The object to find the holders of
+        max_depth (int, optional): The maximum length of a chain. Defaults to 10.
+        max_nodes (int, optional): The maximum number of referrers to visit. Defaults to 100_000.
+        max_chains (int, optional): The maximum number of chains to return. Defaults to 3.
+
+    Returns:
+        List[ReferrerChain]: The chains found, shortest first
+
+    Examples:
+        >>> cache = {"key": [my_object]}
+        >>> print(find_referrer_chains(my_object)[0])
+        my_module.cache['key'][0]
+    """
+    search_frame = inspect.currentframe()
+    caller = search_frame.f_back
+    while caller is not None and caller.f_code.co_filename == __file__:
+        caller = caller.f_back
+    roots = _get_root_labels(caller, obj)
+
+    # referrer id -> the id of the object it refers to, one step closer to the target
+    parents: Dict[int, int] = {}
+    nodes: Dict[int, object] = {id(obj): obj}
+    chains: List[ReferrerChain] = []
+
+    def add_chains(key: int) -> None:
+        path = [nodes[key]]
+        while id(path[-1]) in parents:
+            path.append(nodes[parents[id(path[-1])]])
+        for root in roots[key]:
+            if len(chains) < max_chains:
+                chains.append(ReferrerChain(root, path))
+
+    if id(obj) in roots:
+        add_chains(id(obj))
+
+    frontier = [obj]
+    ignored = {id(search_frame), id(nodes), id(parents), id(chains), id(roots)}
+    if caller is not None and caller.f_locals is caller.f_globals:
+        # the caller's global binding of the object, reached through its module
+        ignored.add(id(caller.f_globals))
+    del caller
+    for _ in range(max_depth):
+        if not frontier or len(chains) >= max_chains or len(nodes) >= max_nodes:
+            break
+        ignored.add(id(frontier))
+        frontier_ids = set(map(id, frontier))
+        referrers = gc.get_referrers(*frontier)
+        ignored.add(id(referrers))
+
+        level = []
+        for referrer in referrers:
+            key = id(referrer)
+            if key in ignored or key in nodes or isinstance(referrer, types.FrameType):
+                continue
+            for child in gc.get_referents(referrer):
+                if id(child) in frontier_ids:
+                    parents[key] = id(child)
+                    break
+            else:
+                continue
+            nodes[key] = referrer
+            if key in roots:
+                add_chains(key)
+            else:
+                level.append(referrer)
+            if len(nodes) >= max_nodes:
+                break
+
+        del referrers
+        frontier = level
+
+    del search_frame
+    return chains
+
+
+def print_referrer_chains(obj: object, **kwargs) -> None:
+    """Print the shortest chains of references from module globals or frame locals to an object
+
+    Args:
+        obj (object): The object to find the holders of
+        **kwargs: Passed to `find_referrer_chains`
+    """
+    chains = find_referrer_chains(obj, **kwargs)
+    if not chains:
+        print("No referrer chains found")
+    for chain in chains:
+        print(chain)
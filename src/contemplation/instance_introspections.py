@@ -1,6 +1,12 @@
 import inspect
 import gc
-from typing import List
+import time
+import weakref
+from functools import partial, wraps
+from types import FrameType
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .heap_introspections import HeapCensus
 
 
 def get_name_in_caller_scope(me: object) -> str:
@@ -47,15 +53,124 @@ def get_name_in_all_scope(me: object) -> List[str]:
     return names
 
 
-def how_many_of_type_exist(cls: type) -> int:
+class ScopeNameIndex:
+    """A reverse index from objects to the names they are bound to across the call stack
+
+    The stack is walked once when the index is built and every lookup is then a dictionary access,
+    so resolving names for many objects only pays for one walk and one `f_locals` per frame.
+    The index reflects the stack at the time it was built, and keeps the objects it indexed alive so
+    that an object created after a frame exits cannot be given the names of the frame's dead locals.
+
+    Args:
+        frame (Optional[FrameType], optional): The innermost frame to index. Defaults to None for the caller's frame.
+        max_depth (Optional[int], optional): The maximum number of frames to index. Defaults to None for the whole stack.
+        frame_filter (Optional[Callable[[FrameType], bool]], optional): Only frames for which this returns True are indexed. Defaults to None.
+        include_globals (bool, optional): Whether to index the globals of each module seen on the stack. Defaults to False.
+        include_closures (bool, optional): Whether to index free variables captured from enclosing scopes. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        frame: Optional[FrameType] = None,
+        max_depth: Optional[int] = None,
+        frame_filter: Optional[Callable[[FrameType], bool]] = None,
+        include_globals: bool = False,
+        include_closures: bool = False,
+    ):
+        if frame is None:
+            frame = inspect.currentframe().f_back
+        self._names: Dict[int, Tuple[object, List[str]]] = {}
+        seen_globals = set()
+        depth = 0
+
+        while frame and (max_depth is None or depth < max_depth):
+            depth += 1
+            if frame_filter is None or frame_filter(frame):
+                free_vars = () if include_closures else frame.f_code.co_freevars
+                for name, var in frame.f_locals.items():
+                    if name not in free_vars:
+                        self._add(name, var)
+                if include_globals and id(frame.f_globals) not in seen_globals:
+                    seen_globals.add(id(frame.f_globals))
+                    if frame.f_globals is not frame.f_locals:
+                        for name, var in frame.f_globals.items():
+                            self._add(name, var)
+            frame = frame.f_back
+
+        del frame
+
+    def _add(self, name: str, var: object) -> None:
+        entry = self._names.get(id(var))
+        if entry is None:
+            self._names[id(var)] = (var, [name])
+        else:
+            entry[1].append(name)
+
+    def get_names(self, me: object) -> List[str]:
+        """Get the names of an object, innermost scope first
+
+        Args:
+            me (object): The object to get the names of
+
+        Returns:
+            List[str]: The names of the object in the indexed scopes
+        """
+        entry = self._names.get(id(me))
+        if entry is None or entry[0] is not me:
+            return []
+        return list(entry[1])
+
+
+def get_names_in_all_scope(
+    objs: Iterable[object],
+    max_depth: Optional[int] = None,
+    frame_filter: Optional[Callable[[FrameType], bool]] = None,
+    include_globals: bool = False,
+    include_closures: bool = False,
+) -> List[List[str]]:
+    """Get the names of many objects in all parent scopes with a single walk of the stack
+
+    Args:
+        objs (Iterable[object]): The objects to get the names of
+        max_depth (Optional[int], optional): The maximum number of frames to search. Defaults to None for the whole stack.
+        frame_filter (Optional[Callable[[FrameType], bool]], optional): Only frames for which this returns True are searched. Defaults to None.
+        include_globals (bool, optional): Whether to search the globals of each module seen on the stack. Defaults to False.
+        include_closures (bool, optional): Whether to search free variables captured from enclosing scopes. Defaults to False.
+
+    Returns:
+        List[List[str]]: The names of each object, in the same order as the objects
+
+    Examples:
+        >>> a, b = object(), object()
+        >>> get_names_in_all_scope([a, b])
+        [['a'], ['b']]
+    """
+    index = ScopeNameIndex(
+        frame=inspect.currentframe().f_back,
+        max_depth=max_depth,
+        frame_filter=frame_filter,
+        include_globals=include_globals,
+        include_closures=include_closures,
+    )
+    return [index.get_names(obj) for obj in objs]
+
+
+def how_many_of_type_exist(cls: type, census: Optional[HeapCensus] = None) -> int:
     """Count how many objects of a given type exist
 
+    Classes decorated with `track_instances` are answered in O(1) from their registry.
+
     Args:
         cls (type): The type to count
+        census (Optional[HeapCensus], optional): A census to answer from instead of scanning the heap. Defaults to None.
 
     Returns:
         int: The number of objects of the given type that exist
     """
+    if census is not None:
+        return census.count(cls)
+    if cls in _instance_registries:
+        return _instance_registries[cls].live
     return sum(isinstance(obj, cls) for obj in gc.get_objects())
 
 
@@ -69,3 +184,168 @@ def how_many_of_my_type_exist(me: object) -> int:
         int: The number of objects of the same type as me that exist
     """
     return how_many_of_type_exist(type(me))
+
+
+class InstanceRegistry:
+    """Tracks the live instances of a class registered with `track_instances`
+
+    All statistics are maintained as instances are created and destroyed so reading them is O(1).
+
+    Args:
+        cls (type): The class being tracked
+    """
+
+    def __init__(self, cls: type):
+        self.name = cls.__qualname__
+        self.created = 0
+        self.destroyed = 0
+        self.high_water_mark = 0
+        self.start_time = time.monotonic()
+        self._live: Dict[int, Optional[weakref.ref]] = {}
+
+    @property
+    def live(self) -> int:
+        """The number of instances that currently exist"""
+        return len(self._live)
+
+    def _register(self, obj: object, weakrefable: bool) -> None:
+        key = id(obj)
+        if key in self._live:
+            # already registered, e.g. by a tracked subclass calling super().__new__
+            return
+        self._live[key] = (
+            weakref.ref(obj, partial(self._unregister, key)) if weakrefable else None
+        )
+        self.created += 1
+        if len(self._live) > self.high_water_mark:
+            self.high_water_mark = len(self._live)
+
+    def _unregister(self, key: int, _ref: Optional[weakref.ref] = None) -> None:
+        if self._live.pop(key, False) is not False:
+            self.destroyed += 1
+
+    def get_instances(self) -> List[object]:
+        """Get the live instances, only possible for classes that support weak references
+
+        Raises:
+            TypeError: If the class does not support weak references
+
+        Returns:
+            List[object]: The live instances
+        """
+        refs = list(self._live.values())
+        if refs and refs[0] is None:
+            raise TypeError(
+                f"Instances of '{self.name}' do not support weak references so cannot be retrieved"
+            )
+        instances = [ref() for ref in refs]
+        return [instance for instance in instances if instance is not None]
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get the instance statistics for the class
+
+        Returns:
+            Dict[str, float]: The live count, high water mark, totals, and rates per second since tracking started
+        """
+        elapsed = max(time.monotonic() - self.start_time, 1e-9)
+        return {
+            "live": self.live,
+            "high_water_mark": self.high_water_mark,
+            "created": self.created,
+            "destroyed": self.destroyed,
+            "creation_rate": self.created / elapsed,
+            "destruction_rate": self.destroyed / elapsed,
+        }
+
+    def reset(self) -> None:
+        """Reset the totals, rates, and high water mark, keeping track of the live instances"""
+        self.created = 0
+        self.destroyed = 0
+        self.high_water_mark = self.live
+        self.start_time = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"InstanceRegistry(name={self.name}, live={self.live}, high_water_mark={self.high_water_mark}, created={self.created}, destroyed={self.destroyed})"
+
+
+_instance_registries: "weakref.WeakKeyDictionary[type, InstanceRegistry]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def track_instances(cls: type) -> type:
+    """Class decorator that keeps a live count of instances of a class as they are created and destroyed
+
+    Instances are registered by `__new__`, so instances of subclasses are counted even if they override
+    `__init__` without calling `super().__init__()`, and instances created by `copy` or `pickle`. Classes that support weak references are tracked with
+    weak references, classes with `__slots__` and no `__weakref__` slot are tracked with a `__del__` hook.
+
+    Args:
+        cls (type): The class to track
+
+    Returns:
+        type: The same class, with instance tracking enabled
+
+    Examples:
+        >>> @track_instances
+        ... class MyClass:
+        ...     pass
+        >>> my_instance = MyClass()
+        >>> get_instance_registry(MyClass).live
+        1
+    """
+    if cls in _instance_registries:
+        return cls
+
+    registry = InstanceRegistry(cls)
+    _instance_registries[cls] = registry
+    weakrefable = cls.__weakrefoffset__ != 0
+    original_new = cls.__new__
+
+    @wraps(original_new)
+    def __new__(subclass, *args, **kwargs):
+        if original_new is object.__new__:
+            # object.__new__ rejects arguments once __new__ is overridden, so check them as it
+            # would for a class that does not override it, and leave them to __init__
+            if (args or kwargs) and subclass.__init__ is object.__init__:
+                raise TypeError(f"{subclass.__name__}() takes no arguments")
+            instance = original_new(subclass)
+        else:
+            instance = original_new(subclass, *args, **kwargs)
+        if isinstance(instance, cls):
+            registry._register(instance, weakrefable)
+        return instance
+
+    cls.__new__ = staticmethod(__new__)
+
+    if not weakrefable:
+        original_del = getattr(cls, "__del__", None)
+
+        def __del__(self):
+            registry._unregister(id(self))
+            if original_del is not None:
+                original_del(self)
+
+        cls.__del__ = __del__
+
+    return cls
+
+
+def get_instance_registry(cls: type) -> InstanceRegistry:
+    """Get the registry of a class decorated with `track_instances`
+
+    Args:
+        cls (type): The tracked class
+
+    Raises:
+        ValueError: If the class is not tracked
+
+    Returns:
+        InstanceRegistry: The registry of live instances for the class
+    """
+    try:
+        return _instance_registries[cls]
+    except KeyError:
+        raise ValueError(
+            f"Class '{cls.__qualname__}' is not tracked, decorate it with track_instances"
+        ) from None
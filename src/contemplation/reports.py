@@ -0,0 +1,170 @@
+import csv
+import fnmatch
+import heapq
+import itertools
+import json
+import re
+import sys
+from operator import itemgetter
+from typing import Any, Callable, Iterable, List, Optional, Sequence, TextIO, Tuple
+
+OUTPUT_FORMATS = ("text", "csv", "json")
+
+
+class Column:
+    """A column of a `Report`
+
+    Args:
+        key (str): The name of the column in CSV and JSON output, and for sorting
+        header (str): The header of the column in text output
+        format_spec (str, optional): The format spec of the values in text output, e.g. ".6f". Defaults to "".
+        formatter (Optional[Callable[[Any], str]], optional): A function formatting the values in text output, instead of the format spec. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        header: str,
+        format_spec: str = "",
+        formatter: Optional[Callable[[Any], str]] = None,
+    ):
+        self.key = key
+        self.header = header
+        self.format_spec = format_spec
+        self.formatter = formatter
+
+    def __repr__(self) -> str:
+        return f"Column(key={self.key}, header={self.header}, format_spec={self.format_spec})"
+
+
+class Report:
+    """A table of rows, one per function or event, that can be sorted, filtered, cut to the top N and rendered as text, CSV or JSON
+
+    Rows are tuples in the order of the columns, and the first column is the name that patterns are
+    matched against. Rows may be a generator, they are only read once when the report is rendered. CSV
+    and JSON are streamed to the file row by row, text output keeps the formatted rows to align the
+    columns, computing the widths as the rows are formatted.
+
+    Args:
+        columns (Sequence[Column]): The columns of the report
+        rows (Iterable[Tuple[Any, ...]]): The rows of the report
+
+    Examples:
+        >>> report = execution_timer.get_report()
+        >>> report.render(sort_by="total_time", top=10)
+        >>> with open("times.csv", "w") as f:
+        ...     report.render(f, output_format="csv", pattern="myapp.*")
+    """
+
+    def __init__(self, columns: Sequence[Column], rows: Iterable[Tuple[Any, ...]]):
+        self.columns = tuple(columns)
+        self.rows = rows
+
+    def _column_index(self, key: str) -> int:
+        for i, column in enumerate(self.columns):
+            if column.key == key:
+                return i
+        raise ValueError(
+            f"Unknown column '{key}', expected one of {[c.key for c in self.columns]}"
+        )
+
+    def select(
+        self,
+        sort_by: Optional[str] = None,
+        descending: bool = True,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+    ) -> Iterable[Tuple[Any, ...]]:
+        """Get the rows of the report after filtering, sorting and cutting to the top N
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by. Defaults to None for the order the rows were recorded in.
+            descending (bool, optional): Whether to sort largest first. Defaults to True.
+            top (Optional[int], optional): The number of rows to keep, the largest when sorting, selected with a heap rather than a full sort. Defaults to None for all.
+            pattern (Optional[str], optional): Only keep rows whose name matches this glob pattern. Defaults to None.
+
+        Returns:
+            Iterable[Tuple[Any, ...]]: The selected rows
+        """
+        rows = self.rows
+        if pattern is not None:
+            match = re.compile(fnmatch.translate(pattern)).match
+            rows = (row for row in rows if match(str(row[0])))
+        if sort_by is None:
+            if top is not None:
+                rows = itertools.islice(rows, top)
+            return rows
+
+        key = itemgetter(self._column_index(sort_by))
+        if top is not None:
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(top, rows, key=key)
+        return sorted(rows, key=key, reverse=descending)
+
+    def render(
+        self,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+        sort_by: Optional[str] = None,
+        descending: bool = True,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+    ) -> None:
+        """Write the report
+
+        Args:
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text" for an aligned table, "csv", or "json" for a list of objects. Defaults to "text".
+            sort_by (Optional[str], optional): The key of the column to sort by. Defaults to None for the order the rows were recorded in.
+            descending (bool, optional): Whether to sort largest first. Defaults to True.
+            top (Optional[int], optional): The number of rows to write. Defaults to None for all.
+            pattern (Optional[str], optional): Only write rows whose name matches this glob pattern. Defaults to None.
+
+        Raises:
+            ValueError: If the output format or sort column is unknown
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"output_format must be one of {OUTPUT_FORMATS}, not '{output_format}'"
+            )
+        if file is None:
+            file = sys.stdout
+        rows = self.select(sort_by, descending, top, pattern)
+
+        if output_format == "csv":
+            writer = csv.writer(file)
+            writer.writerow([c.key for c in self.columns])
+            writer.writerows(rows)
+        elif output_format == "json":
+            keys = [c.key for c in self.columns]
+            separator = "\n"
+            file.write("[")
+            for row in rows:
+                file.write(separator + json.dumps(dict(zip(keys, row))))
+                separator = ",\n"
+            file.write("\n]\n")
+        else:
+            self._render_text(file, rows)
+
+    def _render_text(self, file: TextIO, rows: Iterable[Tuple[Any, ...]]) -> None:
+        formatters = [
+            c.formatter or (lambda value, spec=c.format_spec: format(value, spec))
+            for c in self.columns
+        ]
+        widths = [len(c.header) for c in self.columns]
+        lines: List[List[str]] = []
+        for row in rows:
+            cells = [formatter(value) for value, formatter in zip(row, formatters)]
+            for i, cell in enumerate(cells):
+                if len(cell) > widths[i]:
+                    widths[i] = len(cell)
+            lines.append(cells)
+
+        write = file.write
+        write(" | ".join(f"{c.header:<{w}}" for c, w in zip(self.columns, widths)))
+        write("\n" + "-" * (sum(widths) + 3 * (len(widths) - 1)) + "\n")
+        for cells in lines:
+            write(" | ".join(f"{v:<{w}}" for v, w in zip(cells, widths)) + "\n")
+
+    def __repr__(self) -> str:
+        return f"Report(columns={[c.key for c in self.columns]})"
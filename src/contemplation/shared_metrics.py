@@ -0,0 +1,545 @@
+import atexit
+import bisect
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from .execution_introspections import (
+    DEFAULT_LATENCY_BUCKETS,
+    CallCounter,
+    ExecutionTimer,
+)
+from .reports import Column, Report
+
+_MAGIC = b"CONTEMPL"
+_VERSION = 2
+# magic, version, number of histogram buckets including +Inf, slot capacity, slots used, generation
+_HEADER = struct.Struct("<8sIIIIQ")
+_GENERATION = struct.Struct("<Q")
+_GENERATION_OFFSET = 24
+_USED_OFFSET = 20
+_NAME_SIZE = 126
+# longer names are stored after the slots, and the slot holds this length and the name's offset and length
+_OVERFLOW = 0xFFFF
+_OVERFLOW_NAME = struct.Struct("<QQ")
+
+
+def _slot_struct(n_buckets: int) -> struct.Struct:
+    # name length, name, calls, timed calls, total time, histogram
+    return struct.Struct(f"<H{_NAME_SIZE}sQQd{n_buckets}Q")
+
+
+class _FunctionSlot:
+    __slots__ = (
+        "name",
+        "name_length",
+        "encoded_name",
+        "index",
+        "count",
+        "count_base",
+        "last_count",
+        "resets",
+        "times",
+        "cursor",
+        "timed_calls",
+        "total_time",
+        "bucket_counts",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        name_length: int,
+        encoded_name: bytes,
+        index: int,
+        n_buckets: int,
+    ):
+        self.name = name
+        self.name_length = name_length
+        self.encoded_name = encoded_name
+        self.index = index
+        self.count = 0
+        self.count_base = 0
+        self.last_count = 0
+        self.resets = 0
+        self.times: Optional[List[float]] = None
+        self.cursor = 0
+        self.timed_calls = 0
+        self.total_time = 0.0
+        self.bucket_counts = [0] * n_buckets
+
+
+class SharedMetricsWriter:
+    """Publishes the counts and times of one process into a memory mapped table that other processes can read
+
+    Each process writes its own file in a shared directory, a table with a slot of calls, total time and a
+    histogram per function, so processes never contend with each other. Use a `SharedMetricsAggregator`
+    in any process to merge the tables of every worker, for example the workers of a prefork server.
+
+    The wrapped functions are not slowed down, the counts and times are copied into the table by `flush`,
+    which can be run periodically from a background thread with `start`. Only the calls made since the
+    previous flush are added to the histograms. The published totals only ever increase, even if the
+    counter or timer is reset, but calls made between the last flush and a reset are lost, so flush
+    before resetting.
+
+    Create the writer in each worker after it has been forked, otherwise the counts inherited from the
+    parent are published again by every worker.
+
+    Args:
+        directory (str): The directory shared by all processes, which must exist
+        call_counter (Optional[CallCounter], optional): The counts to publish. Defaults to None.
+        execution_timer (Optional[ExecutionTimer], optional): The times to publish. Defaults to None.
+        buckets (Sequence[float], optional): Upper bounds in seconds of the histogram buckets, which must be the same in every process. Defaults to DEFAULT_LATENCY_BUCKETS.
+        capacity (int, optional): The initial number of function slots, the table grows when it is full. Defaults to 256.
+
+    Examples:
+        >>> introspector = Introspector()
+        >>> writer = SharedMetricsWriter("/tmp/metrics", introspector.call_counter, introspector.execution_timer)
+        >>> writer.start(interval=1.0)
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        call_counter: Optional[CallCounter] = None,
+        execution_timer: Optional[ExecutionTimer] = None,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        capacity: int = 256,
+    ):
+        self.directory = directory
+        self.call_counter = call_counter
+        self.execution_timer = execution_timer
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.pid = os.getpid()
+        self.path = os.path.join(directory, f"contemplation-{self.pid}.metrics")
+        self._bounds = struct.Struct(f"<{len(self.buckets) - 1}d")
+        self._slot = _slot_struct(len(self.buckets))
+        self._data_offset = _HEADER.size + self._bounds.size
+        self._slots: Dict[str, _FunctionSlot] = {}
+        self._names = bytearray()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._file = open(self.path, "w+b")
+        self._capacity = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._resize(capacity)
+
+    def _resize(self, capacity: int) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        names_offset = self._data_offset + capacity * self._slot.size
+        self._file.truncate(names_offset + len(self._names))
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._capacity = capacity
+        # the long names move when the table grows, so readers retry until they are rewritten
+        self._generation += 1
+        _HEADER.pack_into(
+            self._mmap,
+            0,
+            _MAGIC,
+            _VERSION,
+            len(self.buckets),
+            capacity,
+            len(self._slots),
+            self._generation,
+        )
+        self._bounds.pack_into(self._mmap, _HEADER.size, *self.buckets[:-1])
+        self._mmap[names_offset:] = self._names
+        self._generation += 1
+        _GENERATION.pack_into(self._mmap, _GENERATION_OFFSET, self._generation)
+
+    def _get_slot(self, name: str) -> _FunctionSlot:
+        slot = self._slots.get(name)
+        if slot is None:
+            encoded_name = name.encode("utf-8")
+            name_length = len(encoded_name)
+            capacity = self._capacity
+            if len(self._slots) == capacity:
+                capacity *= 2
+            if name_length > _NAME_SIZE:
+                offset = len(self._names)
+                self._names += encoded_name
+                name_length = _OVERFLOW
+                encoded_name = _OVERFLOW_NAME.pack(offset, len(encoded_name))
+            if capacity != self._capacity or name_length == _OVERFLOW:
+                self._resize(capacity)
+            slot = self._slots[name] = _FunctionSlot(
+                name, name_length, encoded_name, len(self._slots), len(self.buckets)
+            )
+        return slot
+
+    def flush(self) -> None:
+        """Copy the current counts and times into the shared table"""
+        with self._lock:
+            changed = set()
+            if self.call_counter is not None:
+                resets = self.call_counter.resets
+                for name, count in list(self.call_counter.counts.items()):
+                    slot = self._get_slot(name)
+                    if slot.resets != resets:
+                        # the counter was reset, keep publishing a running total
+                        slot.count_base += slot.last_count
+                        slot.resets = resets
+                    slot.last_count = count
+                    if slot.count_base + count != slot.count:
+                        slot.count = slot.count_base + count
+                        changed.add(slot)
+
+            if self.execution_timer is not None:
+                buckets = self.buckets
+                for name, times in list(self.execution_timer.times.items()):
+                    slot = self._get_slot(name)
+                    if slot.times is not times:
+                        slot.times = times
+                        slot.cursor = 0
+                    n_times = len(times)
+                    if n_times == slot.cursor:
+                        continue
+                    new_times = times[slot.cursor : n_times]
+                    for elapsed_time in new_times:
+                        slot.bucket_counts[
+                            bisect.bisect_left(buckets, elapsed_time)
+                        ] += 1
+                    slot.timed_calls += len(new_times)
+                    slot.total_time += sum(new_times)
+                    slot.cursor = n_times
+                    changed.add(slot)
+
+            if not changed:
+                return
+            # readers retry while the generation is odd or changes during their read
+            self._generation += 1
+            _GENERATION.pack_into(self._mmap, _GENERATION_OFFSET, self._generation)
+            for slot in changed:
+                self._slot.pack_into(
+                    self._mmap,
+                    self._data_offset + slot.index * self._slot.size,
+                    slot.name_length,
+                    slot.encoded_name,
+                    slot.count,
+                    slot.timed_calls,
+                    slot.total_time,
+                    *slot.bucket_counts,
+                )
+            struct.pack_into("<I", self._mmap, _USED_OFFSET, len(self._slots))
+            self._generation += 1
+            _GENERATION.pack_into(self._mmap, _GENERATION_OFFSET, self._generation)
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def start(self, interval: float = 1.0) -> None:
+        """Flush from a background thread every `interval` seconds, and when the process exits
+
+        Args:
+            interval (float, optional): The time in seconds between flushes. Defaults to 1.0.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(interval,),
+            name="contemplation-shared-metrics",
+            daemon=True,
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stop the background thread and flush one last time"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            atexit.unregister(self.stop)
+        if self._mmap is not None:
+            self.flush()
+
+    def close(self, remove: bool = False) -> None:
+        """Stop, flush and close the table
+
+        Args:
+            remove (bool, optional): Whether to delete the table so its totals are no longer aggregated. Defaults to False.
+        """
+        if self._mmap is None:
+            return
+        self.stop()
+        self._mmap.close()
+        self._mmap = None
+        self._file.close()
+        if remove:
+            os.remove(self.path)
+
+    def __enter__(self) -> "SharedMetricsWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<SharedMetricsWriter path={self.path} functions={len(self._slots)}>"
+
+
+class SharedFunctionMetrics:
+    """The counts and times of a single function, merged across processes
+
+    Args:
+        name (str): The name of the function
+        buckets (Tuple[float, ...]): Upper bounds in seconds of the histogram buckets, ending with +Inf
+    """
+
+    def __init__(self, name: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.buckets = buckets
+        self.processes = 0
+        self.count = 0
+        self.timed_calls = 0
+        self.total_time = 0.0
+        self.bucket_counts = [0] * len(buckets)
+
+    @property
+    def average_time(self) -> float:
+        """The average time of the timed calls"""
+        return self.total_time / self.timed_calls if self.timed_calls else 0.0
+
+    def get_histogram(self) -> Dict[float, int]:
+        """Get the number of timed calls in each histogram bucket
+
+        Returns:
+            Dict[float, int]: A dictionary of bucket upper bounds in seconds to the number of calls in that bucket
+        """
+        return dict(zip(self.buckets, self.bucket_counts))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "processes": self.processes,
+            "count": self.count,
+            "timed_calls": self.timed_calls,
+            "total_time": self.total_time,
+            "average_time": self.average_time,
+        }
+
+    def __repr__(self) -> str:
+        return f"SharedFunctionMetrics(name={self.name}, processes={self.processes}, count={self.count}, timed_calls={self.timed_calls}, total_time={self.total_time})"
+
+
+def _read_table(path: str, retries: int = 100) -> Optional[Tuple[tuple, list]]:
+    for _ in range(retries):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+                if len(data) < _HEADER.size:
+                    return None
+                magic, version, n_buckets, capacity, used, generation = (
+                    _HEADER.unpack_from(data)
+                )
+                if magic != _MAGIC or version != _VERSION:
+                    return None
+                f.seek(_GENERATION_OFFSET)
+                generation_after = _GENERATION.unpack(f.read(_GENERATION.size))[0]
+        except FileNotFoundError:
+            return None
+
+        bounds = struct.Struct(f"<{n_buckets - 1}d")
+        slot = _slot_struct(n_buckets)
+        data_offset = _HEADER.size + bounds.size
+        names_offset = data_offset + capacity * slot.size
+        if (
+            generation % 2
+            or generation != generation_after
+            or len(data) < data_offset + used * slot.size
+        ):
+            # a flush or resize was in progress
+            time.sleep(0.001)
+            continue
+
+        buckets = bounds.unpack_from(data, _HEADER.size) + (float("inf"),)
+        rows = []
+        for i in range(used):
+            name_length, name, count, timed_calls, total_time, *bucket_counts = (
+                slot.unpack_from(data, data_offset + i * slot.size)
+            )
+            if not name_length:
+                # allocated but not written yet
+                continue
+            if name_length == _OVERFLOW:
+                offset, name_length = _OVERFLOW_NAME.unpack_from(name)
+                name = data[names_offset + offset : names_offset + offset + name_length]
+                if len(name) != name_length:
+                    # the table grew while it was read
+                    break
+            rows.append(
+                (
+                    name[:name_length].decode("utf-8"),
+                    count,
+                    timed_calls,
+                    total_time,
+                    bucket_counts,
+                )
+            )
+        else:
+            return buckets, rows
+        time.sleep(0.001)
+    raise TimeoutError(f"Could not get a consistent read of {path}")
+
+
+class SharedMetricsAggregator:
+    """Merges the counts and times published by the `SharedMetricsWriter` of every process
+
+    The tables of processes that have exited are still included, so totals do not drop when a worker is
+    replaced. Pass an aggregator to `OpenMetricsExporter` to export the merged metrics.
+
+    Args:
+        directory (str): The directory the writers publish into
+
+    Examples:
+        >>> aggregator = SharedMetricsAggregator("/tmp/metrics")
+        >>> aggregator.get_counts()
+        {'my_func': 1000}
+        >>> aggregator.pretty_print_stats()
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def collect(self) -> Dict[str, SharedFunctionMetrics]:
+        """Read and merge the tables of every process
+
+        Raises:
+            ValueError: If the processes use different histogram buckets
+
+        Returns:
+            Dict[str, SharedFunctionMetrics]: A dictionary of function names to their merged metrics
+        """
+        metrics: Dict[str, SharedFunctionMetrics] = {}
+        buckets = None
+        for path in sorted(
+            glob.glob(os.path.join(self.directory, "contemplation-*.metrics"))
+        ):
+            table = _read_table(path)
+            if table is None:
+                continue
+            table_buckets, rows = table
+            if buckets is None:
+                buckets = table_buckets
+            elif table_buckets != buckets:
+                raise ValueError(
+                    f"{path} uses different histogram buckets to the other processes"
+                )
+            for name, count, timed_calls, total_time, bucket_counts in rows:
+                function_metrics = metrics.get(name)
+                if function_metrics is None:
+                    function_metrics = metrics[name] = SharedFunctionMetrics(
+                        name, buckets
+                    )
+                function_metrics.processes += 1
+                function_metrics.count += count
+                function_metrics.timed_calls += timed_calls
+                function_metrics.total_time += total_time
+                for i, n in enumerate(bucket_counts):
+                    function_metrics.bucket_counts[i] += n
+        return metrics
+
+    def get_counts(self) -> Dict[str, int]:
+        """Get the counts of all functions summed across processes
+
+        Returns:
+            Dict[str, int]: A dictionary of function names to their counts
+        """
+        return {
+            name: metrics.count
+            for name, metrics in self.collect().items()
+            if metrics.count
+        }
+
+    def get_execution_times(self) -> Dict[str, float]:
+        """Get the execution times of all functions summed across processes
+
+        Returns:
+            Dict[str, float]: A dictionary of function names to their execution times
+        """
+        return {
+            name: metrics.total_time
+            for name, metrics in self.collect().items()
+            if metrics.timed_calls
+        }
+
+    def get_function_metrics(self, func: Union[Callable, str]) -> SharedFunctionMetrics:
+        """Get the merged metrics of a specific function
+
+        Args:
+            func (Union[Callable, str]): The function to get the metrics for, as an instance of the function or the name of the function
+
+        Raises:
+            KeyError: If no process has published the function
+
+        Returns:
+            SharedFunctionMetrics: The merged counts, times and histogram of the function
+        """
+        if isinstance(func, str):
+            name = func
+        else:
+            name = func.__name__
+        return self.collect()[name]
+
+    def get_report(self) -> Report:
+        """Get a report of the merged counts and times of every function, with the columns name, processes,
+        count, total_time and average_time
+
+        Returns:
+            Report: The report
+        """
+        return Report(
+            (
+                Column("name", "Function"),
+                Column("processes", "Processes"),
+                Column("count", "Count"),
+                Column("total_time", "Total Time (s)", ".6f"),
+                Column("average_time", "Average Time (s)", ".6f"),
+            ),
+            [
+                (m.name, m.processes, m.count, m.total_time, m.average_time)
+                for m in self.collect().values()
+            ],
+        )
+
+    def pretty_print_stats(
+        self,
+        sort_by: Optional[str] = None,
+        top: Optional[int] = None,
+        pattern: Optional[str] = None,
+        file: Optional[TextIO] = None,
+        output_format: str = "text",
+    ) -> None:
+        """Print the merged counts and times of every function in a nice table
+
+        Args:
+            sort_by (Optional[str], optional): The key of the column to sort by, largest first. Defaults to None for the order the functions were found in.
+            top (Optional[int], optional): The number of rows to print. Defaults to None for all.
+            pattern (Optional[str], optional): Only print functions whose name matches this glob pattern. Defaults to None.
+            file (Optional[TextIO], optional): The file to write to. Defaults to None for stdout.
+            output_format (str, optional): "text", "csv" or "json". Defaults to "text".
+        """
+        self.get_report().render(
+            file, output_format, sort_by=sort_by, top=top, pattern=pattern
+        )
@@ -0,0 +1,159 @@
+import json
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+WORK_MODULE = '''
+"""Some work"""
+from __future__ import annotations
+
+import time
+
+
+class Worker:
+    def __init__(self, n: int):
+        self.n = n
+
+    @property
+    def double(self) -> int:
+        return self.n * 2
+
+    def run(self) -> int:
+        return sum(step(i) for i in range(self.n))
+
+
+def step(i: int) -> int:
+    return i
+
+
+def items(n: int):
+    yield from range(n)
+
+
+async def fetch(n: int) -> int:
+    return n
+'''
+
+JOB_SCRIPT = """
+import asyncio
+import sys
+
+from myapp.work import Worker, fetch, items
+
+
+def main():
+    worker = Worker(int(sys.argv[1]))
+    print(worker.run(), worker.double, sum(items(3)), asyncio.run(fetch(4)))
+
+
+if __name__ == "__main__":
+    main()
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "myapp").mkdir()
+    (tmp_path / "myapp" / "__init__.py").write_text("")
+    (tmp_path / "myapp" / "work.py").write_text(WORK_MODULE)
+    (tmp_path / "myapp" / "__main__.py").write_text(JOB_SCRIPT)
+    (tmp_path / "job.py").write_text(JOB_SCRIPT)
+    return tmp_path
+
+
+def _run(project, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "contemplation", *args],
+        cwd=project,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_profile_script(project):
+    result = _run(
+        project,
+        "--include",
+        "myapp.*",
+        "--exclude",
+        "*.double",
+        "--sample",
+        "--heap",
+        "--snapshot",
+        "snapshot.json",
+        "job.py",
+        "10",
+    )
+    assert result.stdout.strip() == "45 20 3 4"
+    assert "Samples" in result.stderr
+    assert "Heap" in result.stderr
+
+    functions = json.loads((project / "snapshot.json").read_text())["functions"]
+    assert functions["myapp.work.step"]["count"] == 10
+    assert functions["myapp.work.Worker.run"]["count"] == 1
+    assert functions["myapp.work.items"]["count"] == 1
+    assert functions["myapp.work.fetch"]["count"] == 1
+    assert functions["__main__.main"]["count"] == 1
+    assert "myapp.work.Worker.double" not in functions
+
+
+def test_profile_module(project):
+    result = _run(project, "--no-time", "-o", "report.txt", "-m", "myapp", "5")
+    assert result.stdout.strip() == "10 10 3 4"
+    report = (project / "report.txt").read_text()
+    # only the module being run is instrumented without --include
+    assert "__main__.main" in report
+    assert "myapp.work.step" not in report
+
+
+def test_report_top_functions(project):
+    _run(
+        project,
+        "--include",
+        "myapp.*",
+        "--sort",
+        "count",
+        "--top",
+        "1",
+        "-o",
+        "report.txt",
+        "job.py",
+        "10",
+    )
+    lines = (project / "report.txt").read_text().splitlines()
+    assert len(lines) == 4
+    assert lines[3].startswith("myapp.work.step ")
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="requires SIGUSR1")
+def test_report_on_signal(project):
+    (project / "loop.py").write_text(textwrap.dedent("""
+            import time
+
+
+            def tick():
+                time.sleep(0.01)
+
+
+            for _ in range(300):
+                tick()
+            """))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "contemplation", "-o", "report.txt", "loop.py"],
+        cwd=project,
+    )
+    report = project / "report.txt"
+    time.sleep(1.0)
+    process.send_signal(signal.SIGUSR1)
+    for _ in range(100):
+        if report.exists() and "tick" in report.read_text():
+            break
+        time.sleep(0.05)
+    assert "__main__.tick" in report.read_text()
+    process.kill()
+    process.wait()
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+
+from contemplation import LockMonitor
+
+
+def test_lock_contention():
+    lock_monitor = LockMonitor()
+    lock = lock_monitor.lock()
+
+    def hold():
+        with lock:
+            time.sleep(0.05)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    time.sleep(0.01)
+    with lock:
+        pass
+    thread.join()
+
+    (stats,) = lock_monitor.get_lock_stats().values()
+    assert "test_concurrency.py" in stats["site"]
+    assert stats["acquisitions"] == 2
+    assert stats["contentions"] == 1
+    assert stats["total_wait_time"] > 0.01
+    assert stats["total_hold_time"] > 0.04
+
+
+def test_rlock_and_condition():
+    lock_monitor = LockMonitor()
+    rlock = lock_monitor.rlock(site="my_rlock")
+
+    with rlock:
+        with rlock:
+            assert rlock.locked()
+    assert not rlock.locked()
+    assert lock_monitor.get_lock_stats()["my_rlock"]["acquisitions"] == 1
+
+    condition = lock_monitor.condition(site="my_condition")
+    items = []
+
+    def produce():
+        time.sleep(0.01)
+        with condition:
+            items.append(1)
+            condition.notify()
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    with condition:
+        assert condition.wait_for(lambda: items, timeout=5)
+    thread.join()
+
+    assert lock_monitor.get_lock_stats()["my_condition"]["acquisitions"] >= 2
+
+
+def test_patch_module(capsys):
+    import queue
+
+    lock_monitor = LockMonitor()
+    with lock_monitor.patch(queue):
+        q = queue.Queue()
+        q.put(1)
+        assert q.get() == 1
+    assert queue.threading is threading
+
+    stats = lock_monitor.get_lock_stats()
+    assert len(stats) == 1
+    assert "queue.py" in next(iter(stats))
+    assert next(iter(stats.values()))["acquisitions"] >= 2
+
+    lock_monitor.pretty_print_locks()
+    assert "Lock Site" in capsys.readouterr().out
+
+
+def test_condition_wait_contention():
+    lock_monitor = LockMonitor()
+    condition = lock_monitor.condition(site="my_condition")
+    rlock = condition._lock
+
+    # reacquiring a free lock after a wait is not a contention, and restores the recursion depth
+    with condition:
+        with condition:
+            assert not condition.wait(timeout=0.01)
+            assert rlock._depth == 2
+        assert rlock.locked()
+    assert not rlock.locked()
+    stats = lock_monitor.get_lock_stats()["my_condition"]
+    assert stats["acquisitions"] == 2
+    assert stats["contentions"] == 0
+
+    def hold():
+        with condition:
+            condition.notify()
+            time.sleep(0.05)
+
+    with condition:
+        thread = threading.Thread(target=hold)
+        thread.start()
+        assert condition.wait(timeout=5)
+    thread.join()
+    stats = lock_monitor.get_lock_stats()["my_condition"]
+    assert stats["contentions"] >= 1
+    assert stats["total_wait_time"] > 0.03
+
+
+def test_lock_stats_threads():
+    lock_monitor = LockMonitor()
+    locks = [lock_monitor.lock(site="shared") for _ in range(8)]
+
+    def work(lock):
+        for _ in range(10_000):
+            with lock:
+                pass
+
+    threads = [threading.Thread(target=work, args=(lock,)) for lock in locks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert lock_monitor.get_lock_stats()["shared"]["acquisitions"] == 80_000
+
+
+def test_release_unowned():
+    lock_monitor = LockMonitor()
+    lock = lock_monitor.lock(site="lock")
+    rlock = lock_monitor.rlock(site="rlock")
+
+    with pytest.raises(RuntimeError):
+        lock.release()
+
+    errors = []
+
+    def release():
+        try:
+            rlock.release()
+        except RuntimeError as e:
+            errors.append(e)
+
+    with rlock:
+        thread = threading.Thread(target=release)
+        thread.start()
+        thread.join()
+        assert len(errors) == 1
+        assert rlock.locked()
+    assert not rlock.locked()
+
+    stats = lock_monitor.get_lock_stats()
+    assert stats["lock"]["total_hold_time"] == 0.0
+    assert stats["rlock"]["acquisitions"] == 1
+    assert stats["rlock"]["max_hold_time"] > 0.0
@@ -1,6 +1,21 @@
+import gc
+import time
+import tracemalloc
+
 import pytest
 
-from contemplation import CallCounter, ExecutionTimer, FunctionLogger, FunctionEvent
+from contemplation import (
+    CallCounter,
+    ExecutionTimer,
+    FunctionLogger,
+    FunctionEvent,
+    GCMonitor,
+    Introspector,
+    MemoryProfiler,
+    SamplingProfiler,
+    SlidingWindowMonitor,
+    SlidingWindowStats,
+)
 
 
 @pytest.fixture
@@ -121,3 +136,429 @@ def test_function_log_iteration(function_logger: FunctionLogger):
         c += 1
 
     assert c == 100
+
+
+def test_gc_monitor():
+    with GCMonitor() as gc_monitor:
+        gc.collect()
+
+    stats = gc_monitor.get_stats()
+    assert stats[2]["collections"] >= 1
+    assert stats[2]["total_pause_time"] > 0.0
+    assert sum(gc_monitor.get_pause_histogram().values()) == sum(
+        s["collections"] for s in stats.values()
+    )
+
+    gc.collect()
+    assert gc_monitor.get_stats()[2]["collections"] == stats[2]["collections"]
+
+
+def test_execution_timer_gc_attribution(capsys):
+    gc_monitor = GCMonitor()
+    execution_timer = ExecutionTimer(gc_monitor=gc_monitor)
+
+    @execution_timer.time_execution
+    def collects():
+        gc.collect()
+
+    @execution_timer.time_execution
+    def does_not_collect():
+        return 1
+
+    with gc_monitor:
+        collects()
+        does_not_collect()
+
+    assert execution_timer.get_gc_time(collects) > 0.0
+    assert execution_timer.get_gc_time(collects) <= execution_timer.get_execution_time(
+        collects
+    )
+
+    execution_timer.pretty_print_times()
+    assert "Of Which GC (s)" in capsys.readouterr().out
+
+
+def test_memory_profiler_bytes():
+    memory_profiler = MemoryProfiler()
+
+    @memory_profiler.profile_memory
+    def allocates(n: int):
+        return [str(i) for i in range(n)]
+
+    @memory_profiler.profile_memory
+    def temporary(n: int):
+        data = [str(i) for i in range(n)]
+        return len(data)
+
+    try:
+        kept = allocates(10_000)
+        temporary(10_000)
+    finally:
+        tracemalloc.stop()
+
+    allocates_stats = memory_profiler.get_memory_stats(allocates)
+    temporary_stats = memory_profiler.get_memory_stats("temporary")
+    assert allocates_stats.calls == 1
+    assert allocates_stats.max_net > 100_000
+    assert temporary_stats.max_net < allocates_stats.max_net
+    assert temporary_stats.max_peak > 100_000
+    assert memory_profiler.get_top_allocators(1)[0].name == "allocates"
+    assert len(kept) == 10_000
+
+
+def test_memory_profiler_nested_peak():
+    memory_profiler = MemoryProfiler()
+
+    @memory_profiler.profile_memory
+    def inner():
+        return 1
+
+    @memory_profiler.profile_memory
+    def outer():
+        data = [str(i) for i in range(10_000)]
+        del data
+        return inner()
+
+    try:
+        outer()
+    finally:
+        tracemalloc.stop()
+
+    assert memory_profiler.get_memory_stats(outer).max_peak > 100_000
+
+
+def test_memory_profiler_stops_tracing():
+    memory_profiler = MemoryProfiler()
+
+    @memory_profiler.profile_memory
+    def inner():
+        assert tracemalloc.is_tracing()
+        return [str(i) for i in range(1000)]
+
+    @memory_profiler.profile_memory
+    def outer():
+        kept = inner()
+        assert tracemalloc.is_tracing()
+        return kept
+
+    assert not tracemalloc.is_tracing()
+    assert len(outer()) == 1000
+    assert not tracemalloc.is_tracing()
+    assert memory_profiler.get_memory_stats(inner).max_net > 10_000
+
+    tracemalloc.start()
+    try:
+        outer()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_memory_profiler_blocks_and_lines(capsys):
+    blocks_profiler = MemoryProfiler(mode="blocks")
+    lines_profiler = MemoryProfiler(mode="lines")
+
+    def allocates(n: int):
+        return [str(i) for i in range(n)]
+
+    counted = blocks_profiler.profile_memory(allocates)
+    traced = lines_profiler.profile_memory(allocates)
+
+    kept = counted(1000)
+    assert blocks_profiler.get_memory_stats(allocates).max_net > 500
+    assert not tracemalloc.is_tracing()
+
+    try:
+        kept = traced(1000)
+    finally:
+        tracemalloc.stop()
+    top_lines = lines_profiler.get_memory_stats(allocates).top_lines(1)
+    assert top_lines[0][0].endswith(
+        f"test_execution.py:{allocates.__code__.co_firstlineno + 1}"
+    )
+    assert len(kept) == 1000
+
+    lines_profiler.pretty_print_memory()
+    assert "allocates" in capsys.readouterr().out
+
+    with pytest.raises(ValueError):
+        MemoryProfiler(mode="objects")
+
+
+def test_introspector(capsys):
+    introspector = Introspector(log_calls=True, log_args=True, log_returns=True)
+
+    @introspector.introspect
+    def my_func(a: int, b: int = 0):
+        return a + b
+
+    for i in range(10):
+        my_func(i, b=1)
+
+    assert my_func.__name__ == "my_func"
+    assert introspector.call_counter.get_count(my_func) == 10
+    assert len(introspector.execution_timer.times["my_func"]) == 10
+    assert introspector.execution_timer.get_execution_time("my_func") > 0
+
+    logs = introspector.function_logger.get_logs_by_function_name(my_func)
+    assert len(logs) == 10
+    assert logs[3].function_arguments == {"a": 3, "b": 1}
+    assert logs[3].function_returns == 4
+    assert logs[3].duration == pytest.approx(
+        logs[3].end_time - logs[3].start_time, abs=1e-5
+    )
+    assert logs[3].start_time == pytest.approx(time.time(), abs=60)
+
+    stats = introspector.get_stats()["my_func"]
+    assert stats["count"] == 10
+    assert stats["average_time"] == pytest.approx(stats["total_time"] / 10)
+
+    introspector.pretty_print_stats()
+    assert "my_func" in capsys.readouterr().out
+
+
+def test_introspector_count_only():
+    introspector = Introspector(time_execution=False)
+
+    @introspector.introspect
+    def my_func():
+        return 1
+
+    my_func()
+    assert introspector.get_stats() == {
+        "my_func": {
+            "count": 1,
+            "total_time": 0.0,
+            "average_time": 0.0,
+            "estimated": False,
+        }
+    }
+    assert introspector.function_logger.get_logs() == []
+
+
+def test_introspector_adaptive(capsys):
+    introspector = Introspector(adaptive=True, demote_after=100, sample_every=10)
+    assert introspector.clock_overhead > 0
+    assert introspector.wrapper_overhead > 0
+
+    @introspector.introspect
+    def tiny():
+        return 1
+
+    @introspector.introspect
+    def slow():
+        time.sleep(0.001)
+
+    for _ in range(1100):
+        tiny()
+    for _ in range(100):
+        slow()
+
+    demotions = introspector.get_demotions()
+    assert list(demotions) == ["tiny"]
+    assert demotions["tiny"].mode == "sampled"
+    assert demotions["tiny"].calls == 100
+    assert len(introspector.execution_timer.times["tiny"]) == 200
+    assert len(introspector.execution_timer.times["slow"]) == 100
+
+    stats = introspector.get_stats()
+    assert stats["tiny"]["count"] == 1100
+    assert stats["tiny"]["estimated"]
+    assert stats["tiny"]["total_time"] == pytest.approx(
+        stats["tiny"]["average_time"] * 1100
+    )
+    assert not stats["slow"]["estimated"]
+
+    introspector.pretty_print_stats()
+    assert "tiny was demoted to sampled" in capsys.readouterr().out
+
+
+def test_introspector_adaptive_count_only():
+    introspector = Introspector(adaptive=True, demote_after=10, demoted_mode="count")
+
+    @introspector.introspect
+    def tiny():
+        return 1
+
+    for _ in range(1000):
+        tiny()
+
+    assert introspector.get_demotions()["tiny"].mode == "count"
+    assert len(introspector.execution_timer.times["tiny"]) == 10
+    assert introspector.call_counter.get_count(tiny) == 1000
+
+    with pytest.raises(ValueError):
+        Introspector(demoted_mode="never")
+
+
+def _slow_generator(n: int):
+    for i in range(n):
+        time.sleep(0.002)
+        yield i
+    return "done"
+
+
+def test_execution_timer_generator(execution_timer: ExecutionTimer):
+    generator_function = execution_timer.time_execution(_slow_generator)
+
+    for _ in generator_function(3):
+        time.sleep(0.01)
+
+    generator = generator_function(10)
+    next(generator)
+    generator.close()
+
+    stats = execution_timer.get_generator_stats(generator_function)
+    assert stats.runs == 2
+    assert stats.items == 4
+    assert 0.002 <= stats.average_item_time < 0.01
+    assert 0.002 <= stats.average_first_item_time < 0.01
+    # the time the consumer slept between items is excluded
+    assert 0.008 <= execution_timer.get_execution_time(generator_function) < 0.03
+    assert len(execution_timer.times["_slow_generator"]) == 2
+
+
+def test_function_logger_generator(function_logger: FunctionLogger):
+    generator_function = function_logger.log_function(log_args=True, log_returns=True)(
+        _slow_generator
+    )
+
+    assert list(generator_function(2)) == [0, 1]
+
+    (event,) = function_logger.get_logs()
+    assert event.function_arguments == {"n": 2}
+    assert event.function_returns == "done"
+    assert event.duration >= 0.004
+
+
+def test_introspector_generator_send_and_throw():
+    introspector = Introspector(log_calls=True, log_returns=True)
+
+    @introspector.introspect
+    def echo():
+        value = yield 1
+        try:
+            while True:
+                value = yield value * 2
+        except ValueError:
+            return "stopped"
+
+    generator = echo()
+    assert next(generator) == 1
+    assert generator.send(3) == 6
+    with pytest.raises(StopIteration) as stop:
+        generator.throw(ValueError("stop"))
+    assert stop.value.value == "stopped"
+
+    assert introspector.call_counter.get_count(echo) == 1
+    assert introspector.execution_timer.get_generator_stats(echo).items == 2
+    assert introspector.function_logger.get_logs()[0].function_returns == "stopped"
+
+
+def test_sliding_window_stats():
+    stats = SlidingWindowStats("my_func", window=10.0, resolution=1.0)
+    start_time = stats.start_time
+
+    # 100 calls in each of 9 seconds, 1 in 100 of them slow
+    for second in range(9):
+        for i in range(100):
+            elapsed_time = 0.1 if i == 0 else 0.001
+            stats.record(elapsed_time, now=start_time + second + i / 100)
+
+    now = start_time + 8.999
+    whole_window = stats.get_stats(now=now)
+    assert whole_window["calls"] == 900
+    assert whole_window["rate"] == pytest.approx(100, rel=0.05)
+    assert whole_window["p50"] == pytest.approx(0.001, rel=0.3)
+    assert whole_window["p99"] <= 0.1
+    assert whole_window["max_time"] == 0.1
+    assert 0 < stats.get_stats(1.0, now=now)["calls"] <= 100
+
+    # old buckets are cleared as the window slides over them
+    assert 100 <= stats.get_stats(now=start_time + 15.5)["calls"] < 900
+    assert stats.get_stats(now=start_time + 100)["calls"] == 0
+
+    with pytest.raises(ValueError):
+        stats.get_stats(11.0)
+
+
+def test_sliding_window_monitor(capsys):
+    sliding_window = SlidingWindowMonitor(intervals=(1, 60))
+    introspector = Introspector(sliding_window=sliding_window)
+
+    @introspector.introspect
+    def my_func(a: int, b: int):
+        return a + b
+
+    for i in range(100):
+        my_func(i, i + 1)
+
+    stats = sliding_window.get_window_stats(my_func, 1)
+    assert stats["calls"] == 100
+    assert stats["rate"] > 0
+    assert stats["p99"] <= stats["max_time"]
+    assert sliding_window.get_stats()["my_func"][60]["calls"] == 100
+
+    sliding_window.pretty_print_windows()
+    assert "Calls/s (1m)" in capsys.readouterr().out
+
+    snapshot = introspector.snapshot_and_reset()
+    assert snapshot["my_func"]["count"] == 100
+    assert introspector.get_stats() == {}
+    assert sliding_window.get_window_stats(my_func)["calls"] == 100
+
+    assert sliding_window.snapshot_and_reset()["my_func"][1]["calls"] == 100
+    assert sliding_window.get_stats() == {}
+
+
+def test_snapshot_and_reset(call_counter: CallCounter, execution_timer: ExecutionTimer):
+    @call_counter.count_calls
+    @execution_timer.time_execution
+    def my_func():
+        pass
+
+    for _ in range(3):
+        my_func()
+
+    assert call_counter.snapshot_and_reset() == {"my_func": 3}
+    assert list(execution_timer.snapshot_and_reset()) == ["my_func"]
+    my_func()
+    assert call_counter.get_count(my_func) == 1
+    assert len(execution_timer.times["my_func"]) == 1
+
+
+def test_sampling_profiler(capsys):
+    def busy():
+        end_time = time.perf_counter() + 0.2
+        while time.perf_counter() < end_time:
+            pass
+
+    with SamplingProfiler(interval=0.001) as sampling_profiler:
+        busy()
+
+    samples = sampling_profiler.get_samples()
+    (busy_name,) = [name for name in samples if name.endswith("(busy)")]
+    assert sampling_profiler.samples > 10
+    assert samples[busy_name]["self_fraction"] > 0.5
+    assert (
+        samples[busy_name]["cumulative_fraction"] >= samples[busy_name]["self_fraction"]
+    )
+
+    sampling_profiler.pretty_print_samples(5)
+    assert "(busy)" in capsys.readouterr().out
+
+
+def test_introspector_coroutine():
+    import asyncio
+
+    introspector = Introspector(log_calls=True, log_returns=True)
+
+    @introspector.introspect
+    async def fetch(n: int) -> int:
+        await asyncio.sleep(0.01)
+        return n
+
+    assert asyncio.run(fetch(3)) == 3
+    assert introspector.call_counter.get_count(fetch) == 1
+    assert introspector.execution_timer.get_execution_time(fetch) >= 0.01
+    assert introspector.function_logger.logs[0].function_returns == 3
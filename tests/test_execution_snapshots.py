@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from contemplation import (
+    CallCounter,
+    ExecutionSnapshot,
+    ExecutionTimer,
+    Introspector,
+    compare_execution_snapshots,
+    load_execution_snapshot,
+    merge_execution_snapshots,
+    take_execution_snapshot,
+)
+
+
+def _snapshot(scale: float, seed: int, n: int = 500) -> ExecutionSnapshot:
+    rng = random.Random(seed)
+    call_counter = CallCounter()
+    execution_timer = ExecutionTimer()
+    for name, median_time in (("fast", 0.001), ("slow", 0.01)):
+        factor = scale if name == "fast" else 1.0
+        execution_timer.times[name] = [
+            rng.lognormvariate(0, 0.5) * median_time * factor for _ in range(n)
+        ]
+        call_counter.counts[name] = n
+    return take_execution_snapshot(call_counter, execution_timer)
+
+
+def test_save_and_load(tmp_path):
+    introspector = Introspector()
+
+    @introspector.introspect
+    def my_func(a: int, b: int):
+        return a + b
+
+    for i in range(100):
+        my_func(i, i + 1)
+
+    snapshot = take_execution_snapshot(
+        introspector.call_counter,
+        introspector.execution_timer,
+        metadata={"commit": "abc123"},
+    )
+    assert snapshot.counts == {"my_func": 100}
+    assert sum(snapshot.get_histogram(my_func).values()) == 100
+
+    for filename in ("snapshot.json", "snapshot.json.gz"):
+        path = str(tmp_path / filename)
+        snapshot.save(path)
+        loaded = load_execution_snapshot(path)
+        assert loaded.to_dict() == snapshot.to_dict()
+        assert loaded.metadata == {"commit": "abc123"}
+        assert loaded.average_time(my_func) == snapshot.average_time(my_func)
+
+    with pytest.raises(ValueError):
+        ExecutionSnapshot.from_dict({**snapshot.to_dict(), "version": 999})
+
+
+def test_merge_snapshots():
+    first, second = _snapshot(1.0, seed=0), _snapshot(1.0, seed=1)
+    merged = merge_execution_snapshots(first, second)
+    assert merged.counts == {"fast": 1000, "slow": 1000}
+    assert merged.timed_calls["fast"] == 1000
+    assert merged.total_times["fast"] == pytest.approx(
+        first.total_times["fast"] + second.total_times["fast"]
+    )
+    assert sum(merged.histograms["slow"]) == 1000
+
+    with pytest.raises(ValueError):
+        first.merge(ExecutionSnapshot(buckets=(0.1, 1.0)))
+
+
+def test_compare_snapshots(capsys):
+    baseline = _snapshot(1.0, seed=0)
+
+    diff = compare_execution_snapshots(baseline, _snapshot(1.5, seed=1))
+    (regression,) = diff.regressions()
+    assert regression.name == "fast"
+    assert regression.change > 0.3
+    assert regression.p_value < 0.01
+    assert regression.probability_slower > 0.6
+    assert diff.improvements() == []
+
+    diff = compare_execution_snapshots(baseline, _snapshot(1.0, seed=2))
+    assert {c.status for c in diff.changes} == {"unchanged"}
+
+    diff = compare_execution_snapshots(_snapshot(1.5, seed=1), baseline)
+    assert [c.name for c in diff.improvements()] == ["fast"]
+    diff.pretty_print()
+    assert "improvement" in capsys.readouterr().out
+
+
+def test_compare_snapshots_zero_baseline():
+    # times can be 0 when the introspection overhead is subtracted
+    call_counter = CallCounter()
+    execution_timer = ExecutionTimer()
+    execution_timer.times["clamped"] = [0.0] * 100
+    call_counter.counts["clamped"] = 100
+    baseline = take_execution_snapshot(call_counter, execution_timer)
+    assert baseline.average_time("clamped") == 0.0
+
+    execution_timer.times["clamped"] = [0.01] * 100
+    diff = compare_execution_snapshots(
+        baseline, take_execution_snapshot(call_counter, execution_timer)
+    )
+    (regression,) = diff.regressions()
+    assert regression.name == "clamped"
+    assert regression.change == float("inf")
+
+    diff = compare_execution_snapshots(baseline, baseline)
+    (change,) = diff.changes
+    assert (change.status, change.change) == ("unchanged", 0.0)
+    diff.pretty_print()
@@ -0,0 +1,115 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from contemplation import Introspector, OpenMetricsExporter
+
+
+def _samples(text: str) -> dict:
+    return dict(
+        line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#")
+    )
+
+
+def test_render_openmetrics():
+    introspector = Introspector()
+    exporter = OpenMetricsExporter(
+        introspector.call_counter, introspector.execution_timer, buckets=(0.001, 1.0)
+    )
+
+    @introspector.introspect
+    def my_func(a: int, b: int):
+        return a + b
+
+    for i in range(10):
+        my_func(i, i + 1)
+
+    text = exporter.render()
+    assert text.endswith("# EOF\n")
+    assert "# TYPE contemplation_function_calls counter" in text
+    assert "# TYPE contemplation_function_duration_seconds histogram" in text
+    samples = _samples(text)
+    assert samples['contemplation_function_calls_total{function="my_func"}'] == "10"
+    assert (
+        samples[
+            'contemplation_function_duration_seconds_bucket{function="my_func",le="1.0"}'
+        ]
+        == "10"
+    )
+    assert (
+        samples[
+            'contemplation_function_duration_seconds_bucket{function="my_func",le="+Inf"}'
+        ]
+        == "10"
+    )
+    assert (
+        samples['contemplation_function_duration_seconds_count{function="my_func"}']
+        == "10"
+    )
+
+    # only the new calls are added to the histogram
+    for i in range(5):
+        my_func(i, i + 1)
+    samples = _samples(exporter.render())
+    assert samples['contemplation_function_calls_total{function="my_func"}'] == "15"
+    assert (
+        samples['contemplation_function_duration_seconds_count{function="my_func"}']
+        == "15"
+    )
+
+    introspector.reset()
+    my_func(1, 2)
+    samples = _samples(exporter.render())
+    assert (
+        samples['contemplation_function_duration_seconds_count{function="my_func"}']
+        == "1"
+    )
+
+
+def test_label_escaping():
+    introspector = Introspector()
+    exporter = OpenMetricsExporter(introspector.call_counter)
+    introspector.call_counter.counts['say "hi"\\'] = 1
+
+    assert 'function="say \\"hi\\"\\\\"} 1' in exporter.render()
+
+
+def test_metrics_server():
+    introspector = Introspector()
+    exporter = OpenMetricsExporter(
+        introspector.call_counter, introspector.execution_timer
+    )
+
+    @introspector.introspect
+    def my_func():
+        pass
+
+    my_func()
+
+    with exporter:
+        host, port = exporter.start_server(port=0)
+        with pytest.raises(RuntimeError):
+            exporter.start_server(port=0)
+
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith(
+                "application/openmetrics-text"
+            )
+            body = response.read().decode()
+        assert 'contemplation_function_calls_total{function="my_func"} 1' in body
+
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://{host}:{port}/other")
+
+    assert "serving=False" in repr(exporter)
+
+
+def test_default_buckets_match_snapshots():
+    from contemplation import take_execution_snapshot
+
+    introspector = Introspector()
+    assert (
+        OpenMetricsExporter(introspector.call_counter).buckets
+        == take_execution_snapshot(introspector.call_counter).buckets
+    )
@@ -0,0 +1,232 @@
+import gc
+import sys
+import tracemalloc
+
+import pytest
+
+from contemplation import (
+    HeapCensus,
+    ReferrerChain,
+    SizeCalculator,
+    compare_heap_snapshots,
+    how_many_of_type_exist,
+    take_heap_census,
+    deep_sizeof,
+    find_referrer_chains,
+    retained_size,
+    take_heap_snapshot,
+)
+
+
+def test_heap_census_counts():
+    class MyClass:
+        pass
+
+    class MySubClass(MyClass):
+        pass
+
+    _1 = MyClass()
+    _2 = MyClass()
+    _3 = MySubClass()
+
+    census = take_heap_census()
+
+    assert census.count(MyClass) == 3
+    assert census.count(MyClass, subclasses=False) == 2
+    assert census.count(MySubClass) == 1
+    assert how_many_of_type_exist(MyClass, census=census) == 3
+    assert MyClass in census
+    assert census.total_objects > 0
+
+
+def test_heap_census_is_a_snapshot():
+    class MyClass:
+        pass
+
+    _1 = MyClass()
+    census = take_heap_census()
+    _2 = MyClass()
+
+    assert census.count(MyClass) == 1
+    assert take_heap_census().count(MyClass) == 2
+
+
+def test_heap_census_sizes():
+    class MyClass:
+        pass
+
+    _1 = MyClass()
+
+    census = take_heap_census(include_sizes=True)
+    assert census.size(MyClass) > 0
+
+    with pytest.raises(ValueError):
+        take_heap_census().size(MyClass)
+
+
+def test_heap_census_generations():
+    gc.collect()
+
+    class MyClass:
+        pass
+
+    _1 = MyClass()
+
+    young = take_heap_census(generations=0)
+    assert young.count(MyClass) == 1
+    assert isinstance(young, HeapCensus)
+
+    with pytest.raises(ValueError):
+        take_heap_census(generations=[5])
+
+
+def test_heap_snapshot_diff():
+    class Leaky:
+        pass
+
+    before = take_heap_snapshot()
+    leaked = [Leaky() for _ in range(100)]
+    after = take_heap_snapshot()
+
+    diff = compare_heap_snapshots(before, after)
+    top = diff.top(5)
+    names = [g.name for g in top]
+    leaky_name = f"{__name__}.test_heap_snapshot_diff.<locals>.Leaky"
+    assert leaky_name in names
+
+    growth = next(g for g in diff.growths if g.name == leaky_name)
+    assert growth.count_diff == 100
+    assert growth.size_diff > 0
+    assert growth.to_dict()["count_after"] == 100
+    assert len(leaked) == 100
+
+
+def test_heap_snapshot_diff_samples():
+    class Leaky:
+        pass
+
+    tracemalloc.start()
+    try:
+        before = take_heap_snapshot()
+        leaked = [[Leaky()] for _ in range(100)]
+        after = take_heap_snapshot()
+        diff = compare_heap_snapshots(before, after, sort_by="size")
+        top = diff.capture_samples(n=len(diff.growths), samples_per_type=2)
+    finally:
+        tracemalloc.stop()
+
+    growth = next(g for g in top if g.name.endswith("Leaky"))
+    assert len(growth.samples) == 2
+    assert all(isinstance(sample, Leaky) for sample in growth.samples)
+
+    growth = next(g for g in top if g.name == "list")
+    assert len(growth.tracebacks) > 0
+    assert len(leaked) == 100
+
+    with pytest.raises(ValueError):
+        compare_heap_snapshots(before, after, sort_by="name")
+
+
+def test_deep_sizeof():
+    inner = [1.5, 2.5, 3.5]
+    outer = [inner, inner]
+
+    assert deep_sizeof(inner) == sys.getsizeof(inner) + 3 * sys.getsizeof(1.5)
+    # the shared inner list is only counted once
+    assert deep_sizeof(outer) == sys.getsizeof(outer) + deep_sizeof(inner)
+    assert deep_sizeof(outer, exclude=[inner]) == sys.getsizeof(outer)
+
+
+def test_deep_sizeof_cycles_and_depth():
+    cyclic = []
+    cyclic.append(cyclic)
+    assert deep_sizeof(cyclic) == sys.getsizeof(cyclic)
+
+    deep = []
+    for _ in range(sys.getrecursionlimit() * 2):
+        deep = [deep]
+    assert deep_sizeof(deep) > sys.getrecursionlimit() * sys.getsizeof([])
+
+
+def test_deep_sizeof_excludes_shared():
+    class MyClass:
+        def __init__(self):
+            self.values = {"a": 1.5}
+
+    my_class = MyClass()
+    size = deep_sizeof(my_class)
+    assert size > sys.getsizeof(my_class)
+    assert size < deep_sizeof(my_class, exclude_shared=False)
+
+
+def test_retained_size():
+    shared = [float(i) for i in range(10)]
+    a = [shared, 1.5]
+    b = [shared, 2.5]
+
+    calculator = SizeCalculator()
+    size_a = calculator.deep_sizeof(a)
+    size_b = calculator.deep_sizeof(b)
+    assert calculator.deep_sizeof(a) == size_a
+
+    combined = retained_size([a, b])
+    assert combined == size_a + size_b - deep_sizeof(shared)
+    assert calculator.retained_size([a, b]) == combined
+
+
+class _Holder:
+    def __init__(self):
+        self.items = {"key": []}
+
+
+_holder = _Holder()
+
+
+def test_find_referrer_chains_from_module_global():
+    class Leaky:
+        pass
+
+    _holder.items["key"].append(Leaky())
+    try:
+        chains = find_referrer_chains(_holder.items["key"][0], max_chains=5)
+        paths = [str(chain) for chain in chains]
+        assert f"{__name__}._holder.items['key'][0]" in paths
+        assert all(isinstance(chain, ReferrerChain) for chain in chains)
+    finally:
+        _holder.items["key"].clear()
+
+
+def test_find_referrer_chains_from_frame():
+    class Leaky:
+        pass
+
+    local_list = [None, Leaky()]
+    chains = find_referrer_chains(local_list[1])
+    assert len(chains) == 1
+    assert str(chains[0]).endswith(".local_list[1]")
+    assert "test_find_referrer_chains_from_frame" in chains[0].root
+    assert len(chains[0]) == 1
+
+
+def test_find_referrer_chains_skips_callers_binding():
+    class Leaky:
+        pass
+
+    target = Leaky()
+    holder = {"key": target}
+    chains = find_referrer_chains(target, max_chains=5)
+    assert [str(chain).rsplit(">", 1)[1] for chain in chains] == [".holder['key']"]
+    assert holder["key"] is target
+
+
+def test_find_referrer_chains_budgets():
+    class Leaky:
+        pass
+
+    nested = [[[[Leaky()]]]]
+    chains = find_referrer_chains(nested[0][0][0][0], max_depth=2)
+    assert chains == []
+    chains = find_referrer_chains(nested[0][0][0][0], max_nodes=1)
+    assert chains == []
+    chains = find_referrer_chains(nested[0][0][0][0], max_depth=4)
+    assert str(chains[0]).endswith(".nested[0][0][0][0]")
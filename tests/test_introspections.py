@@ -1,9 +1,17 @@
+import gc
 from collections import defaultdict
+
+import pytest
+
 from contemplation import (
     how_many_of_my_type_exist,
     how_many_of_type_exist,
     get_name_in_caller_scope,
     get_name_in_all_scope,
+    get_names_in_all_scope,
+    ScopeNameIndex,
+    track_instances,
+    get_instance_registry,
 )
 
 
@@ -68,3 +76,163 @@ def test_all_scope_name():
     assert names[2] == "c"
     assert names[1] == "b"
     assert names[0] == "a"
+
+
+def test_track_instances():
+    @track_instances
+    class MyClass:
+        pass
+
+    registry = get_instance_registry(MyClass)
+    assert registry.live == 0
+
+    my_class = MyClass()
+    my_class_v2 = MyClass()
+
+    assert registry.live == 2
+    assert how_many_of_type_exist(MyClass) == 2
+    assert len(registry.get_instances()) == 2
+
+    del my_class_v2
+    gc.collect()
+
+    stats = registry.get_stats()
+    assert stats["live"] == 1
+    assert stats["high_water_mark"] == 2
+    assert stats["created"] == 2
+    assert stats["destroyed"] == 1
+    assert stats["creation_rate"] > 0
+    assert registry.get_instances()[0] is my_class
+
+
+def test_track_instances_slots():
+    @track_instances
+    class MySlotsClass:
+        __slots__ = ("a",)
+
+        def __init__(self, a):
+            self.a = a
+
+    instances = [MySlotsClass(i) for i in range(10)]
+    registry = get_instance_registry(MySlotsClass)
+    assert registry.live == 10
+
+    del instances[5:]
+    assert registry.live == 5
+    assert registry.high_water_mark == 10
+
+    with pytest.raises(TypeError):
+        registry.get_instances()
+
+
+def test_track_instances_subclass():
+    @track_instances
+    class MyClass:
+        def __init__(self):
+            self.a = 1
+
+    @track_instances
+    class MySubClass(MyClass):
+        def __init__(self):
+            super().__init__()
+
+    _1 = MyClass()
+    _2 = MySubClass()
+
+    assert get_instance_registry(MyClass).live == 2
+    assert get_instance_registry(MySubClass).live == 1
+
+    with pytest.raises(ValueError):
+        get_instance_registry(dict)
+
+
+def test_track_instances_new_and_init():
+    @track_instances
+    class WithNew:
+        def __new__(cls, x):
+            instance = super().__new__(cls)
+            instance.x = x
+            return instance
+
+    @track_instances
+    class WithInit:
+        def __init__(self, x):
+            self.x = x
+
+    class SkipsSuperInit(WithInit):
+        def __init__(self):
+            self.x = 2
+
+    with_new = WithNew(1)
+    with_init = WithInit(1)
+    skips = SkipsSuperInit()
+
+    assert with_new.x == 1 and with_init.x == 1 and skips.x == 2
+    assert get_instance_registry(WithNew).live == 1
+    assert get_instance_registry(WithInit).live == 2
+    assert how_many_of_type_exist(WithInit) == 2
+
+
+def test_track_instances_rejects_arguments():
+    @track_instances
+    class NoInit:
+        pass
+
+    with pytest.raises(TypeError, match="takes no arguments"):
+        NoInit(1)
+    with pytest.raises(TypeError, match="takes no arguments"):
+        NoInit(x=1)
+    instances = [NoInit()]
+    assert get_instance_registry(NoInit).live == len(instances)
+
+
+def test_batch_all_scope_names():
+    def f1(a, b):
+        return get_names_in_all_scope([a, b, object()])
+
+    def f2(c, d):
+        return f1(c, d)
+
+    x, y = object(), object()
+    names = f2(x, y)
+    assert names[0][:3] == ["a", "c", "x"]
+    assert names[1][:3] == ["b", "d", "y"]
+    assert names[2] == []
+
+    def f3(e):
+        return get_names_in_all_scope([e], max_depth=1)
+
+    assert f3(x) == [["e"]]
+
+    def f4(g):
+        return get_names_in_all_scope(
+            [g], frame_filter=lambda frame: frame.f_code.co_name != "f4"
+        )
+
+    assert f4(x)[0][0] == "x"
+
+
+def test_scope_name_index_globals_and_closures():
+    captured = object()
+
+    def inner():
+        index = ScopeNameIndex(max_depth=1, include_closures=True)
+        return index.get_names(captured)
+
+    assert inner() == ["captured"]
+    assert ScopeNameIndex(max_depth=1).get_names(pytest) == []
+    assert ScopeNameIndex(max_depth=1, include_globals=True).get_names(pytest) == [
+        "pytest"
+    ]
+
+
+def test_scope_name_index_id_reuse():
+    def exited():
+        tmp = object()
+        return ScopeNameIndex(max_depth=1), id(tmp)
+
+    index, tmp_id = exited()
+    # new objects reuse the ids of freed ones, and must not get the names of the exited frame's locals
+    new_objects = [object() for _ in range(100)]
+    assert all(index.get_names(obj) == [] for obj in new_objects)
+    assert tmp_id not in {id(obj) for obj in new_objects}
@@ -0,0 +1,144 @@
+import io
+import json
+
+import pytest
+
+from contemplation import CallCounter, Column, ExecutionTimer, FunctionLogger, Report
+
+
+def _report():
+    return Report(
+        (Column("name", "Function"), Column("count", "Count")),
+        [("db.query", 5), ("db.connect", 1), ("http.get", 9), ("db.close", 3)],
+    )
+
+
+def test_report_sort_top_and_pattern():
+    report = _report()
+    assert list(report.select()) == list(report.rows)
+    assert [row[0] for row in report.select(sort_by="count", top=2)] == [
+        "http.get",
+        "db.query",
+    ]
+    assert [
+        row[0] for row in report.select(sort_by="count", descending=False, top=2)
+    ] == ["db.connect", "db.close"]
+    assert [row[0] for row in report.select(pattern="db.*", top=2)] == [
+        "db.query",
+        "db.connect",
+    ]
+    with pytest.raises(ValueError):
+        report.render(sort_by="calls")
+    with pytest.raises(ValueError):
+        report.render(output_format="xml")
+
+
+def test_report_formats():
+    file = io.StringIO()
+    _report().render(file, sort_by="count", top=2)
+    assert file.getvalue().splitlines() == [
+        "Function | Count",
+        "----------------",
+        "http.get | 9    ",
+        "db.query | 5    ",
+    ]
+
+    file = io.StringIO()
+    _report().render(file, output_format="csv", pattern="db.c*")
+    assert file.getvalue().splitlines() == [
+        "name,count",
+        "db.connect,1",
+        "db.close,3",
+    ]
+
+    file = io.StringIO()
+    _report().render(file, output_format="json", pattern="http.*")
+    assert json.loads(file.getvalue()) == [{"name": "http.get", "count": 9}]
+
+
+def test_empty_reports(capsys):
+    CallCounter().pretty_print_counts()
+    ExecutionTimer().pretty_print_times()
+    FunctionLogger().pretty_print_logs()
+    out = capsys.readouterr().out
+    assert "Function | Count" in out
+    assert "Function | Calls | Total Time (s)" in out
+    assert "Function | Start Time (s)" in out
+
+    file = io.StringIO()
+    FunctionLogger().pretty_print_logs(file=file, output_format="json")
+    assert json.loads(file.getvalue()) == []
+
+
+def test_pretty_print_times_sorted(capsys):
+    execution_timer = ExecutionTimer()
+
+    @execution_timer.time_execution
+    def fast():
+        pass
+
+    @execution_timer.time_execution
+    def slow():
+        sum(range(100_000))
+
+    fast()
+    slow()
+    execution_timer.pretty_print_times(sort_by="total_time", top=1)
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3
+    assert lines[2].startswith("slow")
+
+
+def test_every_table_is_a_report():
+    from contemplation import (
+        GCMonitor,
+        Introspector,
+        LockMonitor,
+        MemoryProfiler,
+        SamplingProfiler,
+        SlidingWindowMonitor,
+        take_heap_census,
+    )
+
+    introspector = Introspector()
+
+    @introspector.introspect
+    def fast():
+        pass
+
+    @introspector.introspect
+    def slow():
+        sum(range(100_000))
+
+    fast()
+    fast()
+    slow()
+
+    file = io.StringIO()
+    introspector.pretty_print_stats(file=file, sort_by="count", top=1)
+    assert file.getvalue().splitlines()[2].split(" | ")[:2] == ["fast    ", "2    "]
+
+    file = io.StringIO()
+    introspector.pretty_print_stats(file=file, output_format="json", pattern="s*")
+    assert [row["name"] for row in json.loads(file.getvalue())] == ["slow"]
+
+    # nothing recorded
+    for report in (
+        SlidingWindowMonitor().get_report(),
+        MemoryProfiler().get_report(),
+        SamplingProfiler().get_report(),
+        LockMonitor().get_report(),
+        ExecutionTimer().get_generator_report(),
+    ):
+        file = io.StringIO()
+        report.render(file)
+        assert len(file.getvalue().splitlines()) == 2
+
+    file = io.StringIO()
+    GCMonitor().pretty_print_stats(file=file, pattern="2")
+    assert len(file.getvalue().splitlines()) == 3
+
+    file = io.StringIO()
+    take_heap_census().pretty_print(3, file=file, output_format="csv")
+    assert file.getvalue().splitlines()[0] == "type,count"
+    assert len(file.getvalue().splitlines()) == 4
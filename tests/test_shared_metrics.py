@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from contemplation import (
+    Introspector,
+    OpenMetricsExporter,
+    SharedMetricsAggregator,
+    SharedMetricsWriter,
+)
+
+
+def _worker(directory: str, calls: int) -> None:
+    introspector = Introspector()
+    with SharedMetricsWriter(
+        directory,
+        introspector.call_counter,
+        introspector.execution_timer,
+        buckets=(0.001, 0.1),
+    ) as writer:
+        writer.start(interval=0.01)
+
+        @introspector.introspect
+        def handle_request():
+            time.sleep(0.002)
+
+        for _ in range(calls):
+            handle_request()
+
+
+def test_aggregate_worker_processes(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_worker, args=(str(tmp_path), calls))
+        for calls in (5, 10, 15)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    aggregator = SharedMetricsAggregator(str(tmp_path))
+    assert aggregator.get_counts() == {"handle_request": 30}
+    metrics = aggregator.get_function_metrics("handle_request")
+    assert metrics.processes == 3
+    assert metrics.timed_calls == 30
+    assert metrics.total_time >= 0.06
+    assert metrics.get_histogram() == {0.001: 0, 0.1: 30, float("inf"): 0}
+
+    text = OpenMetricsExporter(aggregator=aggregator).render()
+    assert 'contemplation_function_calls_total{function="handle_request"} 30' in text
+    assert (
+        'contemplation_function_duration_seconds_bucket{function="handle_request",le="0.1"} 30'
+        in text
+    )
+
+
+def test_writer_flush_and_reset(tmp_path):
+    introspector = Introspector()
+    writer = SharedMetricsWriter(
+        str(tmp_path),
+        introspector.call_counter,
+        introspector.execution_timer,
+        capacity=1,
+    )
+    aggregator = SharedMetricsAggregator(str(tmp_path))
+
+    @introspector.introspect
+    def first():
+        pass
+
+    @introspector.introspect
+    def second():
+        pass
+
+    first()
+    assert aggregator.get_counts() == {}
+    writer.flush()
+    assert aggregator.get_counts() == {"first": 1}
+
+    # the table grows past its capacity and totals keep increasing after a reset
+    second()
+    writer.flush()
+    introspector.reset()
+    first()
+    writer.flush()
+    assert aggregator.get_counts() == {"first": 2, "second": 1}
+    assert aggregator.get_function_metrics(first).timed_calls == 2
+
+    writer.close(remove=True)
+    assert aggregator.collect() == {}
+
+
+def test_mismatched_buckets(tmp_path):
+    introspector = Introspector()
+
+    @introspector.introspect
+    def my_func():
+        pass
+
+    my_func()
+    with SharedMetricsWriter(
+        str(tmp_path), execution_timer=introspector.execution_timer, buckets=(0.1,)
+    ) as writer:
+        writer.flush()
+    # as if written by another process
+    os.rename(writer.path, tmp_path / "contemplation-0.metrics")
+    with SharedMetricsWriter(
+        str(tmp_path), execution_timer=introspector.execution_timer, buckets=(0.2,)
+    ):
+        pass
+
+    with pytest.raises(ValueError):
+        SharedMetricsAggregator(str(tmp_path)).collect()
+
+
+def test_long_names(tmp_path):
+    introspector = Introspector()
+    writer = SharedMetricsWriter(
+        str(tmp_path), call_counter=introspector.call_counter, capacity=1
+    )
+    aggregator = SharedMetricsAggregator(str(tmp_path))
+
+    # names longer than a slot are neither cut, mid character or otherwise, nor merged
+    prefix = "package.module." + "é" * 60
+    names = [prefix + ".Class.first", prefix + ".Class.second", "short"]
+    for name in names:
+        introspector.call_counter.counts[name] = len(name)
+        writer.flush()
+    assert aggregator.get_counts() == {name: len(name) for name in names}
+
+    writer.close(remove=True)
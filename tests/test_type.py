@@ -426,3 +426,385 @@ def test_type_checking_deep_typing():
         pytest.fail("Type checking passed unexpectedly for invalid input")
     except TypeError:
         assert True
+
+
+def test_deep_checkers_are_cached():
+    from contemplation.experimental.type_introspections import _get_deep_checker
+
+    assert _get_deep_checker(List[int]) is _get_deep_checker(List[int])
+    assert _get_deep_checker(Dict[str, List[int]]) is _get_deep_checker(
+        Dict[str, List[int]]
+    )
+
+
+def test_typing_deep_is_of_type_generics():
+    assert _deep_is_of_type((1, "a"), typing.Tuple[int, str])
+    assert not _deep_is_of_type((1, 2), typing.Tuple[int, str])
+    assert _deep_is_of_type((1, 2, 3), typing.Tuple[int, ...])
+    assert _deep_is_of_type(None, typing.Optional[int])
+    assert _deep_is_of_type([None, [1]], typing.List[typing.Optional[List[int]]])
+    assert not _deep_is_of_type([None, ["1"]], typing.List[typing.Optional[List[int]]])
+    assert _deep_is_of_type([1, 2], typing.Iterable[int])
+    assert not _deep_is_of_type([1, "2"], typing.Iterable[int])
+    assert _deep_is_of_type(len, typing.Callable[[int], int])
+    assert not _deep_is_of_type((1, 2), typing.List[int])
+
+
+def test_type_checking_union_with_any():
+    assert _deep_is_of_type(3, typing.Optional[typing.Any])
+    assert _deep_is_of_type("a", Union[int, typing.Any])
+    assert _deep_is_of_type([None, "a"], List[typing.Optional[typing.Any]])
+
+    @type_enforced()
+    def test_func(a: typing.Optional[typing.Any], b: Union[int, typing.Any]) -> int:
+        return 1
+
+    assert test_func(3, "b") == 1
+    assert test_func(None, None) == 1
+
+
+def test_type_checking_without_return_annotation():
+    @type_enforced()
+    def test_func(a: int):
+        return "a"
+
+    assert test_func(1) == "a"
+    assert test_func.__name__ == "test_func"
+
+
+def test_find_type_violation_budgets():
+    from contemplation.experimental.type_introspections import _find_type_violation
+
+    data = {"a": [1, 2, 3, "4"], "b": [5, 6]}
+    assert _find_type_violation(data, Dict[str, List[int]]) == "['a'][3]"
+    assert _find_type_violation(data, Dict[str, List[int]], max_elements=3) is None
+    assert (
+        _find_type_violation(data, Dict[str, List[int]], max_total_elements=4) is None
+    )
+    assert _find_type_violation(data, List[int]) == ""
+
+    large = list(range(1000)) + ["x"]
+    assert _find_type_violation(large, List[int], max_elements=10) is None
+    assert (
+        _find_type_violation(large, List[int], max_elements=1001, random_sample=True)
+        == "[1000]"
+    )
+    sampled = _find_type_violation(
+        list(range(100)), List[int], max_elements=10, random_sample=True
+    )
+    assert sampled is None
+
+
+def test_type_checking_random_sample_unordered():
+    from contemplation.experimental.type_introspections import (
+        _find_type_violation,
+        _sample_iterable,
+    )
+
+    data = {i: i for i in range(1000)}
+    data[500] = "x"
+    found = {
+        _find_type_violation(data, Dict[int, int], max_elements=10, random_sample=True)
+        for _ in range(2000)
+    }
+    assert found == {None, "[500]"}
+    assert {
+        _find_type_violation(
+            set(data.values()), typing.Set[int], max_elements=10, random_sample=True
+        )
+        for _ in range(2000)
+    } == {None, "{'x'}"}
+
+    sample = list(_sample_iterable(iter(range(1000)), 1000, 10, True))
+    assert len(set(sample)) == 10 and sample == sorted(sample)
+
+
+def test_type_checking_budgeted():
+    @type_enforced(max_elements=2)
+    def test_func(a: Dict[str, List[int]]) -> int:
+        return 1
+
+    assert test_func({"a": [1, 2, "3"]}) == 1
+
+    with pytest.raises(TypeError, match=r"sampled element at \['a'\]\[1\]"):
+        test_func({"a": [1, "2", 3]})
+
+    with pytest.raises(TypeError):
+        test_func([1, 2])
+
+
+def test_type_checking_check_every():
+    @type_enforced(check_every=3)
+    def test_func(a: int) -> int:
+        return 1
+
+    with pytest.raises(TypeError):
+        test_func("1")
+    test_func("1")
+    test_func("1")
+    with pytest.raises(TypeError):
+        test_func("1")
+
+
+def test_type_checking_budgeted_union_and_iterable():
+    from contemplation.experimental.type_introspections import _find_type_violation
+
+    # the 10 elements checked against List[int] are given back before the second member is tried,
+    # which then has the budget to reach the float at the end
+    data = list(range(9)) + ["x", 1.5]
+    assert (
+        _find_type_violation(
+            data, Union[List[int], List[Union[int, str]]], max_total_elements=11
+        )
+        is not None
+    )
+
+    large = list(range(1000)) + ["x"]
+    assert _find_type_violation(large, typing.Sequence[int], max_elements=10) is None
+    assert (
+        _find_type_violation(large, typing.Iterable[int], max_total_elements=1001)
+        == "[1000]"
+    )
+    assert _find_type_violation({"a"}, typing.AbstractSet[int]) == "{'a'}"
+    assert _find_type_violation(iter(["a"]), typing.Iterable[int]) is None
+
+
+def test_type_checking_keyword_only_and_varargs():
+    @type_enforced()
+    def g(*args: str, key: int) -> int:
+        return key
+
+    assert g("a", "b", key=1) == 1
+    with pytest.raises(TypeError):
+        g("a", key="1")
+
+
+def test_typing_deep_is_of_type_homogeneous_containers():
+    import array
+
+    assert _deep_is_of_type(array.array("q", range(10)), typing.Iterable[int])
+    assert not _deep_is_of_type(array.array("d", [1.0]), typing.Iterable[int])
+    assert _deep_is_of_type(range(10), typing.Sequence[int])
+    assert _deep_is_of_type(b"abc", typing.Iterable[int])
+    assert not _deep_is_of_type(b"abc", typing.Iterable[str])
+    assert _deep_is_of_type(list(range(100)), List[int])
+    assert not _deep_is_of_type(list(range(100)) + [True, "a"], List[int])
+    assert _deep_is_of_type({str(i): i for i in range(100)}, Dict[str, int])
+    assert not _deep_is_of_type({str(i): str(i) for i in range(100)}, Dict[str, int])
+
+
+def test_typing_deep_is_of_type_numpy_arrays():
+    np = pytest.importorskip("numpy")
+
+    # the elements are NumPy scalars, checked the same as when iterating the array
+    for array, parameter_type in [
+        (np.arange(10), typing.Iterable[int]),
+        (np.arange(10), typing.Iterable[np.integer]),
+        (np.zeros(10), typing.Iterable[float]),
+        (np.zeros(10, dtype=np.float32), typing.Iterable[float]),
+        (np.zeros((2, 2)), typing.Iterable[float]),
+        (np.array([1, "a"], dtype=object), typing.Iterable[int]),
+    ]:
+        assert _deep_is_of_type(array, parameter_type) == all(
+            _deep_is_of_type(element, parameter_type.__args__[0]) for element in array
+        )
+
+
+def test_introspect_type_homogeneous_containers():
+    from contemplation.experimental import introspect_type
+
+    assert introspect_type(list(range(100))) == List[int]
+    assert introspect_type([1, "a"]) == List[Union[int, str]]
+    assert (
+        introspect_type([(1,), (2, "a")])
+        == List[Union[typing.Tuple[int], typing.Tuple[Union[int, str]]]]
+    )
+    assert (
+        introspect_type({"a": [1], "b": {2}})
+        == Dict[str, Union[List[int], typing.Set[int]]]
+    )
+
+
+def test_introspect_type_cycles_and_depth():
+    from contemplation.experimental import introspect_type, Recursive
+
+    a = [1]
+    a.append(a)
+    assert introspect_type(a) == List[Union[int, Recursive]]
+
+    d = {}
+    d["self"] = d
+    assert introspect_type(d) == Dict[str, Recursive]
+
+    assert introspect_type([]) == List[typing.Any]
+    assert introspect_type({}) == Dict[typing.Any, typing.Any]
+
+    deep = []
+    for _ in range(10_000):
+        deep = [deep]
+    assert introspect_type(deep, max_depth=3) == List[List[List[typing.Any]]]
+    assert introspect_type(deep).__origin__ is list
+    assert (
+        introspect_type([[1], [[2]]], max_depth=2)
+        == List[Union[List[int], List[typing.Any]]]
+    )
+
+    # unbounded by default
+    deep = [1]
+    for _ in range(69):
+        deep = [deep]
+    expected = List[int]
+    for _ in range(69):
+        expected = List[expected]
+    assert introspect_type(deep) == expected
+
+    assert introspect_type([1, "a", 2.0], max_elements=1) == List[int]
+
+
+def test_introspect_type_shared_substructures():
+    from contemplation.experimental import introspect_type
+
+    shared = {"a": [1, 2]}
+    assert introspect_type([shared] * 1000) == List[Dict[str, List[int]]]
+    assert (
+        introspect_type([(shared, shared)]) == List[typing.Tuple[Dict[str, List[int]]]]
+    )
+
+
+def test_schema_accumulator():
+    from contemplation.experimental import SchemaAccumulator
+
+    schema = SchemaAccumulator()
+    schema.add({"a": 1, "b": [1.0]})
+    schema.update(({"a": "x", "c": {1: (1, 2)}} for _ in range(3)), batch_size=2)
+
+    assert schema.count == 4
+    assert (
+        schema.get_type()
+        == Dict[str, Union[int, str, List[float], Dict[int, typing.Tuple[int]]]]
+    )
+    fields = schema.get_schema()["dict"]["fields"]
+    assert fields["a"]["types"] == {"int": 1, "str": 3}
+    assert not fields["a"]["optional"]
+    assert fields["b"]["optional"]
+    assert fields["c"]["dict"]["keys"]["types"] == {"int": 3}
+
+
+def test_schema_accumulator_merge():
+    import pickle
+
+    from contemplation.experimental import SchemaAccumulator
+
+    records = [
+        {"id": i, "tags": ["a"] * (i % 3), "x": None if i % 2 else 1.0}
+        for i in range(100)
+    ]
+    whole = SchemaAccumulator()
+    whole.update(records)
+
+    first, second = SchemaAccumulator(), SchemaAccumulator()
+    first.update(records[:30])
+    second.update(records[30:])
+    merged = pickle.loads(pickle.dumps(first)).merge(pickle.loads(pickle.dumps(second)))
+
+    assert merged.get_schema() == whole.get_schema()
+    assert merged.get_type() == whole.get_type()
+
+
+def test_schema_accumulator_bounded():
+    from contemplation.experimental import SchemaAccumulator
+
+    schema = SchemaAccumulator(max_fields=5)
+    schema.update({str(i): i} for i in range(20))
+    assert schema.get_type() == Dict[str, int]
+    assert schema.get_schema()["dict"]["keys"]["count"] == 20
+
+    shared = [1, 2]
+    schema = SchemaAccumulator()
+    schema.add({"a": shared, "b": shared})
+    assert schema.get_type() == Dict[str, List[int]]
+
+    a = [1]
+    a.append(a)
+    schema = SchemaAccumulator(max_depth=2)
+    schema.add(a)
+    assert schema.get_type() == List[Union[int, List[Union[int, list]]]]
+
+
+def test_schema_accumulator_shared_containers():
+    from contemplation.experimental import SchemaAccumulator
+
+    shared = [1, 2, 3]
+    records = [{"a": shared} for _ in range(4)]
+    together = SchemaAccumulator()
+    together.update(records)
+    apart = SchemaAccumulator()
+    apart.update(records, batch_size=1)
+
+    # the same types, but the shared list is only counted once per batch
+    assert together.get_type() == apart.get_type() == Dict[str, List[int]]
+    assert together.count == apart.count == 4
+    assert (
+        together.get_schema()["dict"]["fields"]["a"]["list"]["elements"]["count"] * 4
+        == apart.get_schema()["dict"]["fields"]["a"]["list"]["elements"]["count"]
+    )
+
+
+def test_type_checking_cache_immutable():
+    from contemplation.experimental.type_introspections import (
+        _is_deeply_immutable,
+        _validation_cache,
+    )
+
+    @type_enforced(cache_immutable=True)
+    def test_func(a: typing.Tuple[int, ...]) -> int:
+        return 1
+
+    _validation_cache.clear()
+    config = tuple(range(1000))
+    assert test_func(config) == 1
+    assert test_func(config) == 1
+    assert (_validation_cache.hits, _validation_cache.misses) == (1, 1)
+
+    with pytest.raises(TypeError):
+        test_func((1, "2"))
+    with pytest.raises(TypeError):
+        test_func((1, "2"))
+    assert _validation_cache.hits == 1
+
+    mutable = ([1],)
+    assert not _is_deeply_immutable(mutable)
+    assert _is_deeply_immutable((1, ("a", frozenset({2.0}))))
+
+    @type_enforced(cache_immutable=True)
+    def test_func_2(a: typing.Tuple[List[int]]) -> int:
+        return 1
+
+    test_func_2(mutable)
+    mutable[0].append("1")
+    with pytest.raises(TypeError):
+        test_func_2(mutable)
+
+
+def test_validation_cache_keeps_checker_alive():
+    import gc
+    import weakref
+
+    from contemplation.experimental.type_introspections import _ValidationCache
+
+    # a collected checker's id could be reused by a checker the object would fail
+    cache = _ValidationCache(maxsize=1)
+    config = (1, 2)
+
+    def checker(parameter):
+        return _deep_is_of_type(parameter, typing.Tuple[int, ...])
+
+    checker_ref = weakref.ref(checker)
+    assert cache.check(config, checker)
+    del checker
+    gc.collect()
+    assert checker_ref() is not None
+
+    cache.check((3,), lambda parameter: True)
+    gc.collect()
+    assert checker_ref() is None